@@ -1,99 +1,100 @@
-import ccxt
-import pandas as pd
-import ta
-from synchronize_exchange_time import synchronize_time
 import logging
 import time
 
 # Setup logging if not already set up
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-# Initialize the Bybit exchange
-exchange = ccxt.bybit({
-    'apiKey': 'YOUR_API_KEY',
-    'secret': 'YOUR_API_SECRET',
-    'enableRateLimit': True,
-    'options': {
-        'adjustForTimeDifference': True,
-        'recvWindow': 10000,
-    }
-})
+# ccxt, pandas, numpy and ntplib are imported inside the functions that use them, so
+# `import Backtesting` stays cheap
 
-# Synchronize time with the exchange
-try:
-    time_offset = synchronize_time(exchange, 'pool.ntp.org')
-    logging.info("Time synchronized with offset: %d", time_offset)
-except ccxt.BaseError as e:
-    logging.error("Time synchronization failed: %s", e)
-    exit()
+# Initialize the Bybit exchange
+def initialize_exchange(api_key, api_secret):
+    import ccxt
+    exchange = ccxt.bybit({
+        'apiKey': api_key,
+        'secret': api_secret,
+        'enableRateLimit': True,
+        'options': {
+            'adjustForTimeDifference': True,
+            'recvWindow': 10000,
+        }
+    })
+    logging.info("Initialized Bybit exchange")
+    return exchange
 
 # Function to fetch historical data
-def fetch_ohlcv(symbol, timeframe='1d', limit=365):
+def fetch_ohlcv(exchange, symbol, timeframe='1d', limit=365, time_offset=0):
+    from ohlcv_store import fetch_ohlcv_cached
     params = {
         'recvWindow': 10000,
-        'timestamp': int(time.time() * 1000 + time_offset)
+        'timestamp': int((time.time() + time_offset) * 1000)
     }
-    ohlcv = exchange.fetch_ohlcv(symbol, timeframe=timeframe, limit=limit, params=params)
-    df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-    df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-    return df
+    return fetch_ohlcv_cached(exchange, symbol, timeframe=timeframe, limit=limit, params=params)
 
-# Calculate moving averages
+# Calculate moving averages, RSI and MACD the way the ta library does, from the shared registry
 def calculate_indicators(df):
-    df['SMA_50'] = ta.trend.sma_indicator(df['close'], window=50)
-    df['SMA_200'] = ta.trend.sma_indicator(df['close'], window=200)
-    df['RSI'] = ta.momentum.rsi(df['close'], window=14)
-    df['MACD'] = ta.trend.macd(df['close'])
-    df['MACD_signal'] = ta.trend.macd_signal(df['close'])
-    df['MACD_diff'] = ta.trend.macd_diff(df['close'])
-    return df
+    from indicator_registry import TA_COLUMNS, add_indicator_columns
+    return add_indicator_columns(df, columns=TA_COLUMNS)
 
-# Define the trading strategy
-def trading_strategy(df):
-    signals = ['hold']
-    for i in range(1, len(df)):
-        if df['SMA_50'][i] > df['SMA_200'][i] and df['SMA_50'][i-1] <= df['SMA_200'][i-1]:
-            signals.append('buy')
-        elif df['SMA_50'][i] < df['SMA_200'][i] and df['SMA_50'][i-1] >= df['SMA_200'][i-1]:
-            signals.append('sell')
-        else:
-            signals.append('hold')
-    df['signal'] = signals
+# Define the trading strategy; `rules` defaults to signal_rules.SMA_CROSSOVER
+def trading_strategy(df, rules=None):
+    from signal_rules import SMA_CROSSOVER, compile_strategy
+    df['signal'] = compile_strategy(SMA_CROSSOVER if rules is None else rules)(df)
     return df
 
-# Calculate performance metrics
-def calculate_performance_metrics(df, balance, btc_balance, initial_balance):
-    final_balance = balance + btc_balance * df['close'].iloc[-1]
-    total_return = (final_balance - initial_balance) / initial_balance
-    max_drawdown = ((df['close'].cummax() - df['close']).max()) / df['close'].cummax().max()
-    logging.info(f"Final Balance: {final_balance} USDT")
-    logging.info(f"Total Return: {total_return * 100:.2f}%")
-    logging.info(f"Max Drawdown: {max_drawdown * 100:.2f}%")
+# Calculate performance metrics from the backtest's equity curve
+def calculate_performance_metrics(result, initial_balance, periods_per_year=365):
+    import numpy as np
+    from performance_analytics import equity_stats
+    equity = np.concatenate(([float(initial_balance)], result['equity']))
+    position = np.concatenate(([0], result['position']))
+    stats = equity_stats(equity, position, result['trades'], periods_per_year)
+    logging.info(f"Final Balance: {stats['final_equity']} USDT")
+    logging.info(f"Total Return: {stats['total_return'] * 100:.2f}%")
+    logging.info(f"Max Drawdown: {stats['max_drawdown'] * 100:.2f}%")
+    logging.info(f"Sharpe: {stats['sharpe']:.2f}, Sortino: {stats['sortino']:.2f}, Calmar: {stats['calmar']:.2f}, "
+                 f"Exposure: {stats['exposure'] * 100:.1f}%, Trades: {stats['trades']['count']}")
+    return stats
 
 # Backtesting function
-def backtest_strategy(df):
+def backtest_strategy(df, fee=0.0, slippage=0.0):
+    from vectorized_backtest import backtest_vectorized
     balance = 1000
     initial_balance = balance
-    btc_balance = 0
-    for i in range(len(df)):
-        if df['signal'][i] == 'buy' and balance > 0:
-            btc_balance = balance / df['close'][i]
-            balance = 0
-            logging.info(f"Buy BTC at {df['close'][i]}")
-        elif df['signal'][i] == 'sell' and btc_balance > 0:
-            balance = btc_balance * df['close'][i]
-            btc_balance = 0
-            logging.info(f"Sell BTC at {df['close'][i]}")
-    
-    calculate_performance_metrics(df, balance, btc_balance, initial_balance)
+    result = backtest_vectorized(df['close'].to_numpy(), df['signal'].to_numpy(), balance, fee, slippage)
+    for trade in result['trades']:
+        logging.debug(f"Buy BTC at {df['close'].iloc[trade['entry_index']]}")
+        if trade['exit_index'] >= 0:
+            logging.debug(f"Sell BTC at {df['close'].iloc[trade['exit_index']]}")
+
+    result['stats'] = calculate_performance_metrics(result, initial_balance)
+    return result
 
 # Fetch data, calculate indicators, apply strategy, and backtest
-try:
-    df = fetch_ohlcv('BTC/USDT', '1d', 365)
-    df = calculate_indicators(df)
-    df = trading_strategy(df)
-    backtest_strategy(df)
-except ccxt.BaseError as e:
-    logging.error(f"An error occurred: {e}")
-except Exception as e:
-    logging.error(f"An unexpected error occurred: {e}")
+def main(api_key='YOUR_API_KEY', api_secret='YOUR_API_SECRET'):
+    import ccxt
+    from synchronize_exchange_time import synchronize_time
+    exchange = initialize_exchange(api_key, api_secret)
+
+    # Synchronize time with NTP; NTP errors are retried inside synchronize_time, so only
+    # socket errors (DNS failure, timeout, unreachable network) reach this point
+    try:
+        time_offset = synchronize_time('pool.ntp.org')
+        logging.info("Time synchronized with offset: %d", time_offset)
+    except OSError as e:
+        logging.error("Time synchronization failed: %s", e)
+        return None
+
+    try:
+        df = fetch_ohlcv(exchange, 'BTC/USDT', '1d', 365, time_offset)
+        df = calculate_indicators(df)
+        df = trading_strategy(df)
+        return backtest_strategy(df)
+    except ccxt.BaseError as e:
+        logging.error(f"An error occurred: {e}")
+    except Exception as e:
+        logging.error(f"An unexpected error occurred: {e}")
+
+# Example usage
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,18 @@
-import ccxt
-import pandas as pd
-import numpy as np
 import time
 import logging
-from datetime import datetime, timedelta
-from synchronize_exchange_time import synchronize_time
+from bracket_orders import fetch_reference_price, place_bracket_order
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+# ccxt, pandas, numpy and ntplib (and the modules built on them) are imported inside the
+# functions that use them, so importing this script stays cheap
+
 # Initialize exchange and synchronize time
 def initialize_exchange(api_key, api_secret):
+    import ccxt
+    from exchange_recorder import record_from_env
+    from request_scheduler import schedule
     try:
         exchange = ccxt.bybit({
             'apiKey': api_key,
@@ -18,12 +20,14 @@ def initialize_exchange(api_key, api_secret):
             'enableRateLimit': True,
         })
         logging.info("Initialized Bybit exchange")
-        return exchange
+        return record_from_env(schedule(exchange))
     except Exception as e:
         logging.error("Failed to initialize exchange: %s", e)
         raise e
 
 def synchronize_exchange_time(exchange):
+    import ccxt
+    from synchronize_exchange_time import synchronize_time
     try:
         time_offset = synchronize_time(exchange)
         logging.info("Time synchronized with offset: %d", time_offset)
@@ -34,10 +38,12 @@ def synchronize_exchange_time(exchange):
 
 # Function to fetch historical data
 def fetch_ohlcv(exchange, symbol, timeframe='1h', limit=100, time_offset=0):
+    import ccxt
+    import pandas as pd
     try:
         params = {
             'recvWindow': 10000,
-            'timestamp': int(time.time() * 1000 + time_offset)
+            'timestamp': int((time.time() + time_offset) * 1000)
         }
         ohlcv = exchange.fetch_ohlcv(symbol, timeframe=timeframe, limit=limit, params=params)
         df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
@@ -50,25 +56,16 @@ def fetch_ohlcv(exchange, symbol, timeframe='1h', limit=100, time_offset=0):
 
 # Function to calculate indicators
 def calculate_indicators(df):
-    df['SMA_50'] = df['close'].rolling(window=50).mean()
-    df['SMA_200'] = df['close'].rolling(window=200).mean()
-    df['EMA_12'] = df['close'].ewm(span=12, adjust=False).mean()
-    df['EMA_26'] = df['close'].ewm(span=26, adjust=False).mean()
-    df['MACD'] = df['EMA_12'] - df['EMA_26']
-    df['MACD_signal'] = df['MACD'].ewm(span=9, adjust=False).mean()
+    from indicator_registry import add_indicator_columns
+    df = add_indicator_columns(df)
     df['RSI'] = calculate_rsi(df['close'], 14)
     logging.info("Calculated technical indicators")
     return df
 
 def calculate_rsi(series, period):
-    delta = series.diff(1)
-    gain = delta.where(delta > 0, 0)
-    loss = -delta.where(delta < 0, 0)
-    avg_gain = gain.rolling(window=period).mean()
-    avg_loss = loss.rolling(window=period).mean()
-    rs = avg_gain / avg_loss
-    rsi = 100 - (100 / (1 + rs))
-    return rsi
+    import pandas as pd
+    from indicator_registry import indicator
+    return pd.Series(indicator('RSI', series.to_numpy(), length=period, smoothing='sma'), index=series.index)
 
 # Detect patterns
 def detect_patterns(df):
@@ -78,39 +75,23 @@ def detect_patterns(df):
     return df
 
 def detect_head_and_shoulders(df):
-    pattern = [0] * len(df)
-    for i in range(2, len(df) - 1):
-        if df['high'][i - 2] < df['high'][i - 1] > df['high'][i] and \
-           df['high'][i - 1] > df['high'][i + 1] and \
-           df['low'][i - 2] > df['low'][i - 1] < df['low'][i] and \
-           df['low'][i - 1] < df['low'][i + 1]:
-            pattern[i] = 1
-    return pattern
+    from chart_patterns import head_and_shoulders
+    return head_and_shoulders(df['high'].to_numpy(), df['low'].to_numpy())
 
 def detect_double_top(df):
-    pattern = [0] * len(df)
-    for i in range(1, len(df) - 1):
-        if df['high'][i - 1] < df['high'][i] > df['high'][i + 1] and \
-           df['high'][i] == df['high'][i + 1]:
-            pattern[i] = 1
-    return pattern
-
-# Define the trading strategy
-def trading_strategy(df):
-    signals = ['hold']
-    for i in range(1, len(df)):
-        if df['SMA_50'][i] > df['SMA_200'][i] and df['SMA_50'][i-1] <= df['SMA_200'][i-1]:
-            signals.append('buy')
-        elif df['SMA_50'][i] < df['SMA_200'][i] and df['SMA_50'][i-1] >= df['SMA_200'][i-1]:
-            signals.append('sell')
-        else:
-            signals.append('hold')
-    df['signal'] = signals
+    from chart_patterns import double_top
+    return double_top(df['high'].to_numpy())
+
+# Define the trading strategy; `rules` defaults to signal_rules.SMA_CROSSOVER
+def trading_strategy(df, rules=None):
+    from signal_rules import SMA_CROSSOVER, compile_strategy
+    df['signal'] = compile_strategy(SMA_CROSSOVER if rules is None else rules)(df)
     logging.info("Applied trading strategy")
     return df
 
 # Function to place an order
 def place_order(exchange, symbol, order_type, side, amount, price=None):
+    import ccxt
     try:
         order = exchange.create_order(symbol, order_type, side, amount, price)
         logging.info("Placed order: %s", order)
@@ -121,29 +102,18 @@ def place_order(exchange, symbol, order_type, side, amount, price=None):
 
 # Function to place an order with risk management
 def place_order_with_risk_management(exchange, symbol, side, amount, stop_loss, take_profit):
+    import ccxt
     try:
-        # Place market order
-        order = exchange.create_order(symbol, 'market', side, amount)
-        logging.info(f"Market order placed: {order}")
-        
-        order_price = order['price'] if 'price' in order else None
-        
-        if order_price:
-            stop_loss_price = order_price * (1 - stop_loss) if side == 'buy' else order_price * (1 + stop_loss)
-            take_profit_price = order_price * (1 + take_profit) if side == 'buy' else order_price * (1 - take_profit)
-
-            logging.info(f"Stop Loss: {stop_loss_price}, Take Profit: {take_profit_price}")
-            
-            # Place stop-loss and take-profit orders
-            if side == 'buy':
-                exchange.create_order(symbol, 'stop', 'sell', amount, stop_loss_price)
-                exchange.create_order(symbol, 'limit', 'sell', amount, take_profit_price)
-            else:
-                exchange.create_order(symbol, 'stop', 'buy', amount, stop_loss_price)
-                exchange.create_order(symbol, 'limit', 'buy', amount, take_profit_price)
-            
-        else:
-            logging.warning("Order price not available, cannot calculate stop-loss and take-profit.")
+        # Place market order; stop-loss and take-profit ride on it where the exchange
+        # supports native brackets, otherwise they go out together once the fill is known
+        reference_price = fetch_reference_price(exchange, symbol)
+        bracket = place_bracket_order(exchange, symbol, side, amount, stop_loss, take_profit,
+                                      reference_price=reference_price)
+        logging.info(f"Market order placed: {bracket['entry']}")
+        logging.info(f"Stop Loss: {bracket['stop_loss_price']}, Take Profit: {bracket['take_profit_price']}")
+        return bracket
+    except ValueError as e:
+        logging.warning(f"Order price not available, cannot calculate stop-loss and take-profit: {e}")
     except ccxt.BaseError as e:
         logging.error(f"An error occurred: {e}")
 
@@ -161,6 +131,7 @@ def execute_trading_strategy(exchange, df):
 
 # Main function to run the trading strategy
 def main():
+    import ccxt
     api_key = 'YOUR_API_KEY'
     api_secret = 'YOUR_API_SECRET'
     
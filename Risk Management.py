@@ -1,16 +1,17 @@
-import ccxt
 import logging
-import pandas as pd
-import numpy as np
 from datetime import datetime, timedelta
-import ntplib
 import time
+from bracket_orders import fetch_reference_price, place_bracket_order
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+# ccxt, pandas, numpy and ntplib (and the modules built on them) are imported inside the
+# functions that use them, so importing this script stays cheap
+
 # Synchronize system time with an NTP server
 def synchronize_system_time():
+    import ntplib
     try:
         client = ntplib.NTPClient()
         response = client.request('pool.ntp.org')
@@ -23,6 +24,9 @@ def synchronize_system_time():
 
 # Initialize exchange and synchronize time
 def initialize_exchange(api_key, api_secret):
+    import ccxt
+    from exchange_recorder import record_from_env
+    from request_scheduler import schedule
     try:
         exchange = ccxt.bybit({
             'apiKey': api_key,
@@ -33,16 +37,18 @@ def initialize_exchange(api_key, api_secret):
             }
         })
         logging.info("Initialized Bybit exchange")
-        return exchange
+        return record_from_env(schedule(exchange))
     except Exception as e:
         logging.error("Failed to initialize exchange: %s", e)
         raise e
 
 # Fetch historical data
 def fetch_historical_data(exchange, symbol, timeframe='1h', limit=100):
+    import pandas as pd
+    from bulk_history import load_history
     try:
         since = exchange.parse8601(exchange.iso8601(datetime.utcnow() - timedelta(days=limit)))
-        ohlcv = exchange.fetch_ohlcv(symbol, timeframe, since=since)
+        ohlcv = load_history(exchange, symbol, timeframe, since)
         data = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
         data['timestamp'] = pd.to_datetime(data['timestamp'], unit='ms')
         logging.info(f"Fetched historical data for {symbol}")
@@ -53,25 +59,16 @@ def fetch_historical_data(exchange, symbol, timeframe='1h', limit=100):
 
 # Calculate Technical Indicators
 def calculate_indicators(data):
-    data['SMA_50'] = data['close'].rolling(window=50).mean()
-    data['SMA_200'] = data['close'].rolling(window=200).mean()
-    data['EMA_12'] = data['close'].ewm(span=12, adjust=False).mean()
-    data['EMA_26'] = data['close'].ewm(span=26, adjust=False).mean()
-    data['MACD'] = data['EMA_12'] - data['EMA_26']
-    data['MACD_signal'] = data['MACD'].ewm(span=9, adjust=False).mean()
+    from indicator_registry import add_indicator_columns
+    data = add_indicator_columns(data)
     data['RSI'] = calculate_rsi(data['close'], 14)
     logging.info("Calculated technical indicators")
     return data
 
 def calculate_rsi(series, period):
-    delta = series.diff(1)
-    gain = delta.where(delta > 0, 0)
-    loss = -delta.where(delta < 0, 0)
-    avg_gain = gain.rolling(window=period).mean()
-    avg_loss = loss.rolling(window=period).mean()
-    rs = avg_gain / avg_loss
-    rsi = 100 - (100 / (1 + rs))
-    return rsi
+    import pandas as pd
+    from indicator_registry import indicator
+    return pd.Series(indicator('RSI', series.to_numpy(), length=period, smoothing='sma'), index=series.index)
 
 # Detect patterns
 def detect_patterns(data):
@@ -81,52 +78,77 @@ def detect_patterns(data):
     return data
 
 def detect_head_and_shoulders(data):
-    pattern = [0] * len(data)
-    for i in range(2, len(data) - 1):
-        if data['high'][i - 2] < data['high'][i - 1] > data['high'][i] and \
-           data['high'][i - 1] > data['high'][i + 1] and \
-           data['low'][i - 2] > data['low'][i - 1] < data['low'][i] and \
-           data['low'][i - 1] < data['low'][i + 1]:
-            pattern[i] = 1
-    return pattern
+    from chart_patterns import head_and_shoulders
+    return head_and_shoulders(data['high'].to_numpy(), data['low'].to_numpy())
 
 def detect_double_top(data):
-    pattern = [0] * len(data)
-    for i in range(1, len(data) - 1):
-        if data['high'][i - 1] < data['high'][i] > data['high'][i + 1] and \
-           data['high'][i] == data['high'][i + 1]:
-            pattern[i] = 1
-    return pattern
-
-# Function to place an order with risk management
-def place_order_with_risk_management(exchange, symbol, side, amount, stop_loss, take_profit):
+    from chart_patterns import double_top
+    return double_top(data['high'].to_numpy())
+
+# Function to place an order with risk management; with a risk_engine.RiskEngine the order
+# is first checked against the portfolio limits and the fill is booked on it
+def place_order_with_risk_management(exchange, symbol, side, amount, stop_loss, take_profit, risk_engine=None):
+    import ccxt
+    from risk_engine import APPROVED, REASONS
+    qty = amount if side == 'buy' else -amount
+    if risk_engine is not None:
+        reason = risk_engine.check(symbol, qty)
+        if reason != APPROVED:
+            logging.warning(f"Order rejected by risk engine ({REASONS[reason]}): {side} {amount} {symbol}")
+            return None
     try:
-        # Place market order
-        order = exchange.create_order(symbol, 'market', side, amount)
-        logging.info(f"Market order placed: {order}")
-        
-        order_price = order['price'] if 'price' in order else None
-        
-        if order_price:
-            stop_loss_price = order_price * (1 - stop_loss) if side == 'buy' else order_price * (1 + stop_loss)
-            take_profit_price = order_price * (1 + take_profit) if side == 'buy' else order_price * (1 - take_profit)
-
-            logging.info(f"Stop Loss: {stop_loss_price}, Take Profit: {take_profit_price}")
-            
-            # Place stop-loss and take-profit orders
-            if side == 'buy':
-                exchange.create_order(symbol, 'stop', 'sell', amount, stop_loss_price)
-                exchange.create_order(symbol, 'limit', 'sell', amount, take_profit_price)
-            else:
-                exchange.create_order(symbol, 'stop', 'buy', amount, stop_loss_price)
-                exchange.create_order(symbol, 'limit', 'buy', amount, take_profit_price)
-            
-        else:
-            logging.warning("Order price not available, cannot calculate stop-loss and take-profit.")
+        # Place market order; stop-loss and take-profit ride on it where the exchange
+        # supports native brackets, otherwise they go out together once the fill is known
+        reference_price = fetch_reference_price(exchange, symbol)
+        bracket = place_bracket_order(exchange, symbol, side, amount, stop_loss, take_profit,
+                                      reference_price=reference_price)
+        logging.info(f"Market order placed: {bracket['entry']}")
+        logging.info(f"Stop Loss: {bracket['stop_loss_price']}, Take Profit: {bracket['take_profit_price']}")
+        if risk_engine is not None:
+            risk_engine.on_fill(symbol, qty, bracket['price'])
+        return bracket
+    except ValueError as e:
+        logging.warning(f"Order price not available, cannot calculate stop-loss and take-profit: {e}")
     except ccxt.BaseError as e:
         logging.error(f"An error occurred: {e}")
 
+# Book the exit of a bracket on the risk engine once its stop-loss or take-profit has
+# executed, so the engine's positions follow the exchange. Separate legs are looked up
+# by id; a native bracket's attached stops only show in the exchange's positions, so
+# whatever the engine holds beyond them is booked at the last price. Returns the signed
+# quantity booked (0.0 while the position is still open).
+def book_bracket_exit(exchange, bracket, risk_engine):
+    symbol = bracket['symbol']
+    sign = 1 if bracket['side'] == 'buy' else -1
+    if bracket['stop_loss'] is bracket['entry']:
+        if not exchange.has.get('fetchPositions'):
+            return 0.0
+        side = 'long' if sign > 0 else 'short'
+        held = sum(abs(p.get('contracts') or 0.0) for p in exchange.fetch_positions([symbol]) if p.get('side') == side)
+        closed = min(bracket['amount'], max(sign * risk_engine.position[risk_engine.index[symbol]] - held, 0.0))
+        if closed <= 0:
+            return 0.0
+        price = exchange.fetch_ticker(symbol)['last']
+    else:
+        legs = [(leg, bracket[leg]) for leg in ('stop_loss', 'take_profit') if bracket[leg] is not None]
+        executed = [(leg, exchange.fetch_order(order['id'], symbol)) for leg, order in legs]
+        executed = [(leg, order) for leg, order in executed if order.get('filled')]
+        if not executed:
+            return 0.0
+        leg, order = executed[0]
+        closed = order['filled']
+        price = order.get('average') or order.get('price') or bracket[f'{leg}_price']
+    risk_engine.on_fill(symbol, -sign * closed, price)
+    logging.info(f"Booked exit of {closed} {symbol} at {price} on the risk engine")
+    return -sign * closed
+
+# Feed historical candles to the risk engine; timestamps let it roll the daily loss limit
+def update_risk_engine(risk_engine, symbol, data):
+    for row in data.itertuples():
+        risk_engine.update(symbol, row.high, row.low, row.close, row.timestamp.value // 1_000_000)
+
 def main():
+    from risk_engine import RiskEngine
     api_key = 'YOUR_API_KEY'
     api_secret = 'YOUR_API_SECRET'
     
@@ -138,9 +160,18 @@ def main():
     data = calculate_indicators(data)
     data = detect_patterns(data)
 
+    # Size the order by ATR and put the stop two ATRs away
+    risk_engine = RiskEngine([symbol], equity=1000)
+    update_risk_engine(risk_engine, symbol, data)
+    amount = risk_engine.size_by_atr(symbol, risk_per_trade=0.01)
+    stop_loss = risk_engine.atr_stop(symbol)
+    logging.info(f"ATR sizing: {amount} {symbol}, stop-loss {stop_loss:.2%}")
+
     # Example of placing an order with stop-loss and take-profit
     # Uncomment the line below to place a real order
-    # place_order_with_risk_management(exchange, symbol, 'buy', 0.001, 0.01, 0.02)
+    # bracket = place_order_with_risk_management(exchange, symbol, 'buy', amount, stop_loss, 2 * stop_loss, risk_engine)
+    # Then on every new candle, so the engine sees the stop-loss or take-profit exit:
+    # book_bracket_exit(exchange, bracket, risk_engine)
 
 if __name__ == "__main__":
     main()
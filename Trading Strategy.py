@@ -1,20 +1,21 @@
-import ccxt
-import pandas as pd
 import time
 import logging
 
-import ta
-from synchronize_exchange_time import synchronize_time
-
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+# ccxt, pandas, numpy and ntplib (and the modules built on them) are imported inside the
+# functions that use them, so importing this script stays cheap
+
 # Replace with your actual API credentials
 API_KEY = 'YOUR_API_KEY'
 API_SECRET = 'YOUR_API_SECRET'
 
 # Initialize the Bybit exchange
 def initialize_exchange(api_key, api_secret):
+    import ccxt
+    from exchange_recorder import record_from_env
+    from request_scheduler import schedule
     try:
         exchange = ccxt.bybit({
             'apiKey': api_key,
@@ -22,16 +23,18 @@ def initialize_exchange(api_key, api_secret):
             'enableRateLimit': True,  # This helps to avoid rate limit errors
         })
         logging.info("Initialized Bybit exchange")
-        return exchange
+        return record_from_env(schedule(exchange))
     except Exception as e:
         logging.error("Failed to initialize exchange: %s", e)
         raise e
 
 # Function to fetch historical data
 def fetch_ohlcv(exchange, symbol, timeframe='1h', limit=100, time_offset=0):
+    import ccxt
+    import pandas as pd
     params = {
         'recvWindow': 10000,  # Increased to 10000 milliseconds (10 seconds)
-        'timestamp': int(time.time() * 1000 + time_offset)
+        'timestamp': int((time.time() + time_offset) * 1000)
     }
     try:
         ohlcv = exchange.fetch_ohlcv(symbol, timeframe=timeframe, limit=limit, params=params)
@@ -45,26 +48,15 @@ def fetch_ohlcv(exchange, symbol, timeframe='1h', limit=100, time_offset=0):
 
 # Function to calculate indicators
 def calculate_indicators(df):
-    df['SMA_50'] = df['close'].rolling(window=50).mean()
-    df['SMA_200'] = df['close'].rolling(window=200).mean()
-    df['EMA_12'] = df['close'].ewm(span=12, adjust=False).mean()
-    df['EMA_26'] = df['close'].ewm(span=26, adjust=False).mean()
-    df['MACD'] = df['EMA_12'] - df['EMA_26']
-    df['MACD_signal'] = df['MACD'].ewm(span=9, adjust=False).mean()
-    df['RSI'] = ta.rsi(df['close'], length=14)  # Using pandas_ta for RSI calculation
+    from indicator_registry import add_indicator_columns, indicator
+    df = add_indicator_columns(df)
+    df['RSI'] = indicator('RSI', df['close'].to_numpy(), length=14, smoothing='rma')  # pandas_ta's RSI
     return df
 
-# Define the trading strategy
-def trading_strategy(df):
-    signals = ['hold']  # Initialize with 'hold' for the first entry
-    for i in range(1, len(df)):
-        if df['SMA_50'][i] > df['SMA_200'][i] and df['SMA_50'][i-1] <= df['SMA_200'][i-1]:
-            signals.append('buy')
-        elif df['SMA_50'][i] < df['SMA_200'][i] and df['SMA_50'][i-1] >= df['SMA_200'][i-1]:
-            signals.append('sell')
-        else:
-            signals.append('hold')
-    df['signal'] = signals
+# Define the trading strategy; `rules` defaults to signal_rules.SMA_CROSSOVER
+def trading_strategy(df, rules=None):
+    from signal_rules import SMA_CROSSOVER, compile_strategy
+    df['signal'] = compile_strategy(SMA_CROSSOVER if rules is None else rules)(df)
     return df
 
 # Function to execute trades (placeholder)
@@ -78,6 +70,7 @@ def execute_trade(exchange, symbol, signal):
 
 # Main function to orchestrate the workflow
 def main():
+    from synchronize_exchange_time import synchronize_time
     try:
         # Attempt time synchronization
         time_offset = synchronize_time()
@@ -0,0 +1,125 @@
+import itertools
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+_bracket_ids = itertools.count(1)
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='bracket-leg')
+
+# Stop-loss and take-profit prices around an entry price
+def bracket_prices(side, price, stop_loss_pct, take_profit_pct):
+    if side == 'buy':
+        return price * (1 - stop_loss_pct), price * (1 + take_profit_pct)
+    return price * (1 + stop_loss_pct), price * (1 - take_profit_pct)
+
+# Run an exchange call and record its latency on the bracket
+def _timed(bracket, leg, func, *args):
+    start = time.perf_counter()
+    try:
+        return func(*args)
+    finally:
+        bracket['latency'][leg] = (time.perf_counter() - start) * 1000
+
+# Price the entry actually filled at, asking the exchange only if the response lacks it
+def _fill_price(exchange, bracket, order, symbol):
+    price = order.get('average') or order.get('price')
+    if price is None and order.get('id') is not None:
+        order = _timed(bracket, 'confirm', exchange.fetch_order, order['id'], symbol)
+        price = order.get('average') or order.get('price')
+    return price
+
+# Whether to attach SL/TP to the entry order itself (one round trip instead of three)
+def supports_native_brackets(exchange):
+    has = getattr(exchange, 'has', {}) or {}
+    return bool(has.get('createOrderWithTakeProfitAndStopLoss'))
+
+# Last traded price to anchor native SL/TP on, or None when the exchange takes no native
+# brackets (the legs are then priced from the actual fill and no ticker request is made)
+def fetch_reference_price(exchange, symbol):
+    if not supports_native_brackets(exchange):
+        return None
+    ticker = exchange.fetch_ticker(symbol)
+    return ticker.get('last') or ticker.get('close')
+
+# Cancel legs that are still open and flatten the position after a failed leg. Flattening
+# only follows a rejected leg; when the fill price could not be looked up the position is
+# left open (and logged) rather than sold at market on a lookup error.
+def _unwind(exchange, bracket, flatten):
+    symbol, amount, exit_side = bracket['symbol'], bracket['amount'], bracket['exit_side']
+    for leg in ('stop_loss', 'take_profit'):
+        order = bracket[leg]
+        if order is not None and order.get('id') is not None:
+            try:
+                _timed(bracket, f'cancel_{leg}', exchange.cancel_order, order['id'], symbol)
+                bracket[leg] = None
+                logging.warning(f"Cancelled orphaned {leg} leg {order['id']} of bracket {bracket['id']}")
+            except Exception as e:
+                logging.error(f"Failed to cancel orphaned {leg} leg of bracket {bracket['id']}: {e}")
+    if bracket['entry'] is not None and bracket['price'] is None:
+        logging.error(f"Entry of bracket {bracket['id']} filled but its price is unknown; position left unprotected")
+    elif flatten and bracket['entry'] is not None:
+        try:
+            _timed(bracket, 'flatten', exchange.create_order, symbol, 'market', exit_side, amount, None, {'reduceOnly': True})
+            logging.warning(f"Flattened unprotected position of bracket {bracket['id']}")
+        except Exception as e:
+            logging.error(f"Failed to flatten unprotected position of bracket {bracket['id']}: {e}")
+
+# Place an entry with stop-loss and take-profit tracked as one unit.
+# With native=True (or native=None on an exchange that supports it, given a reference
+# price) the protective prices are attached to the entry order; otherwise the two
+# protective legs are sent concurrently as soon as the entry fill price is known.
+# If any leg fails, the remaining legs are cancelled, the position is flattened and the
+# original error is re-raised with the bracket attached as `error.bracket`. A failed fill
+# price lookup is re-raised the same way but never flattens the position.
+def place_bracket_order(exchange, symbol, side, amount, stop_loss_pct, take_profit_pct,
+                        reference_price=None, native=None, flatten_on_failure=True):
+    exit_side = 'sell' if side == 'buy' else 'buy'
+    bracket = {
+        'id': next(_bracket_ids), 'symbol': symbol, 'side': side, 'exit_side': exit_side, 'amount': amount,
+        'entry': None, 'stop_loss': None, 'take_profit': None, 'price': None,
+        'stop_loss_price': None, 'take_profit_price': None, 'status': 'pending', 'latency': {},
+    }
+    if native is None:
+        native = reference_price is not None and supports_native_brackets(exchange)
+
+    try:
+        if native:
+            stop_loss_price, take_profit_price = bracket_prices(side, reference_price, stop_loss_pct, take_profit_pct)
+            params = {'stopLoss': {'triggerPrice': stop_loss_price}, 'takeProfit': {'triggerPrice': take_profit_price}}
+            order = _timed(bracket, 'entry', exchange.create_order, symbol, 'market', side, amount, None, params)
+            bracket.update(entry=order, stop_loss=order, take_profit=order, price=_fill_price(exchange, bracket, order, symbol),
+                           stop_loss_price=stop_loss_price, take_profit_price=take_profit_price, status='open')
+            return bracket
+
+        order = _timed(bracket, 'entry', exchange.create_order, symbol, 'market', side, amount)
+        bracket['entry'] = order
+        price = _fill_price(exchange, bracket, order, symbol)
+        if price is None:
+            raise ValueError(f"Entry fill price not available for bracket {bracket['id']}")
+        stop_loss_price, take_profit_price = bracket_prices(side, price, stop_loss_pct, take_profit_pct)
+        bracket.update(price=price, stop_loss_price=stop_loss_price, take_profit_price=take_profit_price)
+
+        legs = {
+            'stop_loss': _executor.submit(_timed, bracket, 'stop_loss', exchange.create_order, symbol, 'stop', exit_side, amount, stop_loss_price),
+            'take_profit': _executor.submit(_timed, bracket, 'take_profit', exchange.create_order, symbol, 'limit', exit_side, amount, take_profit_price),
+        }
+        error = None
+        for leg, future in legs.items():
+            try:
+                bracket[leg] = future.result()
+            except Exception as e:
+                logging.error(f"{leg} leg of bracket {bracket['id']} failed: {e}")
+                error = error or e
+        if error is not None:
+            raise error
+        bracket['status'] = 'open'
+        return bracket
+    except Exception as e:
+        bracket['status'] = 'failed'
+        if bracket['entry'] is not None:
+            _unwind(exchange, bracket, flatten_on_failure)
+        e.bracket = bracket
+        raise e
@@ -0,0 +1,97 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import ccxt
+import numpy as np
+from ohlcv_store import timeframe_to_ms
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Thread-safe token bucket shared by every request the loader sends
+class RateLimiter:
+
+    def __init__(self, rate, burst=1, clock=time.monotonic, sleep=time.sleep):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.tokens = float(burst)
+        self.clock = clock
+        self.sleep = sleep
+        self.updated = clock()
+        self.lock = threading.Lock()
+
+    # Block until a request may be sent
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = self.clock()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            self.sleep(wait)
+
+# Split [since, until) into windows of at most page_size candles
+def split_windows(since, until, timeframe, page_size):
+    span = timeframe_to_ms(timeframe) * page_size
+    return [(start, min(start + span, until)) for start in range(since, until, span)]
+
+# Fetch one window, following up if the exchange caps the page below page_size
+def fetch_window(exchange, symbol, timeframe, start, end, page_size, limiter, max_retries=5, backoff_factor=0.5):
+    rows = []
+    since = start
+    retries = 0
+    while since < end:
+        limiter.acquire()
+        try:
+            page = exchange.fetch_ohlcv(symbol, timeframe=timeframe, since=since, limit=page_size)
+        except (ccxt.RateLimitExceeded, ccxt.NetworkError) as e:
+            retries += 1
+            if retries > max_retries:
+                logging.error(f"Giving up on {symbol} {timeframe} window at {since}: {e}")
+                raise e
+            logging.warning(f"Retrying {symbol} {timeframe} window at {since} (attempt {retries}): {e}")
+            time.sleep(backoff_factor * 2 ** (retries - 1))
+            continue
+        page = [row for row in page if since <= row[0] < end]
+        if not page:
+            break
+        rows.extend(page)
+        since = page[-1][0] + 1
+    return rows
+
+# Combine pages into one array ordered by timestamp with duplicates removed
+def stitch_pages(pages):
+    rows = [row for page in pages for row in page]
+    if not rows:
+        return np.empty((0, 6))
+    data = np.asarray(rows, dtype=np.float64)
+    _, first = np.unique(data[:, 0], return_index=True)
+    return data[first]
+
+# Load a long date range for several symbols with up to max_in_flight concurrent requests
+def load_history_many(exchange, symbols, timeframe, since, until=None, page_size=1000,
+                      max_in_flight=8, rate=None, limiter=None):
+    until = until if until is not None else exchange.milliseconds()
+    if limiter is None:
+        # Default to the exchange's own request spacing (rateLimit is milliseconds per request)
+        rate = rate or 1000 / max(getattr(exchange, 'rateLimit', 100), 1)
+        limiter = RateLimiter(rate, burst=max_in_flight)
+    windows = split_windows(since, until, timeframe, page_size)
+    with ThreadPoolExecutor(max_workers=max_in_flight) as pool:
+        futures = {
+            symbol: [pool.submit(fetch_window, exchange, symbol, timeframe, start, end, page_size, limiter)
+                     for start, end in windows]
+            for symbol in symbols
+        }
+        history = {symbol: stitch_pages(f.result() for f in fs) for symbol, fs in futures.items()}
+    for symbol, data in history.items():
+        logging.info(f"Loaded {len(data)} {timeframe} candles for {symbol} in {len(windows)} pages")
+    return history
+
+# Load a long date range for one symbol
+def load_history(exchange, symbol, timeframe, since, until=None, **kwargs):
+    return load_history_many(exchange, [symbol], timeframe, since, until, **kwargs)[symbol]
@@ -0,0 +1,91 @@
+import logging
+from itertools import chain
+import numpy as np
+import pandas as pd
+
+FIELDS = ('open', 'high', 'low', 'close', 'volume')
+
+# Compact candle container: int64 epoch-ms timestamps plus one contiguous (5, n) block
+# holding open/high/low/close/volume rows, float32 by default. Every accessor returns a
+# view. In float32 the candles take about 1.7x less memory than the same candles in a
+# float64 DataFrame (28 bytes per candle against 48), which is as far as this layout
+# goes: the 3x reduction per symbol-timeframe once aimed for is not reached. The live
+# windows (candle_window) keep float64 so indicator values match the DataFrame code
+# exactly, so there the gain is only that to_pandas() wraps the block without copying it.
+class Candles:
+
+    __slots__ = ('timestamp', 'values')
+
+    def __init__(self, timestamp, values):
+        self.timestamp = timestamp
+        self.values = values
+
+    # Build straight from a ccxt fetch_ohlcv response
+    @classmethod
+    def from_ccxt(cls, ohlcv, dtype=np.float32):
+        n = len(ohlcv)
+        # One flat pass over the rows; epoch-ms timestamps are exact in float64
+        flat = np.fromiter(chain.from_iterable(ohlcv), dtype=np.float64, count=n * 6).reshape(n, 6)
+        timestamp = flat[:, 0].astype(np.int64)
+        values = np.empty((5, n), dtype=dtype)
+        values[:] = flat[:, 1:].T
+        return cls(timestamp, values)
+
+    # Build from column arrays (e.g. ohlcv_store.read_candles memmaps); the OHLCV columns are
+    # copied once into the contiguous block, the timestamps are kept as-is when already int64
+    @classmethod
+    def from_columns(cls, columns, dtype=np.float64):
+        values = np.stack([np.asarray(columns[f], dtype=dtype) for f in FIELDS])
+        return cls(np.asarray(columns['timestamp'], dtype=np.int64), values)
+
+    def __len__(self):
+        return len(self.timestamp)
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            raise TypeError('Candles only support slicing, e.g. candles[-100:]')
+        return Candles(self.timestamp[index], self.values[:, index])
+
+    @property
+    def open(self):
+        return self.values[0]
+
+    @property
+    def high(self):
+        return self.values[1]
+
+    @property
+    def low(self):
+        return self.values[2]
+
+    @property
+    def close(self):
+        return self.values[3]
+
+    @property
+    def volume(self):
+        return self.values[4]
+
+    @property
+    def nbytes(self):
+        return self.timestamp.nbytes + self.values.nbytes
+
+    def tail(self, n):
+        return self[-n:] if n else self[len(self):]
+
+    # DataFrame in the layout the rest of the bot uses; the OHLCV block and timestamps are shared, not copied
+    def to_pandas(self):
+        df = pd.DataFrame(self.values.T, columns=list(FIELDS), copy=False)
+        df.insert(0, 'timestamp', pd.Series(self.timestamp.view('datetime64[ms]'), copy=False))
+        return df
+
+# Fetch candles into the compact container instead of a per-fetch DataFrame
+def fetch_candles(exchange, symbol, timeframe='1h', limit=100, params=None, dtype=np.float32):
+    try:
+        ohlcv = exchange.fetch_ohlcv(symbol, timeframe=timeframe, limit=limit, params=params or {})
+        candles = Candles.from_ccxt(ohlcv, dtype)
+        logging.info(f"Fetched {len(candles)} {timeframe} candles for {symbol} ({candles.nbytes} bytes)")
+        return candles
+    except Exception as e:
+        logging.error(f"Error fetching candles for {symbol}: {e}")
+        raise e
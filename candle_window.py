@@ -0,0 +1,112 @@
+import logging
+import numpy as np
+from candle_arrays import Candles
+from ohlcv_store import DEFAULT_STORE, read_candles, update_candles
+
+# Enough history for SMA200 plus some warm-up for the EMAs; limit=100 never fills SMA200
+WINDOW_CANDLES = 250
+
+# Fixed-size window over the last `capacity` candles of one symbol and timeframe.
+# Every candle is written twice, at slot and slot + capacity, so the window in time order
+# is always one contiguous slice and view() needs no copy. Updating the forming candle
+# and rolling forward on close only store scalars into the preallocated arrays.
+class CandleWindow:
+
+    def __init__(self, capacity=WINDOW_CANDLES, dtype=np.float64):
+        self.capacity = capacity
+        self.timestamp = np.zeros(2 * capacity, dtype=np.int64)
+        self.values = np.zeros((5, 2 * capacity), dtype=dtype)
+        self.start = 0
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def full(self):
+        return self.count == self.capacity
+
+    @property
+    def last_timestamp(self):
+        return int(self.timestamp[self.start + self.count - 1]) if self.count else None
+
+    # Apply one candle: the same timestamp as the newest overwrites it in place, a newer one
+    # rolls the window forward, an older one is ignored. Returns True unless ignored.
+    def update(self, timestamp, open_, high, low, close, volume):
+        last = self.last_timestamp
+        if last is not None and timestamp < last:
+            return False
+        if last is None or timestamp > last:
+            if self.count < self.capacity:
+                self.count += 1
+            else:
+                self.start = (self.start + 1) % self.capacity
+        slot = (self.start + self.count - 1) % self.capacity
+        for index in (slot, slot + self.capacity):
+            self.timestamp[index] = timestamp
+            self.values[0, index] = open_
+            self.values[1, index] = high
+            self.values[2, index] = low
+            self.values[3, index] = close
+            self.values[4, index] = volume
+        return True
+
+    # Apply ccxt OHLCV rows in order
+    def extend(self, ohlcv):
+        for timestamp, open_, high, low, close, volume in ohlcv:
+            self.update(timestamp, open_, high, low, close, volume)
+
+    # Apply column arrays (e.g. from ohlcv_store.read_candles), skipping rows already held
+    def extend_columns(self, columns):
+        timestamp = columns['timestamp']
+        first = 0 if self.count == 0 else int(np.searchsorted(timestamp, self.last_timestamp))
+        first = max(first, len(timestamp) - self.capacity)
+        for i in range(first, len(timestamp)):
+            self.update(timestamp[i], columns['open'][i], columns['high'][i], columns['low'][i],
+                        columns['close'][i], columns['volume'][i])
+
+    # Read-only candles in time order. The view shares the window's memory, so it changes
+    # with later updates; copy it to keep a snapshot.
+    def view(self):
+        timestamp = self.timestamp[self.start:self.start + self.count]
+        values = self.values[:, self.start:self.start + self.count]
+        timestamp.flags.writeable = False
+        values.flags.writeable = False
+        return Candles(timestamp, values)
+
+# One window per (symbol, timeframe), created on first use
+class CandleWindows:
+
+    def __init__(self, capacity=WINDOW_CANDLES, dtype=np.float64):
+        self.capacity = capacity
+        self.dtype = dtype
+        self.windows = {}
+
+    def get(self, symbol, timeframe, capacity=None):
+        key = (symbol, timeframe)
+        if key not in self.windows:
+            self.windows[key] = CandleWindow(capacity or self.capacity, self.dtype)
+        return self.windows[key]
+
+    def __iter__(self):
+        return iter(self.windows.items())
+
+# Windows shared by the live entry points in this process
+default_windows = CandleWindows()
+
+# Top up the local store and move only the new and still-forming candles into the window
+def refresh_window(exchange, window, symbol, timeframe='1h', params=None, root=DEFAULT_STORE):
+    try:
+        update_candles(exchange, symbol, timeframe, window.capacity, root, params)
+        window.extend_columns(read_candles(root, symbol, timeframe, limit=window.capacity))
+        return window
+    except Exception as e:
+        logging.error(f"Error refreshing candle window for {symbol} {timeframe}: {e}")
+        raise e
+
+# Ordered DataFrame over the refreshed window for the pandas-based indicator code
+def fetch_window_dataframe(exchange, symbol, timeframe='1h', limit=WINDOW_CANDLES, params=None, windows=None,
+                           root=DEFAULT_STORE):
+    window = (windows or default_windows).get(symbol, timeframe, limit)
+    refresh_window(exchange, window, symbol, timeframe, params, root)
+    return window.view().to_pandas()
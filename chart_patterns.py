@@ -0,0 +1,129 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Every detector takes whole high/low (and optional close) arrays and returns an int8
+# array with 1 on the bars where the pattern is found. Detectors are built from two
+# kernels: fixed-offset comparisons over sliding windows, and swing-point (local
+# extrema) detection. New patterns are added with @register_pattern.
+
+PATTERNS = {}
+
+# Add a detector to the pattern library under a column name
+def register_pattern(name):
+    def decorator(func):
+        PATTERNS[name] = func
+        return func
+    return decorator
+
+# Sliding view where column `before + k` holds values[i + k] for each centre bar i
+def offset_view(values, before, after):
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) < before + after + 1:
+        return np.empty((0, before + after + 1))
+    return sliding_window_view(values, before + after + 1)
+
+# Place per-centre results back on the full bar index
+def _scatter(mask, n, before):
+    out = np.zeros(n, dtype=np.int8)
+    out[before:before + len(mask)] = mask
+    return out
+
+# Bars that are strictly higher than the `order` bars on each side
+def local_maxima(values, order=2):
+    view = offset_view(values, order, order)
+    centre = view[:, order]
+    others = np.concatenate((view[:, :order], view[:, order + 1:]), axis=1)
+    return _scatter(centre > others.max(axis=1, initial=-np.inf), len(values), order).astype(bool)
+
+# Bars that are strictly lower than the `order` bars on each side
+def local_minima(values, order=2):
+    return local_maxima(-np.asarray(values, dtype=np.float64), order)
+
+# Consecutive triples of swing points as index arrays (first, middle, last)
+def _swing_triples(is_swing):
+    idx = np.flatnonzero(is_swing)
+    return idx[:-2], idx[1:-1], idx[2:]
+
+# Mark patterns whose last swing point is at `last` on the bar the swing is confirmed,
+# `order` bars later, so no bar is flagged using bars after it. Patterns confirmed past
+# the end of the data are dropped.
+def _mark_confirmed(n, last, order):
+    out = np.zeros(n, dtype=np.int8)
+    confirmed = last + order
+    out[confirmed[confirmed < n]] = 1
+    return out
+
+# Three values within `tolerance` of each other (relative to the smallest)
+def _level(a, b, c, tolerance):
+    top = np.maximum(np.maximum(a, b), c)
+    bottom = np.minimum(np.minimum(a, b), c)
+    return top <= bottom * (1 + tolerance)
+
+@register_pattern('HeadAndShoulders')
+def head_and_shoulders(high, low, close=None):
+    h = offset_view(high, 2, 1)
+    l = offset_view(low, 2, 1)
+    mask = ((h[:, 0] < h[:, 1]) & (h[:, 1] > h[:, 2]) & (h[:, 1] > h[:, 3]) &
+            (l[:, 0] > l[:, 1]) & (l[:, 1] < l[:, 2]) & (l[:, 1] < l[:, 3]))
+    return _scatter(mask, len(high), 2)
+
+@register_pattern('DoubleTop')
+def double_top(high, low=None, close=None):
+    h = offset_view(high, 1, 1)
+    mask = (h[:, 0] < h[:, 1]) & (h[:, 1] > h[:, 2]) & (h[:, 1] == h[:, 2])
+    return _scatter(mask, len(high), 1)
+
+@register_pattern('TripleTop')
+def triple_top(high, low=None, close=None, order=3, tolerance=0.01):
+    high = np.asarray(high, dtype=np.float64)
+    first, middle, last = _swing_triples(local_maxima(high, order))
+    return _mark_confirmed(len(high), last[_level(high[first], high[middle], high[last], tolerance)], order)
+
+@register_pattern('TripleBottom')
+def triple_bottom(high, low, close=None, order=3, tolerance=0.01):
+    low = np.asarray(low, dtype=np.float64)
+    first, middle, last = _swing_triples(local_minima(low, order))
+    return _mark_confirmed(len(low), last[_level(low[first], low[middle], low[last], tolerance)], order)
+
+@register_pattern('InverseHeadAndShoulders')
+def inverse_head_and_shoulders(high, low, close=None, order=3, tolerance=0.02):
+    low = np.asarray(low, dtype=np.float64)
+    first, middle, last = _swing_triples(local_minima(low, order))
+    left, head, right = low[first], low[middle], low[last]
+    shoulders_level = np.abs(left - right) <= np.maximum(left, right) * tolerance
+    return _mark_confirmed(len(low), last[(head < left) & (head < right) & shoulders_level], order)
+
+# Strong move over `pole` bars followed by a tight `flag`-bar consolidation against it;
+# direction=1 finds bull flags and direction=-1 bear flags
+def _flag(high, low, close, direction, pole, flag, pole_return, flag_range):
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    close = (high + low) / 2 if close is None else np.asarray(close, dtype=np.float64)
+    n = len(close)
+    out = np.zeros(n, dtype=np.int8)
+    if n < pole + flag + 1:
+        return out
+    top = sliding_window_view(high, flag).max(axis=1)[1:]
+    bottom = sliding_window_view(low, flag).min(axis=1)[1:]
+    end = np.arange(flag, n)
+    flag_start = end - flag
+    valid = flag_start >= pole
+    end, flag_start, top, bottom = end[valid], flag_start[valid], top[valid], bottom[valid]
+    move = close[flag_start] / close[flag_start - pole] - 1
+    tight = (top - bottom) <= close[flag_start] * flag_range
+    drift = np.sign(close[end] - close[flag_start]) != direction
+    out[end[(direction * move >= pole_return) & tight & drift]] = 1
+    return out
+
+@register_pattern('BullFlag')
+def bull_flag(high, low, close=None, pole=10, flag=5, pole_return=0.05, flag_range=0.02):
+    return _flag(high, low, close, 1, pole, flag, pole_return, flag_range)
+
+@register_pattern('BearFlag')
+def bear_flag(high, low, close=None, pole=10, flag=5, pole_return=0.05, flag_range=0.02):
+    return _flag(high, low, close, -1, pole, flag, pole_return, flag_range)
+
+# Run several detectors over one symbol's arrays
+def scan_patterns(high, low, close=None, names=None):
+    names = names or list(PATTERNS)
+    return {name: PATTERNS[name](high, low, close) for name in names}
@@ -0,0 +1,175 @@
+import inspect
+import logging
+import threading
+import time
+from collections import deque
+from multiprocessing import shared_memory
+import ntplib
+import numpy as np
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Shared layout (float64): sequence counter, fit base (local ms), offset at base (ms),
+# drift (ms of offset per local ms), number of samples behind the fit
+_SEQ, _BASE, _OFFSET, _DRIFT, _SAMPLES = range(5)
+_FIELDS = 5
+
+# Reads a seqlock reader attempts before giving up on the published fit; a publish takes
+# microseconds, so only a writer that died mid-publish keeps the counter odd this long
+READ_RETRIES = 10_000
+
+# Time source reading the exchange's server clock, paired with the local midpoint of the request
+def exchange_time_source(exchange):
+    def sample(local_ms):
+        sent = local_ms()
+        server = exchange.fetch_time()
+        received = local_ms()
+        return (sent + received) / 2, float(server)
+    return sample
+
+# Time source reading an NTP server; ntplib already corrects for the round trip
+def ntp_time_source(ntp_server='time.google.com'):
+    client = ntplib.NTPClient()
+    def sample(local_ms):
+        response = client.request(ntp_server)
+        received = local_ms()
+        return received, received + response.offset * 1000
+    return sample
+
+# Background clock-skew tracker. It samples its time sources on a thread, fits offset
+# and drift by least squares over recent samples and publishes the fit into shared
+# memory, so corrected timestamps are computed locally without any network call.
+# Sources are listed in order of preference and each keeps its own samples: the
+# exchange and NTP clocks can disagree, so their samples are never fitted together.
+# The first source with samples is published; later ones are fallbacks.
+class ClockService:
+
+    def __init__(self, sources=(), interval=60.0, window=16, local_clock=time.time_ns, name=None):
+        self.sources = list(sources)
+        self.interval = interval
+        self.local_clock = local_clock
+        self.samples = [deque(maxlen=window) for _ in self.sources]
+        self.owner = name is None
+        self.shm = shared_memory.SharedMemory(name=name, create=self.owner, size=_FIELDS * 8)
+        self.state = np.ndarray(_FIELDS, dtype=np.float64, buffer=self.shm.buf)
+        if self.owner:
+            self.state[:] = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+        self._stale = False
+
+    # Attach to a clock published by another process (read-only use)
+    @classmethod
+    def attach(cls, name, local_clock=time.time_ns):
+        return cls(local_clock=local_clock, name=name)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def _local_ms(self):
+        return self.local_clock() / 1e6
+
+    # Take one sample from every source, refit the preferred source and publish
+    def sample(self):
+        for source, samples in zip(self.sources, self.samples):
+            try:
+                local, remote = source(self._local_ms)
+                samples.append((local, remote - local))
+            except Exception as e:
+                logging.warning(f"Clock sample from {getattr(source, '__qualname__', source)} failed: {e}")
+        samples = next((s for s in self.samples if s), None)
+        if samples is not None:
+            self._publish(*self._fit(samples), len(samples))
+
+    def _fit(self, samples):
+        local = np.array([s[0] for s in samples])
+        offset = np.array([s[1] for s in samples])
+        base = local[-1]
+        if len(local) < 3 or np.ptp(local) <= 0:
+            return base, float(np.median(offset)), 0.0
+        drift, intercept = np.polyfit(local - base, offset, 1)
+        return base, float(intercept), float(drift)
+
+    # Seqlock write: readers retry while the counter is odd or changed under them
+    def _publish(self, base, offset, drift, count):
+        state = self.state
+        state[_SEQ] += 1
+        state[_BASE] = base
+        state[_OFFSET] = offset
+        state[_DRIFT] = drift
+        state[_SAMPLES] = count
+        state[_SEQ] += 1
+        logging.info(f"Clock offset {offset:.1f} ms, drift {drift * 3.6e6:.2f} ms/hour from {count} samples")
+
+    # Seqlock read; after READ_RETRIES torn reads the local clock is used uncorrected
+    def _read(self):
+        state = self.state
+        for _ in range(READ_RETRIES):
+            seq = state[_SEQ]
+            base, offset, drift = state[_BASE], state[_OFFSET], state[_DRIFT]
+            if seq % 2 == 0 and state[_SEQ] == seq:
+                self._stale = False
+                return base, offset, drift
+        if not self._stale:
+            logging.warning(f"Clock {self.name} stuck mid-update after {READ_RETRIES} reads; using the local clock")
+            self._stale = True
+        return 0.0, 0.0, 0.0
+
+    # Current estimated offset (server minus local) in milliseconds
+    def offset_ms(self, local=None):
+        base, offset, drift = self._read()
+        local = self._local_ms() if local is None else local
+        return offset + drift * (local - base)
+
+    # Corrected epoch milliseconds, suitable for request timestamps and nonces
+    def milliseconds(self):
+        local = self._local_ms()
+        base, offset, drift = self._read()
+        return int(local + offset + drift * (local - base))
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    # Take a first sample synchronously, then keep sampling in the background
+    def start(self):
+        self.sample()
+        self._thread = threading.Thread(target=self._run, name='clock-service', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def close(self):
+        self.stop()
+        self.state = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+# Make ccxt sign requests with corrected timestamps
+def install_clock(exchange, clock):
+    exchange.nonce = clock.milliseconds
+    return exchange
+
+_shared_clock = None
+_shared_lock = threading.Lock()
+
+# Process-wide clock for an exchange, started on first use and installed on the exchange.
+# An async exchange cannot be sampled from the clock thread, so only NTP is used for it;
+# ntp_server=None uses the exchange alone (simulated and replayed runs).
+def shared_clock(exchange, ntp_server='time.google.com', interval=60.0):
+    global _shared_clock
+    with _shared_lock:
+        if _shared_clock is None:
+            sources = [ntp_time_source(ntp_server)] if ntp_server is not None else []
+            if not inspect.iscoroutinefunction(getattr(exchange, 'fetch_time', None)):
+                sources.insert(0, exchange_time_source(exchange))
+            _shared_clock = ClockService(sources, interval).start()
+    install_clock(exchange, _shared_clock)
+    return _shared_clock
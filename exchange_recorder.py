@@ -0,0 +1,212 @@
+import atexit
+import logging
+import marshal
+import numbers
+import os
+import struct
+import threading
+import time
+import zlib
+from collections import defaultdict, deque, namedtuple
+import ccxt
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Set to a file path to record every exchange call made through initialize_exchange
+RECORD_ENV = 'TRADEBOT_RECORD_LOG'
+
+MAGIC = b'TBXLOG1\n'
+# Record header: payload length, call start (epoch ns), call duration (ns), flags
+HEADER = struct.Struct('<IqqB')
+FLAG_ERROR = 1
+FLAG_COMPRESSED = 2
+COMPRESS_ABOVE = 512
+
+# Exchange methods that talk to the exchange or read its clock
+RECORDED_PREFIXES = ('fetch', 'create', 'cancel', 'edit', 'load_markets', 'milliseconds', 'seconds', 'nonce')
+
+# ccxt's HTTP layer under the unified methods; recording it too would log each request twice
+UNRECORDED = ('fetch', 'fetch2')
+
+# Request parameters that legitimately differ between a recorded and a replayed run
+VOLATILE_PARAMS = ('timestamp', 'recvWindow')
+
+Record = namedtuple('Record', ['method', 'args', 'kwargs', 'result', 'error', 'start_ns', 'duration_ns'])
+
+class ReplayMismatch(Exception):
+    pass
+
+def _is_recorded(name):
+    return name.startswith(RECORDED_PREFIXES) and name not in UNRECORDED
+
+# Plain-data copy of call arguments and results so marshal can encode them
+def _plain(value):
+    if isinstance(value, dict):
+        return {k: _plain(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_plain(v) for v in value]
+    if value is None or isinstance(value, (bool, str, bytes)):
+        return value
+    if isinstance(value, numbers.Integral):
+        return int(value)
+    if isinstance(value, numbers.Real):
+        return float(value)
+    return str(value)
+
+# Appends (method, arguments, result or error, timing) records to a binary log. Payloads
+# are marshal-encoded, and compressed with zlib once they are large (e.g. OHLCV pages).
+# Each record is flushed to the OS as it is written, so a crash loses at most the call
+# in progress, and the log is closed at interpreter exit.
+class RecordingExchange:
+
+    def __init__(self, exchange, path):
+        self._exchange = exchange
+        self._path = path
+        self._file = open(path, 'ab')
+        if self._file.tell() == 0:
+            self._file.write(MAGIC)
+            self._file.flush()
+        self._lock = threading.Lock()
+        self._records = 0
+        atexit.register(self.close)
+
+    def __getattr__(self, name):
+        attribute = getattr(self._exchange, name)
+        if not callable(attribute) or not _is_recorded(name):
+            return attribute
+
+        def recorded(*args, **kwargs):
+            start = time.time_ns()
+            began = time.perf_counter_ns()
+            try:
+                result = attribute(*args, **kwargs)
+            except Exception as e:
+                self._write(name, args, kwargs, [type(e).__name__, str(e)], FLAG_ERROR, start, time.perf_counter_ns() - began)
+                raise e
+            self._write(name, args, kwargs, result, 0, start, time.perf_counter_ns() - began)
+            return result
+
+        return recorded
+
+    # Settings such as an installed nonce belong on the wrapped exchange
+    def __setattr__(self, name, value):
+        if name.startswith('_'):
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self._exchange, name, value)
+
+    def _write(self, method, args, kwargs, result, flags, start_ns, duration_ns):
+        payload = marshal.dumps((method, _plain(args), _plain(kwargs), _plain(result)))
+        if len(payload) > COMPRESS_ABOVE:
+            payload = zlib.compress(payload, 1)
+            flags |= FLAG_COMPRESSED
+        with self._lock:
+            self._file.write(HEADER.pack(len(payload), start_ns, duration_ns, flags))
+            self._file.write(payload)
+            self._file.flush()
+            self._records += 1
+
+    def flush(self):
+        with self._lock:
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.close()
+        atexit.unregister(self.close)
+        logging.info(f"Recorded {self._records} exchange calls to {self._path}")
+
+# Records of a log in call order
+def read_log(path):
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not an exchange recording")
+        while True:
+            header = f.read(HEADER.size)
+            if len(header) < HEADER.size:
+                return
+            length, start_ns, duration_ns, flags = HEADER.unpack(header)
+            payload = f.read(length)
+            if len(payload) < length:
+                # Torn final record from an interrupted run
+                return
+            if flags & FLAG_COMPRESSED:
+                payload = zlib.decompress(payload)
+            method, args, kwargs, result = marshal.loads(payload)
+            error = result if flags & FLAG_ERROR else None
+            yield Record(method, args, kwargs, None if error else result, error, start_ns, duration_ns)
+
+def _comparable(args, kwargs):
+    kwargs = dict(kwargs)
+    if isinstance(kwargs.get('params'), dict):
+        kwargs['params'] = {k: v for k, v in kwargs['params'].items() if k not in VOLATILE_PARAMS}
+    args = [{k: v for k, v in a.items() if k not in VOLATILE_PARAMS} if isinstance(a, dict) else a for a in args]
+    return args, kwargs
+
+# Serves a recording back without touching the network or sleeping, and raises recorded
+# errors again as the same ccxt exception types. A call is answered by the earliest
+# unused record of that method with the same arguments (ignoring VOLATILE_PARAMS), so
+# calls made concurrently, such as the two protective legs of a bracket, replay
+# correctly in either order. With strict=True a call no record matches raises
+# ReplayMismatch, catching a changed strategy at the first request that differs;
+# otherwise it takes the method's earliest unused record.
+class ReplayExchange:
+
+    def __init__(self, path, strict=True, exchange_id='bybit'):
+        self.id = exchange_id
+        self.strict = strict
+        self.markets = None
+        self.calls = defaultdict(deque)
+        self.last_ms = 0
+        for record in read_log(path):
+            self.calls[record.method].append(record)
+        self.recorded = sum(len(calls) for calls in self.calls.values())
+
+    def __getattr__(self, name):
+        if name.startswith('_') or not _is_recorded(name):
+            raise AttributeError(name)
+
+        def replayed(*args, **kwargs):
+            return self._replay(name, args, kwargs)
+
+        return replayed
+
+    def _replay(self, method, args, kwargs):
+        calls = self.calls.get(method)
+        if not calls:
+            if method in ('milliseconds', 'nonce'):
+                return self.last_ms
+            raise ReplayMismatch(f"No recorded {method} call left to replay")
+        wanted = _comparable(_plain(args), _plain(kwargs))
+        index = next((i for i, r in enumerate(calls) if _comparable(r.args, r.kwargs) == wanted), None)
+        if index is None:
+            if self.strict:
+                raise ReplayMismatch(f"{method} called with {args} {kwargs}, recorded {calls[0].args} {calls[0].kwargs}")
+            index = 0
+        record = calls[index]
+        del calls[index]
+        self.last_ms = max(self.last_ms, record.start_ns // 1_000_000)
+        if record.error is not None:
+            name, message = record.error
+            raise getattr(ccxt, name, ccxt.ExchangeError)(message)
+        if method == 'load_markets':
+            self.markets = record.result
+        return record.result
+
+    # Recorded calls the replayed run did not make
+    def remaining(self):
+        return {method: len(calls) for method, calls in self.calls.items() if calls}
+
+    def close(self):
+        pass
+
+# Wrap the exchange in a recorder when TRADEBOT_RECORD_LOG is set
+def record_from_env(exchange):
+    path = os.environ.get(RECORD_ENV)
+    if not path:
+        return exchange
+    logging.info(f"Recording exchange calls to {path}")
+    return RecordingExchange(exchange, path)
@@ -3,6 +3,7 @@ import pandas as pd
 import pandas_ta as ta
 import time
 import logging
+from ohlcv_store import fetch_ohlcv_cached
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -28,9 +29,7 @@ def fetch_data(exchange, symbol='BTC/USDT'):
             'recvWindow': 10000,  # Adjust recvWindow as needed
             'timestamp': exchange.milliseconds() + time_offset
         }
-        ohlcv = exchange.fetch_ohlcv(symbol, timeframe='1h', limit=100, params=params)
-        df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+        df = fetch_ohlcv_cached(exchange, symbol, timeframe='1h', limit=100, params=params)
         logging.info("Fetched OHLCV data for %s", symbol)
         
         # Perform technical analysis
@@ -0,0 +1,191 @@
+import datetime
+import importlib
+import json
+import logging
+import os
+import subprocess
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000, 10_000_000]
+DEFAULT_RESULTS = os.path.join('benchmarks', 'indicator_results.jsonl')
+INDICATORS = ['SMA', 'EMA', 'MACD', 'RSI', 'SAR']
+
+# Parabolic SAR is a per-row Python loop in both libraries; larger series take minutes
+LOOP_LIMITS = {'SAR': 100_000}
+
+# tradingbot.calculate_indicators
+def _pandas_ta_backend():
+    pta = importlib.import_module('pandas_ta')
+
+    def sar(d):
+        psar = pta.psar(d['high'], d['low'], d['close'])
+        return psar.iloc[:, 0].fillna(psar.iloc[:, 1])
+
+    return {
+        'SMA': lambda d: pta.sma(d['close'], length=50),
+        'EMA': lambda d: pta.ema(d['close'], length=12),
+        'MACD': lambda d: pta.macd(d['close'], fast=12, slow=26, signal=9).iloc[:, 0],
+        'RSI': lambda d: pta.rsi(d['close'], length=14),
+        'SAR': sar,
+    }
+
+# Backtesting.calculate_indicators
+def _ta_backend():
+    ta = importlib.import_module('ta')
+    return {
+        'SMA': lambda d: ta.trend.sma_indicator(d['close'], window=50),
+        'EMA': lambda d: ta.trend.ema_indicator(d['close'], window=12),
+        'MACD': lambda d: ta.trend.macd(d['close']),
+        'RSI': lambda d: ta.momentum.rsi(d['close'], window=14),
+        'SAR': lambda d: ta.trend.PSARIndicator(d['high'], d['low'], d['close']).psar(),
+    }
+
+# Hand-written rolling/ewm code in Technical_Indicators.py and Placing Orders.py
+def _pandas_backend():
+    def rsi(d):
+        delta = d['close'].diff(1)
+        avg_gain = delta.where(delta > 0, 0).rolling(window=14).mean()
+        avg_loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
+        return 100 - (100 / (1 + avg_gain / avg_loss))
+
+    def macd(d):
+        return d['close'].ewm(span=12, adjust=False).mean() - d['close'].ewm(span=26, adjust=False).mean()
+
+    return {
+        'SMA': lambda d: d['close'].rolling(window=50).mean(),
+        'EMA': lambda d: d['close'].ewm(span=12, adjust=False).mean(),
+        'MACD': macd,
+        'RSI': rsi,
+    }
+
+BACKENDS = {'pandas_ta': _pandas_ta_backend, 'ta': _ta_backend, 'pandas': _pandas_backend}
+
+# Indicator functions of every backend that can be imported here
+def available_backends(names=None):
+    backends = {}
+    for name in names or BACKENDS:
+        try:
+            backends[name] = BACKENDS[name]()
+        except ImportError as e:
+            logging.warning(f"Skipping indicator backend {name}: {e}")
+    return backends
+
+# Random-walk OHLCV frame
+def synthetic_ohlcv(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 30000 * np.exp(np.cumsum(rng.normal(0, 0.002, rows)))
+    spread = np.abs(rng.normal(0, 0.001, rows)) * close
+    return pd.DataFrame({'open': close, 'high': close + spread, 'low': close - spread, 'close': close,
+                         'volume': rng.uniform(1, 100, rows)})
+
+# Best-of-`repeats` wall time, then one traced run for peak allocated memory
+def measure(func, data, repeats=3):
+    best = float('inf')
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func(data)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        func(data)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return best, peak, result
+
+# Largest absolute/relative difference between two backends where both have values
+def compare_outputs(a, b):
+    a = np.asarray(a, dtype=np.float64)
+    b = np.asarray(b, dtype=np.float64)
+    both = ~np.isnan(a) & ~np.isnan(b)
+    diff = np.abs(a[both] - b[both])
+    scale = np.maximum(np.abs(a[both]), np.abs(b[both]))
+    return {
+        'compared': int(both.sum()),
+        'nan_mismatch': int((np.isnan(a) != np.isnan(b)).sum()),
+        'max_abs_diff': float(diff.max()) if diff.size else 0.0,
+        'max_rel_diff': float((diff / np.where(scale > 0, scale, 1)).max()) if diff.size else 0.0,
+    }
+
+# Time every indicator of every backend at every size and diff the backends' outputs
+def run_suite(sizes=DEFAULT_SIZES, backends=None, indicators=INDICATORS, repeats=3, loop_limits=LOOP_LIMITS, seed=0):
+    backends = available_backends(backends)
+    timings, diffs = [], []
+    for size in sizes:
+        data = synthetic_ohlcv(size, seed)
+        for indicator in indicators:
+            if size > loop_limits.get(indicator, size):
+                logging.info(f"Skipping {indicator} at {size} rows (loop-based, limit {loop_limits[indicator]})")
+                continue
+            outputs = {}
+            for backend, funcs in backends.items():
+                if indicator not in funcs:
+                    continue
+                seconds, peak, outputs[backend] = measure(funcs[indicator], data, repeats)
+                timings.append({'size': size, 'indicator': indicator, 'backend': backend,
+                                'seconds': seconds, 'peak_mb': peak / 2 ** 20})
+                logging.info(f"{indicator:5s} {backend:10s} {size:>10,d} rows: {seconds * 1000:9.2f} ms, peak {peak / 2 ** 20:8.1f} MB")
+            names = sorted(outputs)
+            for i, a in enumerate(names):
+                for b in names[i + 1:]:
+                    diffs.append(dict({'size': size, 'indicator': indicator, 'backend_a': a, 'backend_b': b},
+                                      **compare_outputs(outputs[a], outputs[b])))
+    return pd.DataFrame(timings), pd.DataFrame(diffs)
+
+# Code and library versions the run was made with
+def _version_info():
+    info = {'numpy': np.__version__, 'pandas': pd.__version__}
+    for module in ('ta', 'pandas_ta'):
+        try:
+            info[module] = getattr(importlib.import_module(module), '__version__', 'unknown')
+        except ImportError:
+            info[module] = None
+    try:
+        info['commit'] = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                        text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        info['commit'] = None
+    return info
+
+# Append one run to the results file (one JSON object per line)
+def save_results(timings, diffs, path=DEFAULT_RESULTS):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    run = {'time': datetime.datetime.now(datetime.timezone.utc).isoformat(), 'versions': _version_info(),
+           'timings': timings.to_dict('records'), 'diffs': diffs.to_dict('records')}
+    with open(path, 'a') as f:
+        f.write(json.dumps(run) + '\n')
+    return run
+
+def load_results(path=DEFAULT_RESULTS):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+# Timings that got slower than `tolerance` times the previous run
+def check_regressions(previous, current, tolerance=1.25):
+    before = {(t['size'], t['indicator'], t['backend']): t['seconds'] for t in previous['timings']}
+    regressions = []
+    for t in current['timings']:
+        old = before.get((t['size'], t['indicator'], t['backend']))
+        if old and t['seconds'] > old * tolerance:
+            regressions.append(dict(t, previous_seconds=old, ratio=t['seconds'] / old))
+    return regressions
+
+# Example usage
+if __name__ == "__main__":
+    history = load_results()
+    timings, diffs = run_suite()
+    run = save_results(timings, diffs)
+    print(timings.pivot_table(index=['indicator', 'size'], columns='backend', values='seconds'))
+    print(diffs)
+    if history:
+        for regression in check_regressions(history[-1], run):
+            logging.warning(f"Regression: {regression}")
@@ -0,0 +1,188 @@
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from streaming_indicators import ParabolicSAR
+
+# Indicator implementations on plain arrays; they reproduce the pandas, ta and pandas_ta
+# code used in the calculate_indicators copies so cached results are interchangeable with them
+def _sma(source, length):
+    return pd.Series(source).rolling(window=length).mean().to_numpy()
+
+# presma=True seeds the average with the SMA of the first `length` valid values, as pandas_ta does
+def _ema(source, length, presma=False):
+    series = pd.Series(source)
+    if presma:
+        valid = np.flatnonzero(~np.isnan(source))
+        start = valid[0] if len(valid) else len(source)
+        series = series.copy()
+        if len(source) - start >= length:
+            series.iloc[start + length - 1] = series.iloc[start:start + length].mean()
+        series.iloc[start:start + length - 1] = np.nan
+    return series.ewm(span=length, adjust=False).mean().to_numpy()
+
+# smoothing: 'wilder' (the ta library), 'rma' (pandas_ta) or 'sma' (the hand-written copies)
+def _rsi(source, length=14, smoothing='wilder'):
+    delta = pd.Series(source).diff(1)
+    gain = delta.where(delta > 0, 0)
+    loss = -delta.where(delta < 0, 0)
+    if smoothing == 'sma':
+        avg_gain, avg_loss = gain.rolling(window=length).mean(), loss.rolling(window=length).mean()
+    elif smoothing == 'rma':
+        # pandas_ta keeps the first bar's missing change out of the averages
+        avg_gain = delta.clip(lower=0).ewm(alpha=1 / length, min_periods=length).mean()
+        avg_loss = (-delta.clip(upper=0)).ewm(alpha=1 / length, min_periods=length).mean()
+        return (100 * avg_gain / (avg_gain + avg_loss)).to_numpy()
+    else:
+        avg_gain = gain.ewm(alpha=1 / length, min_periods=length, adjust=False).mean()
+        avg_loss = loss.ewm(alpha=1 / length, min_periods=length, adjust=False).mean()
+    return (100 - (100 / (1 + avg_gain / avg_loss))).to_numpy()
+
+# Parabolic SAR of stacked (high, low, close) rows, long and short values merged as in
+# tradingbot's use of pandas_ta.psar
+def _sar(source, af0=0.02, max_af=0.2):
+    sar = ParabolicSAR(af0, max_af)
+    return np.array([sar.update(high, low, close) for high, low, close in source.T])
+
+# One content fingerprint per source array; identical data gives identical keys
+def fingerprint(source):
+    source = np.ascontiguousarray(source)
+    digest = hashlib.blake2b(source.view(np.uint8), digest_size=16)
+    digest.update(f'{source.dtype.str}{source.shape}'.encode())
+    return digest.hexdigest()
+
+# Computes each (indicator, parameters, source series) once and serves it from an LRU
+# cache bounded by a memory budget. Indicators may ask the registry for other indicators
+# (MACD reuses the cached EMAs), so shared work is done only once.
+class IndicatorRegistry:
+
+    def __init__(self, memory_budget=512 * 2 ** 20):
+        self.memory_budget = memory_budget
+        self.functions = {}
+        self.cache = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.RLock()
+        self.register('SMA', lambda registry, source, key, length: _sma(source, length))
+        self.register('EMA', lambda registry, source, key, length, presma=False: _ema(source, length, presma))
+        self.register('RSI', lambda registry, source, key, length=14, smoothing='wilder': _rsi(source, length, smoothing))
+        self.register('MACD', self._macd)
+        self.register('MACD_signal', self._macd_signal)
+        self.register('MACD_diff', self._macd_diff)
+        self.register('SAR', lambda registry, source, key, af0=0.02, max_af=0.2: _sar(source, af0, max_af))
+
+    # Register fn(registry, source, key, **params) under a name
+    def register(self, name, function):
+        self.functions[name] = function
+
+    # MACD family; presma is only passed on when set, so requests without it share cache entries
+    def _macd(self, registry, source, key, fast=12, slow=26, presma=False):
+        seeded = {'presma': True} if presma else {}
+        return (registry.get('EMA', source, key=key, length=fast, **seeded) -
+                registry.get('EMA', source, key=key, length=slow, **seeded))
+
+    def _macd_signal(self, registry, source, key, fast=12, slow=26, signal=9, presma=False):
+        seeded = {'presma': True} if presma else {}
+        macd = registry.get('MACD', source, key=key, fast=fast, slow=slow, **seeded)
+        return registry.get('EMA', macd, key=(key, 'MACD', fast, slow, presma), length=signal, **seeded)
+
+    def _macd_diff(self, registry, source, key, fast=12, slow=26, signal=9, presma=False):
+        seeded = {'presma': True} if presma else {}
+        return (registry.get('MACD', source, key=key, fast=fast, slow=slow, **seeded) -
+                registry.get('MACD_signal', source, key=key, fast=fast, slow=slow, signal=signal, **seeded))
+
+    # Cached indicator values; pass `key` (e.g. symbol, timeframe, last timestamp) to skip hashing
+    def get(self, name, source, key=None, **params):
+        source = np.asarray(source, dtype=np.float64)
+        key = fingerprint(source) if key is None else key
+        cache_key = (name, tuple(sorted(params.items())), key)
+        with self.lock:
+            if cache_key in self.cache:
+                self.hits += 1
+                self.cache.move_to_end(cache_key)
+                return self.cache[cache_key]
+            self.misses += 1
+        values = np.asarray(self.functions[name](self, source, key, **params), dtype=np.float64)
+        values.flags.writeable = False
+        with self.lock:
+            if cache_key not in self.cache:
+                self.cache[cache_key] = values
+                self.nbytes += values.nbytes
+                self._evict()
+        return values
+
+    def _evict(self):
+        while self.nbytes > self.memory_budget and len(self.cache) > 1:
+            _, values = self.cache.popitem(last=False)
+            self.nbytes -= values.nbytes
+            self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.cache.clear()
+            self.nbytes = 0
+
+    def stats(self):
+        return {'entries': len(self.cache), 'bytes': self.nbytes, 'hits': self.hits,
+                'misses': self.misses, 'evictions': self.evictions}
+
+# Registry shared by everything in this process
+default_registry = IndicatorRegistry()
+
+def indicator(name, source, key=None, **params):
+    return default_registry.get(name, source, key=key, **params)
+
+# DataFrame columns an indicator reads; everything not listed reads 'close'
+INDICATOR_SOURCES = {'SAR': ('high', 'low', 'close')}
+
+# Column name -> (indicator, parameters) for the standard set of the strategy scripts
+STANDARD_COLUMNS = {
+    'SMA_50': ('SMA', {'length': 50}),
+    'SMA_200': ('SMA', {'length': 200}),
+    'EMA_12': ('EMA', {'length': 12}),
+    'EMA_26': ('EMA', {'length': 26}),
+    'MACD': ('MACD', {'fast': 12, 'slow': 26}),
+    'MACD_signal': ('MACD_signal', {'fast': 12, 'slow': 26, 'signal': 9}),
+}
+
+# tradingbot's set as pandas_ta computes it: SMA-seeded EMAs, rma-smoothed RSI and Parabolic SAR
+PANDAS_TA_COLUMNS = {
+    'SMA50': ('SMA', {'length': 50}),
+    'SMA200': ('SMA', {'length': 200}),
+    'EMA12': ('EMA', {'length': 12, 'presma': True}),
+    'EMA26': ('EMA', {'length': 26, 'presma': True}),
+    'MACD': ('MACD', {'fast': 12, 'slow': 26, 'presma': True}),
+    'MACD_signal': ('MACD_signal', {'fast': 12, 'slow': 26, 'signal': 9, 'presma': True}),
+    'RSI': ('RSI', {'length': 14, 'smoothing': 'rma'}),
+    'SAR': ('SAR', {}),
+}
+
+# Backtesting's set as the ta library computes it
+TA_COLUMNS = {
+    'SMA_50': ('SMA', {'length': 50}),
+    'SMA_200': ('SMA', {'length': 200}),
+    'RSI': ('RSI', {'length': 14}),
+    'MACD': ('MACD', {'fast': 12, 'slow': 26}),
+    'MACD_signal': ('MACD_signal', {'fast': 12, 'slow': 26, 'signal': 9}),
+    'MACD_diff': ('MACD_diff', {'fast': 12, 'slow': 26, 'signal': 9}),
+}
+
+# Fill indicator columns of a DataFrame from the shared registry; each source is
+# fingerprinted once for all the columns that read it
+def add_indicator_columns(df, registry=None, columns=STANDARD_COLUMNS):
+    registry = registry or default_registry
+    sources = {}
+    for column, (name, params) in columns.items():
+        fields = INDICATOR_SOURCES.get(name, ('close',))
+        if fields not in sources:
+            source = np.vstack([df[f].to_numpy(dtype=np.float64) for f in fields])
+            source = source[0] if len(fields) == 1 else source
+            sources[fields] = (source, fingerprint(source))
+        source, key = sources[fields]
+        df[column] = registry.get(name, source, key=key, **params)
+    logging.debug(f"Indicator registry: {registry.stats()}")
+    return df
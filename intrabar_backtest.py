@@ -0,0 +1,143 @@
+import logging
+import numpy as np
+from vectorized_backtest import signal_codes
+
+# Exit reasons recorded on fills
+ENTRY, STOP_LOSS, TAKE_PROFIT, SIGNAL = 0, 1, 2, 3
+
+# Which level fills first when one bar touches both the stop and the target
+FILL_RULES = ('stop_first', 'target_first', 'nearest_open')
+
+FILL_DTYPE = [('index', np.int64), ('price', np.float64), ('qty', np.float64), ('fee', np.float64), ('reason', np.int8)]
+
+# First index in [start, n) where hit(lo, hi) is true, scanning in growing chunks so a
+# long-lived position does not rescan the whole remaining history
+def _first_hit(hit, start, n, step=256):
+    while start < n:
+        stop = min(start + step, n)
+        mask = hit(start, stop)
+        if mask.any():
+            return start + int(np.argmax(mask))
+        start, step = stop, step * 2
+    return n
+
+# Resolve a bar touching both levels from lower-timeframe candles; None if still ambiguous
+def _resolve_with_lower(lower, bar_start, bar_end, stop_price, target_price):
+    timestamps, high, low = lower
+    a, b = np.searchsorted(timestamps, [bar_start, bar_end])
+    stop_hit = low[a:b] <= stop_price
+    target_hit = high[a:b] >= target_price
+    either = stop_hit | target_hit
+    if not either.any():
+        return None
+    first = int(np.argmax(either))
+    if stop_hit[first] and target_hit[first]:
+        return None
+    return STOP_LOSS if stop_hit[first] else TAKE_PROFIT
+
+# Replay long bracket orders (entry on a buy signal at the close, stop-loss and take-profit
+# placed around the fill price as place_order_with_risk_management does) against each
+# bar's high/low. The inner loop jumps from event to event with array scans, so cost
+# grows with the number of fills rather than the number of bars.
+#   fill_rule         how to order a bar that touches both levels (see FILL_RULES)
+#   lower             optional (timestamps, high, low) of a lower timeframe used to order
+#                     such bars; `timestamps` and `timeframe_ms` locate each bar in it
+#   touch_fill_ratio  share of the remaining take-profit quantity filled when price only
+#                     touches the limit; trading through it by `through` fills it fully
+#   maker_fee / taker_fee charged on the notional of limit / market and stop fills
+def backtest_brackets(open_, high, low, close, signal, stop_loss=0.05, take_profit=0.10, amount=1.0,
+                      initial_balance=1000.0, fill_rule='stop_first', lower=None, timestamps=None,
+                      timeframe_ms=None, touch_fill_ratio=1.0, through=0.0, maker_fee=0.0,
+                      taker_fee=0.0, slippage=0.0):
+    if fill_rule not in FILL_RULES:
+        raise ValueError(f"Unknown fill rule {fill_rule!r}, expected one of {FILL_RULES}")
+    open_, high, low, close = (np.asarray(a, dtype=np.float64) for a in (open_, high, low, close))
+    codes = signal_codes(signal)
+    n = len(close)
+    buys = np.flatnonzero(codes == 1)
+    fills = []
+    i = 0
+    while True:
+        k = np.searchsorted(buys, i)
+        if k == len(buys):
+            break
+        entry = int(buys[k])
+        entry_price = close[entry] * (1 + slippage)
+        fills.append((entry, entry_price, amount, entry_price * amount * taker_fee, ENTRY))
+        stop_price = entry_price * (1 - stop_loss)
+        target_price = entry_price * (1 + take_profit)
+        remaining = amount
+        j = entry + 1
+        while remaining > 0:
+            j = _first_hit(lambda a, b: (low[a:b] <= stop_price) | (high[a:b] >= target_price) | (codes[a:b] == -1), j, n)
+            if j == n:
+                break
+            stop_hit = low[j] <= stop_price
+            target_hit = high[j] >= target_price
+            if stop_hit and target_hit:
+                first = None
+                if lower is not None and timestamps is not None:
+                    first = _resolve_with_lower(lower, timestamps[j], timestamps[j] + timeframe_ms, stop_price, target_price)
+                if first is None:
+                    if fill_rule == 'stop_first':
+                        first = STOP_LOSS
+                    elif fill_rule == 'target_first':
+                        first = TAKE_PROFIT
+                    else:
+                        first = STOP_LOSS if open_[j] - stop_price <= target_price - open_[j] else TAKE_PROFIT
+                stop_hit, target_hit = first == STOP_LOSS, first == TAKE_PROFIT
+            if stop_hit:
+                # A gap through the stop fills at the open
+                price = min(open_[j], stop_price) * (1 - slippage)
+                fills.append((j, price, -remaining, price * remaining * taker_fee, STOP_LOSS))
+                remaining = 0.0
+            elif target_hit:
+                price = max(open_[j], target_price)
+                full = open_[j] >= target_price or high[j] > target_price * (1 + through)
+                qty = remaining if full else remaining * touch_fill_ratio
+                fills.append((j, price, -qty, price * qty * maker_fee, TAKE_PROFIT))
+                remaining -= qty
+                j += 1
+            else:
+                price = close[j] * (1 - slippage)
+                fills.append((j, price, -remaining, price * remaining * taker_fee, SIGNAL))
+                remaining = 0.0
+        if remaining > 0:
+            break
+        i = j + 1
+
+    fills = np.array(fills, dtype=FILL_DTYPE)
+    # Position and cash change only at fills, so equity is rebuilt with cumulative sums
+    position = np.zeros(n)
+    cash = np.zeros(n)
+    np.add.at(position, fills['index'], fills['qty'])
+    np.add.at(cash, fills['index'], -fills['qty'] * fills['price'] - fills['fee'])
+    position = np.cumsum(position)
+    equity = initial_balance + np.cumsum(cash) + position * close
+
+    entries = np.flatnonzero(fills['reason'] == ENTRY)
+    trade_id = np.cumsum(fills['reason'] == ENTRY) - 1
+    trades = np.zeros(len(entries), dtype=[('entry_index', np.int64), ('exit_index', np.int64),
+                                           ('entry_price', np.float64), ('exit_price', np.float64),
+                                           ('qty', np.float64), ('exit_reason', np.int8), ('pnl', np.float64),
+                                           ('fees', np.float64)])
+    if len(entries):
+        exits = fills['reason'] != ENTRY
+        exit_qty = np.bincount(trade_id[exits], -fills['qty'][exits], len(entries))
+        exit_value = np.bincount(trade_id[exits], -fills['qty'][exits] * fills['price'][exits], len(entries))
+        last_exit = np.full(len(entries), -1)
+        last_reason = np.full(len(entries), -1, dtype=np.int8)
+        exit_positions = np.flatnonzero(exits)
+        last_exit[trade_id[exit_positions]] = fills['index'][exit_positions]
+        last_reason[trade_id[exit_positions]] = fills['reason'][exit_positions]
+        trades['entry_index'] = fills['index'][entries]
+        trades['entry_price'] = fills['price'][entries]
+        trades['qty'] = fills['qty'][entries]
+        trades['exit_index'] = np.where(exit_qty >= trades['qty'] - 1e-12, last_exit, -1)
+        trades['exit_price'] = np.where(exit_qty > 0, exit_value / np.where(exit_qty > 0, exit_qty, 1), np.nan)
+        trades['exit_reason'] = last_reason
+        trades['fees'] = np.bincount(trade_id, fills['fee'], len(entries))
+        trades['pnl'] = exit_value - exit_qty * trades['entry_price'] - trades['fees']
+
+    logging.info(f"Intrabar backtest: {n} bars, {len(trades)} trades, {len(fills)} fills, final equity {equity[-1] if n else initial_balance}")
+    return {'fills': fills, 'trades': trades, 'position': position, 'equity': equity}
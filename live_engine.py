@@ -0,0 +1,233 @@
+import asyncio
+import logging
+from collections import defaultdict, deque
+import ccxt.async_support as ccxt_async
+import numpy as np
+from clock_service import shared_clock
+from market_feed import CANDLE
+from ohlcv_store import timeframe_to_ms
+from signal_rules import compile_strategy
+from streaming_indicators import IndicatorSet
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# tradingbot.generate_signals expressed as rules
+TRADINGBOT_RULES = {
+    'buy': 'close > SMA50 and SMA50 > SMA200 and MACD > MACD_signal and RSI < 70',
+    'sell': 'close < SMA50 and SMA50 < SMA200 and MACD < MACD_signal and RSI > 30',
+}
+
+# Column names the backtests use for the same indicators (e.g. signal_rules.SMA_CROSSOVER)
+COLUMN_ALIASES = {'SMA_50': 'SMA50', 'SMA_200': 'SMA200'}
+
+# Columns a rule can read: the candle plus every IndicatorSet output
+LIVE_COLUMNS = ('open', 'high', 'low', 'close', 'volume', 'SMA50', 'SMA200', 'EMA12', 'EMA26', 'MACD',
+                'MACD_signal', 'RSI', 'SAR') + tuple(COLUMN_ALIASES)
+
+# Initialize the async Bybit exchange
+def initialize_async_exchange(api_key, api_secret):
+    exchange = ccxt_async.bybit({
+        'apiKey': api_key,
+        'secret': api_secret,
+        'enableRateLimit': True,
+    })
+    logging.info("Initialized async Bybit exchange")
+    return exchange
+
+# Epoch ms at which the candle containing now_ms closes
+def next_close_ms(now_ms, timeframe):
+    step = timeframe_to_ms(timeframe)
+    return (now_ms // step + 1) * step
+
+# Long-running engine: one lightweight task per (symbol, timeframe) that wakes right after
+# each candle close, fetches only the new bars and feeds them through the streaming
+# indicators and signal rules. No threads are added per symbol. The rules see a rolling
+# window of the last lookback + 1 bars per subscription, so crossovers and lookbacks such
+# as RSI[1] evaluate as in the backtests. The clock defaults to the shared ClockService
+# (exchange/NTP corrected), started when the engine runs. A failed warm-up is retried
+# `warmup_retries` times; if it still fails the subscription starts cold from the current
+# candle, so bars that closed before the engine started are never acted on.
+class LiveEngine:
+
+    def __init__(self, exchange, subscriptions, on_decision=None, rules=TRADINGBOT_RULES,
+                 warmup=250, settle_delay=0.25, max_in_flight=20, clock=None, warmup_retries=3,
+                 warmup_backoff=1.0):
+        self.exchange = exchange
+        self.subscriptions = list(subscriptions)
+        self.on_decision = on_decision
+        self.signals = compile_strategy(rules)
+        if self.signals.lookback is None:
+            raise ValueError(f"Rules with a non-constant lookback cannot run live: {rules}")
+        unknown = set(self.signals.columns) - set(LIVE_COLUMNS)
+        if unknown:
+            raise ValueError(f"Rules use columns the live engine does not compute: {sorted(unknown)}")
+        self.history_length = self.signals.lookback + 1
+        self._columns = sorted(set(self.signals.columns) | {'close'})
+        self.warmup = warmup
+        self.warmup_retries = warmup_retries
+        self.warmup_backoff = warmup_backoff
+        self.settle_delay = settle_delay
+        self.semaphore = asyncio.Semaphore(max_in_flight)
+        self.clock = clock
+        self.indicators = {}
+        self.history = {}
+        self.last_closed = {}
+        self.latency = defaultdict(lambda: deque(maxlen=10_000))
+        self._stopping = asyncio.Event()
+
+    async def _fetch(self, symbol, timeframe, since=None, limit=None):
+        async with self.semaphore:
+            return await self.exchange.fetch_ohlcv(symbol, timeframe=timeframe, since=since, limit=limit)
+
+    # Use the shared exchange/NTP-corrected clock unless one was given; its first sample
+    # is a blocking request, so it is taken off the event loop
+    async def _ensure_clock(self):
+        if self.clock is None:
+            self.clock = (await asyncio.to_thread(shared_clock, self.exchange)).milliseconds
+
+    def _subscribe(self, key):
+        self.indicators[key] = IndicatorSet()
+        self.history[key] = deque(maxlen=self.history_length)
+
+    # Update the indicators with one closed candle and add the bar to the rule window
+    def _update(self, key, candle):
+        _, open_, high, low, close, volume = candle
+        values = self.indicators[key].update(high, low, close)
+        values['close'] = close
+        row = dict(values, open=open_, high=high, low=low, volume=volume)
+        for alias, name in COLUMN_ALIASES.items():
+            row[alias] = row[name]
+        self.history[key].append(row)
+        return values
+
+    # Feed one closed candle through indicators and rules
+    async def _decide(self, symbol, timeframe, candle):
+        key = (symbol, timeframe)
+        timestamp, close = candle[0], candle[4]
+        values = self._update(key, candle)
+        window = self.history[key]
+        data = {c: np.fromiter((row[c] for row in window), np.float64, len(window)) for c in self._columns}
+        signal = self.signals(data)[-1]
+        closed_at = timestamp + timeframe_to_ms(timeframe)
+        self.latency[key].append(self.clock() - closed_at)
+        if self.on_decision is not None:
+            result = self.on_decision(symbol, timeframe, candle, values, signal)
+            if asyncio.iscoroutine(result):
+                await result
+        elif signal != 'hold':
+            logging.info(f"{signal.upper()} signal for {symbol} {timeframe} at {close}")
+        return signal
+
+    # Process candles that have closed since the last decision (the forming one is skipped)
+    async def _process(self, symbol, timeframe, ohlcv):
+        key = (symbol, timeframe)
+        step = timeframe_to_ms(timeframe)
+        now = self.clock()
+        for candle in ohlcv:
+            if candle[0] <= self.last_closed.get(key, -1) or candle[0] + step > now:
+                continue
+            await self._decide(symbol, timeframe, candle)
+            self.last_closed[key] = candle[0]
+
+    # Warm the indicators up on history; decisions on old bars are not acted on. Without
+    # history the last closed candle is taken from the clock, so polling starts after it.
+    async def _warm_up(self, symbol, timeframe):
+        key = (symbol, timeframe)
+        step = timeframe_to_ms(timeframe)
+        for attempt in range(self.warmup_retries + 1):
+            try:
+                history = await self._fetch(symbol, timeframe, limit=self.warmup)
+                now = self.clock()
+                for candle in history:
+                    if candle[0] + step <= now:
+                        self._update(key, candle)
+                        self.last_closed[key] = candle[0]
+                break
+            except Exception as e:
+                logging.warning(f"Warm-up failed for {symbol} {timeframe} on attempt {attempt + 1}: {e}")
+                if attempt < self.warmup_retries:
+                    await asyncio.sleep(self.warmup_backoff * 2 ** attempt)
+        else:
+            logging.error(f"Starting {symbol} {timeframe} without warm-up after {self.warmup_retries + 1} attempts")
+        if key not in self.last_closed:
+            self.last_closed[key] = (self.clock() // step - 1) * step
+
+    async def _watch(self, symbol, timeframe):
+        key = (symbol, timeframe)
+        self._subscribe(key)
+        await self._warm_up(symbol, timeframe)
+        while not self._stopping.is_set():
+            wake = next_close_ms(self.clock(), timeframe) + self.settle_delay * 1000
+            try:
+                await asyncio.wait_for(self._stopping.wait(), max(0.0, (wake - self.clock()) / 1000))
+                break
+            except asyncio.TimeoutError:
+                pass
+            try:
+                ohlcv = await self._fetch(symbol, timeframe, since=self.last_closed.get(key))
+                await self._process(symbol, timeframe, ohlcv)
+            except Exception as e:
+                logging.error(f"Failed to update {symbol} {timeframe}: {e}")
+
+    # Run every subscription until stop() is called or `duration` seconds have passed
+    async def run(self, duration=None):
+        await self._ensure_clock()
+        tasks = [asyncio.create_task(self._watch(symbol, timeframe)) for symbol, timeframe in self.subscriptions]
+        try:
+            if duration is not None:
+                await asyncio.sleep(duration)
+                self.stop()
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    # Decide on closed candles pushed by a market_feed.MarketFeed instead of polling, so
+    # decision latency is bounded by the feed rather than the wake-up schedule
+    async def run_feed(self, feed):
+        await self._ensure_clock()
+        wanted = set(self.subscriptions)
+        subscription = feed.subscribe(kinds=[CANDLE], symbols={symbol for symbol, _ in wanted})
+        pump = asyncio.create_task(feed.run())
+        try:
+            async for event in subscription:
+                key = (event.symbol, event.data['timeframe'])
+                candle = event.data['ohlcv']
+                if not event.data['closed'] or key not in wanted or candle[0] <= self.last_closed.get(key, -1):
+                    continue
+                if key not in self.indicators:
+                    self._subscribe(key)
+                await self._decide(key[0], key[1], candle)
+                self.last_closed[key] = candle[0]
+                if self._stopping.is_set():
+                    break
+        finally:
+            feed.stop()
+            pump.cancel()
+            await asyncio.gather(pump, return_exceptions=True)
+
+    def stop(self):
+        self._stopping.set()
+
+    # Candle-close-to-decision latency percentiles (ms) per subscription
+    def latency_report(self, percentiles=(50, 90, 99)):
+        report = {}
+        for key, samples in self.latency.items():
+            if samples:
+                values = np.percentile(np.asarray(samples), percentiles)
+                report[key] = dict(zip([f'p{p}' for p in percentiles], values.tolist()), count=len(samples))
+        return report
+
+# Example usage
+if __name__ == "__main__":
+    async def main():
+        exchange = initialize_async_exchange('YOUR_API_KEY', 'YOUR_API_SECRET')
+        engine = LiveEngine(exchange, [(s, '1m') for s in ('BTC/USDT', 'ETH/USDT', 'SOL/USDT')])
+        try:
+            await engine.run()
+        finally:
+            logging.info(f"Latency report: {engine.latency_report()}")
+            await exchange.close()
+
+    asyncio.run(main())
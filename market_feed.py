@@ -0,0 +1,324 @@
+import abc
+import asyncio
+import json
+import logging
+import time
+from collections import namedtuple
+import aiohttp
+from aiohttp import web
+from ohlcv_store import timeframe_to_ms
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+TRADE, CANDLE, BOOK = 'trade', 'candle', 'book'
+
+# One market-data update. `data` is
+#   trade:  {'price', 'amount', 'side'}
+#   candle: {'timeframe', 'ohlcv': [timestamp, open, high, low, close, volume], 'closed'}
+#   book:   {'type': 'snapshot' | 'delta', 'bids': [[price, amount]], 'asks': [...], 'seq'}
+FeedEvent = namedtuple('FeedEvent', ['kind', 'symbol', 'timestamp', 'data'])
+
+BYBIT_PUBLIC_URL = 'wss://stream.bybit.com/v5/public/spot'
+
+BYBIT_INTERVALS = {'1m': '1', '3m': '3', '5m': '5', '15m': '15', '30m': '30', '1h': '60', '2h': '120',
+                   '4h': '240', '6h': '360', '12h': '720', '1d': 'D', '1w': 'W', '1M': 'M'}
+
+_END = object()
+
+# Async iterator over the events of one subscriber, optionally filtered by kind and symbol
+class Subscription:
+
+    def __init__(self, kinds=None, symbols=None, maxsize=10_000):
+        self.kinds = set(kinds) if kinds else None
+        self.symbols = set(symbols) if symbols else None
+        self.queue = asyncio.Queue(maxsize)
+
+    def wants(self, event):
+        return (self.kinds is None or event.kind in self.kinds) and (self.symbols is None or event.symbol in self.symbols)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        event = await self.queue.get()
+        if event is _END:
+            raise StopAsyncIteration
+        return event
+
+# Push-style feed: subclasses implement events(), run() fans every event out to the
+# subscribers. Subscriber queues are bounded, so a slow strategy applies backpressure
+# to replay instead of letting memory grow.
+class MarketFeed(abc.ABC):
+
+    def __init__(self):
+        self.subscriptions = []
+        self.published = 0
+        self._stopping = False
+
+    def subscribe(self, kinds=None, symbols=None, maxsize=10_000):
+        subscription = Subscription(kinds, symbols, maxsize)
+        self.subscriptions.append(subscription)
+        return subscription
+
+    # Async generator of FeedEvents from the source
+    @abc.abstractmethod
+    def events(self):
+        pass
+
+    async def publish(self, event):
+        self.published += 1
+        for subscription in self.subscriptions:
+            if subscription.wants(event):
+                await subscription.queue.put(event)
+
+    # Pump events to subscribers until the source ends or stop() is called
+    async def run(self):
+        try:
+            async for event in self.events():
+                if self._stopping:
+                    break
+                await self.publish(event)
+        except asyncio.CancelledError:
+            self._stopping = True
+            raise
+        finally:
+            for subscription in self.subscriptions:
+                if self._stopping:
+                    # Stopped subscribers may not be reading any more; make room for the end marker
+                    while subscription.queue.full():
+                        subscription.queue.get_nowait()
+                    subscription.queue.put_nowait(_END)
+                else:
+                    await subscription.queue.put(_END)
+
+    def stop(self):
+        self._stopping = True
+
+# Bybit v5 topic for one (kind, symbol) subscription
+def bybit_topic(kind, market_id, timeframe='1m', depth=50):
+    if kind == TRADE:
+        return f'publicTrade.{market_id}'
+    if kind == CANDLE:
+        return f'kline.{BYBIT_INTERVALS[timeframe]}.{market_id}'
+    return f'orderbook.{depth}.{market_id}'
+
+# Feed events from one Bybit v5 public websocket message; `symbols` maps market ids to symbols
+def parse_bybit_message(message, symbols):
+    topic = message.get('topic', '')
+    if topic.startswith('publicTrade.'):
+        return [FeedEvent(TRADE, symbols.get(t['s'], t['s']), int(t['T']),
+                          {'price': float(t['p']), 'amount': float(t['v']), 'side': t['S'].lower()})
+                for t in message['data']]
+    if topic.startswith('kline.'):
+        _, interval, market_id = topic.split('.')
+        timeframe = next(tf for tf, code in BYBIT_INTERVALS.items() if code == interval)
+        return [FeedEvent(CANDLE, symbols.get(market_id, market_id), int(k['timestamp']),
+                          {'timeframe': timeframe, 'closed': bool(k['confirm']),
+                           'ohlcv': [int(k['start']), float(k['open']), float(k['high']), float(k['low']),
+                                     float(k['close']), float(k['volume'])]})
+                for k in message['data']]
+    if topic.startswith('orderbook.'):
+        book = message['data']
+        return [FeedEvent(BOOK, symbols.get(book['s'], book['s']), int(message['ts']),
+                          {'type': message['type'], 'seq': book.get('u'),
+                           'bids': [[float(p), float(a)] for p, a in book['b']],
+                           'asks': [[float(p), float(a)] for p, a in book['a']]})]
+    return []
+
+# Inverse of parse_bybit_message, used by the stand-in server
+def encode_bybit_message(event, market_id, depth=50):
+    data = event.data
+    if event.kind == TRADE:
+        return {'topic': f'publicTrade.{market_id}', 'type': 'snapshot', 'ts': event.timestamp,
+                'data': [{'T': event.timestamp, 's': market_id, 'S': data['side'].capitalize(),
+                          'v': str(data['amount']), 'p': str(data['price'])}]}
+    if event.kind == CANDLE:
+        start, open_, high, low, close, volume = data['ohlcv']
+        step = timeframe_to_ms(data['timeframe'])
+        return {'topic': bybit_topic(CANDLE, market_id, data['timeframe']), 'type': 'snapshot', 'ts': event.timestamp,
+                'data': [{'start': start, 'end': start + step - 1, 'interval': BYBIT_INTERVALS[data['timeframe']],
+                          'open': str(open_), 'high': str(high), 'low': str(low), 'close': str(close),
+                          'volume': str(volume), 'confirm': data['closed'], 'timestamp': event.timestamp}]}
+    return {'topic': bybit_topic(BOOK, market_id, depth=depth), 'type': data['type'], 'ts': event.timestamp,
+            'data': {'s': market_id, 'u': data.get('seq'), 'b': [[str(p), str(a)] for p, a in data['bids']],
+                     'a': [[str(p), str(a)] for p, a in data['asks']]}}
+
+def _market_id(symbol):
+    return symbol.split(':')[0].replace('/', '')
+
+# Live feed over a Bybit-style public websocket; reconnects with exponential backoff
+class WebSocketFeed(MarketFeed):
+
+    def __init__(self, symbols, kinds=(TRADE, CANDLE, BOOK), timeframe='1m', depth=50, url=BYBIT_PUBLIC_URL,
+                 max_backoff=30.0):
+        super().__init__()
+        self.symbols = {_market_id(symbol): symbol for symbol in symbols}
+        self.topics = [bybit_topic(kind, market_id, timeframe, depth) for market_id in self.symbols for kind in kinds]
+        self.url = url
+        self.max_backoff = max_backoff
+        self._ws = None
+
+    async def events(self):
+        backoff = 0.5
+        async with aiohttp.ClientSession() as session:
+            while not self._stopping:
+                try:
+                    async with session.ws_connect(self.url, heartbeat=20) as ws:
+                        self._ws = ws
+                        await ws.send_json({'op': 'subscribe', 'args': self.topics})
+                        logging.info(f"Subscribed to {len(self.topics)} topics on {self.url}")
+                        backoff = 0.5
+                        async for message in ws:
+                            if message.type != aiohttp.WSMsgType.TEXT:
+                                break
+                            for event in parse_bybit_message(json.loads(message.data), self.symbols):
+                                yield event
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    logging.warning(f"Websocket feed error on {self.url}: {e}")
+                finally:
+                    self._ws = None
+                if self._stopping:
+                    break
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, self.max_backoff)
+
+    def stop(self):
+        super().stop()
+        if self._ws is not None:
+            asyncio.ensure_future(self._ws.close())
+
+# Local websocket server speaking the Bybit v5 public protocol, for driving WebSocketFeed
+# in tests and load runs without the real exchange
+class StandInServer:
+
+    def __init__(self, host='127.0.0.1', port=0):
+        self.host = host
+        self.port = port
+        self.clients = {}
+        self.runner = None
+        self._connected = asyncio.Event()
+
+    # (host, port) actually bound; with port=0 the port is known once start() returns
+    @property
+    def address(self):
+        return self.host, self.port
+
+    @property
+    def url(self):
+        return f'ws://{self.host}:{self.port}/v5/public/spot'
+
+    async def _handle(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.clients[ws] = set()
+        try:
+            async for message in ws:
+                if message.type == aiohttp.WSMsgType.TEXT:
+                    request_body = json.loads(message.data)
+                    if request_body.get('op') == 'subscribe':
+                        self.clients[ws].update(request_body['args'])
+                        await ws.send_json({'success': True, 'op': 'subscribe'})
+                        self._connected.set()
+        finally:
+            self.clients.pop(ws, None)
+        return ws
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get('/v5/public/spot', self._handle)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, self.host, self.port)
+        await site.start()
+        self.port = self.runner.addresses[0][1]
+        logging.info(f"Stand-in market-data server listening on {self.url}")
+        return self
+
+    async def wait_for_subscriber(self, timeout=5.0):
+        await asyncio.wait_for(self._connected.wait(), timeout)
+
+    # Send an event to every client subscribed to its topic
+    async def publish(self, event):
+        message = encode_bybit_message(event, _market_id(event.symbol))
+        for ws, topics in list(self.clients.items()):
+            if message['topic'] in topics and not ws.closed:
+                await ws.send_str(json.dumps(message))
+
+    async def stop(self):
+        for ws in list(self.clients):
+            await ws.close()
+        if self.runner is not None:
+            await self.runner.cleanup()
+
+# Recorded events are stored one JSON array [kind, symbol, timestamp, data] per line
+def write_events(path, events):
+    count = 0
+    with open(path, 'w') as f:
+        for event in events:
+            f.write(json.dumps(list(event)) + '\n')
+            count += 1
+    return count
+
+def read_events(path):
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                yield FeedEvent(*json.loads(line))
+
+# Closed-candle events for ccxt OHLCV rows, stamped at each candle's close
+def candle_events(ohlcv, symbol, timeframe):
+    step = timeframe_to_ms(timeframe)
+    for row in ohlcv:
+        candle = [int(row[0])] + [float(v) for v in row[1:6]]
+        yield FeedEvent(CANDLE, symbol, candle[0] + step, {'timeframe': timeframe, 'ohlcv': candle, 'closed': True})
+
+# Replays a recording in event-time order at `speed` times real time (1 = as recorded,
+# 1000 = stress test); speed=None replays as fast as subscribers consume. clock() is the
+# replayed time in epoch ms, for components that would otherwise read the wall clock.
+class ReplayFeed(MarketFeed):
+
+    def __init__(self, path, speed=1.0, wall_clock=time.monotonic):
+        super().__init__()
+        self.path = path
+        self.speed = speed
+        self.wall_clock = wall_clock
+        self.now_ms = None
+        self.max_lag = 0.0
+
+    def clock(self):
+        return self.now_ms
+
+    async def events(self):
+        start_wall = start_event = None
+        for event in read_events(self.path):
+            if start_event is None:
+                start_wall, start_event = self.wall_clock(), event.timestamp
+            if self.speed:
+                due = start_wall + (event.timestamp - start_event) / 1000 / self.speed
+                delay = due - self.wall_clock()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                else:
+                    # Falling behind schedule; record how far so stress runs can report it,
+                    # and still let subscribers run before the next event
+                    self.max_lag = max(self.max_lag, -delay)
+                    await asyncio.sleep(0)
+            self.now_ms = event.timestamp
+            yield event
+
+# Example usage
+if __name__ == "__main__":
+    async def main():
+        feed = WebSocketFeed(['BTC/USDT'], kinds=(TRADE, CANDLE))
+        subscription = feed.subscribe()
+        pump = asyncio.create_task(feed.run())
+        count = 0
+        async for event in subscription:
+            print(event)
+            count += 1
+            if count == 20:
+                feed.stop()
+        await pump
+
+    asyncio.run(main())
@@ -0,0 +1,325 @@
+import atexit
+import functools
+import inspect
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Sub-bucket bits of the latency histograms: each power of two is split into 2**SUB_BITS
+# buckets, so a recorded value is within 1/2**SUB_BITS (~3%) of its bucket's lower bound
+SUB_BITS = 5
+_LINEAR = 1 << (SUB_BITS + 1)
+MAX_BUCKETS = (64 - SUB_BITS) << SUB_BITS
+
+_clock = time.perf_counter_ns
+
+STAGE_LATENCY = 'tradebot_stage_latency_seconds'
+STAGE_ERRORS = 'tradebot_stage_errors_total'
+
+# HDR-style log-linear bucket of a value in ns: exact below 2**(SUB_BITS + 1), then
+# 2**SUB_BITS buckets per power of two
+def bucket_index(value):
+    if value < _LINEAR:
+        return value if value > 0 else 0
+    shift = value.bit_length() - SUB_BITS - 1
+    return (shift << SUB_BITS) + (value >> shift)
+
+# Smallest value falling into a bucket
+def bucket_lower_bound(index):
+    if index < _LINEAR:
+        return index
+    shift = (index >> SUB_BITS) - 1
+    return (index - (shift << SUB_BITS)) << shift
+
+# Latency histogram over nanosecond values. Recording is a bit_length, one list
+# increment and one addition, with no locking: a rare lost increment under thread races
+# is accepted. The count and maximum are derived from the buckets when read.
+class Histogram:
+
+    __slots__ = ('counts', 'total')
+
+    def __init__(self):
+        self.counts = [0] * MAX_BUCKETS
+        self.total = 0
+
+    def record(self, value):
+        if value < _LINEAR:
+            index = value if value > 0 else 0
+        else:
+            shift = value.bit_length() - SUB_BITS - 1
+            index = (shift << SUB_BITS) + (value >> shift)
+        self.counts[index] += 1
+        self.total += value
+
+    @property
+    def count(self):
+        return sum(self.counts)
+
+    # Upper bound of the highest non-empty bucket
+    @property
+    def max(self):
+        for index in range(MAX_BUCKETS - 1, -1, -1):
+            if self.counts[index]:
+                return bucket_lower_bound(index + 1) - 1
+        return 0
+
+    # Value (ns) at percentile p, as the lower bound of the bucket holding it
+    def percentile(self, p):
+        count = self.count
+        if not count:
+            return 0
+        target = max(1, int(round(p / 100 * count)))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return bucket_lower_bound(index)
+        return self.max
+
+    # (upper bound in ns, cumulative count) for every non-empty bucket
+    def cumulative(self):
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count:
+                seen += count
+                yield bucket_lower_bound(index + 1), seen
+
+class Counter:
+
+    __slots__ = ('value',)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+# Times one block into a histogram (which also counts the calls) and counts errors. One
+# Span per stage and symbol is reused for every block; start times go on a stack so
+# nested blocks of the same stage time correctly. Like Histogram it takes no lock: blocks
+# of one stage and symbol overlapping on two threads may swap start times.
+class Span:
+
+    __slots__ = ('histogram', 'errors', 'starts')
+
+    def __init__(self, histogram, errors):
+        self.histogram = histogram
+        self.errors = errors
+        self.starts = []
+
+    def __enter__(self):
+        self.starts.append(_clock())
+        return self
+
+    # Histogram.record inlined: spans are the hot path
+    def __exit__(self, exc_type, exc, tb):
+        value = _clock() - self.starts.pop()
+        histogram = self.histogram
+        if value < _LINEAR:
+            index = value if value > 0 else 0
+        else:
+            shift = value.bit_length() - SUB_BITS - 1
+            index = (shift << SUB_BITS) + (value >> shift)
+        histogram.counts[index] += 1
+        histogram.total += value
+        if exc_type is not None:
+            self.errors.value += 1
+        return False
+
+class _NullSpan:
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+def _label_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items() if v is not None))
+
+# Histograms and counters keyed by metric name and labels
+class MetricsRegistry:
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.histograms = {}
+        self.counters = {}
+        self._spans = {}
+        self.lock = threading.Lock()
+
+    def histogram(self, name, **labels):
+        key = (name, _label_key(labels))
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            with self.lock:
+                histogram = self.histograms.setdefault(key, Histogram())
+        return histogram
+
+    def counter(self, name, **labels):
+        key = (name, _label_key(labels))
+        counter = self.counters.get(key)
+        if counter is None:
+            with self.lock:
+                counter = self.counters.setdefault(key, Counter())
+        return counter
+
+    # Spans of one stage keyed by symbol; kept per stage so the hot paths look a span up
+    # without building a key
+    def _stage_spans(self, stage):
+        spans = self._spans.get(stage)
+        if spans is None:
+            with self.lock:
+                spans = self._spans.setdefault(stage, {})
+        return spans
+
+    # Span of one stage and symbol, created on first use
+    def _span(self, stage, symbol):
+        spans = self._stage_spans(stage)
+        span = spans.get(symbol)
+        if span is None:
+            labels = {'stage': stage, 'symbol': symbol}
+            span = spans.setdefault(symbol, Span(self.histogram(STAGE_LATENCY, **labels),
+                                                 self.counter(STAGE_ERRORS, **labels)))
+        return span
+
+    # Context manager timing one stage, optionally per symbol
+    def span(self, stage, symbol=None):
+        if not self.enabled:
+            return _NULL_SPAN
+        try:
+            return self._spans[stage][symbol]
+        except KeyError:
+            return self._span(stage, symbol)
+
+    # Decorator timing every call of a function as a stage; a `symbol` parameter of the
+    # function, when it has one, becomes the symbol label. Calls are timed inline into the
+    # span's histogram and counter, without entering the Span.
+    def timed(self, stage=None):
+        def decorator(function):
+            name = stage or function.__name__
+            signature = inspect.signature(function)
+            position = list(signature.parameters).index('symbol') if 'symbol' in signature.parameters else None
+            default = signature.parameters['symbol'].default if position is not None else None
+            default = None if default is inspect.Parameter.empty else default
+            spans = self._stage_spans(name)
+
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return function(*args, **kwargs)
+                symbol = default
+                if position is not None:
+                    symbol = args[position] if len(args) > position else kwargs.get('symbol', default)
+                span = spans.get(symbol) or self._span(name, symbol)
+                start = _clock()
+                try:
+                    return function(*args, **kwargs)
+                except BaseException:
+                    span.errors.value += 1
+                    raise
+                finally:
+                    value = _clock() - start
+                    histogram = span.histogram
+                    if value < _LINEAR:
+                        index = value if value > 0 else 0
+                    else:
+                        shift = value.bit_length() - SUB_BITS - 1
+                        index = (shift << SUB_BITS) + (value >> shift)
+                    histogram.counts[index] += 1
+                    histogram.total += value
+
+            return wrapper
+        return decorator
+
+    # Prometheus text exposition format (latencies in seconds)
+    def prometheus(self):
+        lines = []
+        with self.lock:
+            histograms = sorted(self.histograms.items())
+            counters = sorted(self.counters.items())
+        typed = set()
+        for (name, labels), histogram in histograms:
+            if name not in typed:
+                lines.append(f'# TYPE {name} histogram')
+                typed.add(name)
+            label_text = ','.join(f'{k}="{v}"' for k, v in labels)
+            prefix = label_text + ',' if label_text else ''
+            for upper, seen in histogram.cumulative():
+                lines.append(f'{name}_bucket{{{prefix}le="{upper / 1e9:.9g}"}} {seen}')
+            count = histogram.count
+            lines.append(f'{name}_bucket{{{prefix}le="+Inf"}} {count}')
+            lines.append(f'{name}_sum{{{label_text}}} {histogram.total / 1e9:.9g}')
+            lines.append(f'{name}_count{{{label_text}}} {count}')
+        for (name, labels), counter in counters:
+            if name not in typed:
+                lines.append(f'# TYPE {name} counter')
+                typed.add(name)
+            label_text = ','.join(f'{k}="{v}"' for k, v in labels)
+            lines.append(f'{name}{{{label_text}}} {counter.value}')
+        return '\n'.join(lines) + '\n'
+
+    # count and p50/p90/p99/max in ms per histogram, keyed by name and labels, for logs
+    def summary(self):
+        report = {}
+        for (name, labels), histogram in sorted(self.histograms.items()):
+            if histogram.count:
+                key = ' '.join([name] + [f'{k}={v}' for k, v in labels])
+                report[key] = {'count': histogram.count, 'p50_ms': histogram.percentile(50) / 1e6,
+                               'p90_ms': histogram.percentile(90) / 1e6, 'p99_ms': histogram.percentile(99) / 1e6,
+                               'max_ms': histogram.max / 1e6}
+        return report
+
+    def dump(self, path):
+        with open(path, 'w') as f:
+            f.write(self.prometheus())
+        logging.info(f"Wrote metrics to {path}")
+
+    # Forget every value; the per-stage span tables are emptied in place because timed
+    # wrappers hold on to them
+    def reset(self):
+        with self.lock:
+            self.histograms.clear()
+            self.counters.clear()
+            for spans in self._spans.values():
+                spans.clear()
+
+# Serve registry.prometheus() on http://host:port/metrics from a daemon thread
+def start_http_server(port=9108, host='127.0.0.1', registry=None):
+    registry = registry or default_metrics
+
+    class Handler(BaseHTTPRequestHandler):
+
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = registry.prometheus().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True).start()
+    logging.info(f"Serving metrics on http://{host}:{server.server_address[1]}/metrics")
+    return server
+
+# Write the metrics to a file when the process exits
+def dump_on_exit(path='metrics.prom', registry=None):
+    registry = registry or default_metrics
+    atexit.register(registry.dump, path)
+
+# Registry shared by everything in this process
+default_metrics = MetricsRegistry()
+timed = default_metrics.timed
+span = default_metrics.span
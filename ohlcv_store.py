@@ -0,0 +1,131 @@
+import logging
+import os
+import numpy as np
+import pandas as pd
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+DEFAULT_STORE = os.environ.get('TRADEBOT_DATA_DIR', 'data')
+
+# One contiguous file per column so every column can be memory-mapped on its own
+COLUMNS = [('timestamp', np.int64), ('open', np.float64), ('high', np.float64),
+           ('low', np.float64), ('close', np.float64), ('volume', np.float64)]
+
+TIMEFRAME_UNITS_MS = {'s': 1000, 'm': 60_000, 'h': 3_600_000, 'd': 86_400_000, 'w': 604_800_000, 'M': 2_592_000_000}
+
+# Convert a ccxt timeframe string such as '1m', '4h' or '1d' to milliseconds
+def timeframe_to_ms(timeframe):
+    return int(timeframe[:-1]) * TIMEFRAME_UNITS_MS[timeframe[-1]]
+
+# Directory holding the column files for one symbol/timeframe partition
+def partition_dir(root, symbol, timeframe):
+    return os.path.join(root, symbol.replace('/', '-').replace(':', '_'), timeframe)
+
+def _column_path(root, symbol, timeframe, column):
+    return os.path.join(partition_dir(root, symbol, timeframe), column + '.bin')
+
+# Number of complete rows stored (the shortest column wins if a write was interrupted)
+def stored_length(root, symbol, timeframe):
+    lengths = []
+    for column, dtype in COLUMNS:
+        path = _column_path(root, symbol, timeframe, column)
+        if not os.path.exists(path):
+            return 0
+        lengths.append(os.path.getsize(path) // np.dtype(dtype).itemsize)
+    return min(lengths)
+
+# Memory-map the stored candles as read-only column arrays (no copies are made)
+def read_candles(root, symbol, timeframe, limit=None):
+    length = stored_length(root, symbol, timeframe)
+    start = 0 if limit is None else max(0, length - limit)
+    candles = {}
+    for column, dtype in COLUMNS:
+        if length == 0:
+            candles[column] = np.empty(0, dtype=dtype)
+            continue
+        mapped = np.memmap(_column_path(root, symbol, timeframe, column), dtype=dtype, mode='r', shape=(length,))
+        candles[column] = mapped[start:]
+    return candles
+
+# Timestamp of the newest stored candle, or None for an empty partition
+def last_timestamp(root, symbol, timeframe):
+    length = stored_length(root, symbol, timeframe)
+    if length == 0:
+        return None
+    return int(np.memmap(_column_path(root, symbol, timeframe, 'timestamp'), dtype=np.int64, mode='r', shape=(length,))[-1])
+
+# Write a column to a temporary file and swap it in; memory maps handed out earlier keep
+# the old file, so readers never see bytes change or a truncated mapping under them
+def _replace_column(path, *parts):
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        for part in parts:
+            part.tofile(f)
+    os.replace(tmp, path)
+
+# Replace a partition with the given ccxt OHLCV rows
+def write_candles(root, symbol, timeframe, ohlcv):
+    os.makedirs(partition_dir(root, symbol, timeframe), exist_ok=True)
+    rows = np.asarray(ohlcv, dtype=np.float64).reshape(-1, len(COLUMNS))
+    for i, (column, dtype) in enumerate(COLUMNS):
+        _replace_column(_column_path(root, symbol, timeframe, column), rows[:, i].astype(dtype))
+    return len(rows)
+
+# Append ccxt OHLCV rows newer than the stored data; a row matching the last stored
+# timestamp overwrites it, since the newest candle may have still been forming.
+# Pure appends go in place (existing bytes are untouched); rewriting the last candle or
+# dropping a partial tail left by an interrupted write swaps in a new file instead.
+def append_candles(root, symbol, timeframe, ohlcv):
+    length = stored_length(root, symbol, timeframe)
+    if length == 0:
+        return write_candles(root, symbol, timeframe, ohlcv)
+    rows = np.asarray(ohlcv, dtype=np.float64).reshape(-1, len(COLUMNS))
+    last = last_timestamp(root, symbol, timeframe)
+    rows = rows[rows[:, 0] >= last]
+    if len(rows) == 0:
+        return 0
+    rewrite_last = int(rows[0, 0]) == last
+    keep = length - 1 if rewrite_last else length
+    for i, (column, dtype) in enumerate(COLUMNS):
+        path = _column_path(root, symbol, timeframe, column)
+        values = rows[:, i].astype(dtype)
+        if os.path.getsize(path) == keep * np.dtype(dtype).itemsize:
+            with open(path, 'ab') as f:
+                values.tofile(f)
+        else:
+            kept = np.fromfile(path, dtype=dtype, count=keep)
+            _replace_column(path, kept, values)
+    return len(rows) - int(rewrite_last)
+
+# Top up the store with only the candles after the last stored timestamp
+def update_candles(exchange, symbol, timeframe='1h', limit=100, root=DEFAULT_STORE, params=None):
+    params = params or {}
+    step = timeframe_to_ms(timeframe)
+    if stored_length(root, symbol, timeframe) < limit:
+        ohlcv = exchange.fetch_ohlcv(symbol, timeframe=timeframe, limit=limit, params=params)
+        write_candles(root, symbol, timeframe, ohlcv)
+        logging.info(f"Stored {len(ohlcv)} candles for {symbol} {timeframe}")
+        return len(ohlcv)
+    added = 0
+    while True:
+        since = last_timestamp(root, symbol, timeframe)
+        ohlcv = exchange.fetch_ohlcv(symbol, timeframe=timeframe, since=since, params=params)
+        added += append_candles(root, symbol, timeframe, ohlcv)
+        newest = last_timestamp(root, symbol, timeframe)
+        # Stop once caught up to the forming candle or when the exchange has nothing newer
+        if len(ohlcv) < 2 or newest == since or exchange.milliseconds() - newest < 2 * step:
+            break
+    logging.info(f"Topped up {added} new candles for {symbol} {timeframe}")
+    return added
+
+# Build a DataFrame over stored candles; timestamps are reinterpreted, not parsed
+def candles_to_dataframe(candles):
+    data = {column: candles[column] for column, _ in COLUMNS}
+    data['timestamp'] = candles['timestamp'].view('datetime64[ms]')
+    return pd.DataFrame(data, copy=False)
+
+# Drop-in replacement for the fetch-and-convert code in the entry points
+def fetch_ohlcv_cached(exchange, symbol, timeframe='1h', limit=100, params=None, root=DEFAULT_STORE):
+    update_candles(exchange, symbol, timeframe, limit, root, params)
+    return candles_to_dataframe(read_candles(root, symbol, timeframe, limit))
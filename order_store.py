@@ -0,0 +1,326 @@
+import json
+import logging
+import os
+import time
+from collections import defaultdict
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+DEFAULT_STATE_DIR = os.environ.get('TRADEBOT_STATE_DIR', 'state')
+
+# Order statuses after which an order leaves the open-order indexes
+CLOSED_STATUSES = ('closed', 'canceled', 'cancelled', 'rejected', 'expired')
+
+# Order fields kept in the store; the rest of a ccxt order (raw 'info' etc.) is dropped
+ORDER_FIELDS = ('id', 'symbol', 'type', 'side', 'amount', 'price', 'stopPrice', 'filled', 'remaining',
+                'status', 'timestamp', 'bracket')
+
+def _order_record(order, bracket=None):
+    record = {field: order.get(field) for field in ORDER_FIELDS if order.get(field) is not None}
+    if bracket is not None:
+        record['bracket'] = bracket
+    return record
+
+# Open orders indexed by id, symbol and bracket group, plus net positions and bracket
+# levels. Every change is appended to journal.jsonl before it is applied; snapshot()
+# writes the whole state to snapshot.json and starts a new journal. Recovery loads the
+# snapshot, replays the journal entries after it, then reconciles with the exchange
+# using one fetch_open_orders call.
+class OrderStore:
+
+    def __init__(self, directory=DEFAULT_STATE_DIR, snapshot_every=10_000, fsync=False):
+        self.directory = directory
+        self.snapshot_every = snapshot_every
+        self.fsync = fsync
+        self.orders = {}
+        self.by_symbol = defaultdict(set)
+        self.by_bracket = defaultdict(set)
+        self.brackets = {}
+        self.positions = {}
+        self.seq = 0
+        self._since_snapshot = 0
+        self._journal = None
+        self.last_reconcile = None
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    @property
+    def journal_path(self):
+        return os.path.join(self.directory, 'journal.jsonl')
+
+    @property
+    def snapshot_path(self):
+        return os.path.join(self.directory, 'snapshot.json')
+
+    # Journal an operation and apply it
+    def _record(self, op, **fields):
+        self.seq += 1
+        if self.directory is not None:
+            if self._journal is None:
+                self._journal = open(self.journal_path, 'a')
+            self._journal.write(json.dumps(dict(fields, op=op, seq=self.seq), separators=(',', ':')) + '\n')
+            self._journal.flush()
+            if self.fsync:
+                os.fsync(self._journal.fileno())
+        self._apply(op, fields)
+        self._since_snapshot += 1
+        if self.directory is not None and self._since_snapshot >= self.snapshot_every:
+            self.snapshot()
+
+    def _apply(self, op, fields):
+        if op == 'order':
+            self._put(fields['order'])
+        elif op == 'update':
+            order = self.orders.get(fields['id'])
+            if order is not None:
+                self._put(dict(order, **fields['changes']))
+        elif op == 'remove':
+            self._drop(fields['id'])
+        elif op == 'position':
+            self.positions[fields['symbol']] = {'amount': fields['amount'], 'price': fields['price']}
+        elif op == 'bracket':
+            self.brackets[fields['bracket']['id']] = fields['bracket']
+        elif op == 'close_bracket':
+            self.brackets.pop(fields['id'], None)
+
+    def _put(self, order):
+        if order.get('status') in CLOSED_STATUSES:
+            self._drop(order['id'])
+            return
+        self._drop(order['id'])
+        self.orders[order['id']] = order
+        self.by_symbol[order['symbol']].add(order['id'])
+        if order.get('bracket') is not None:
+            self.by_bracket[order['bracket']].add(order['id'])
+
+    def _drop(self, order_id):
+        order = self.orders.pop(order_id, None)
+        if order is None:
+            return
+        self.by_symbol[order['symbol']].discard(order_id)
+        if not self.by_symbol[order['symbol']]:
+            del self.by_symbol[order['symbol']]
+        group = order.get('bracket')
+        if group is not None:
+            self.by_bracket[group].discard(order_id)
+            if not self.by_bracket[group]:
+                del self.by_bracket[group]
+
+    # Track a ccxt order (closed orders are only journaled)
+    def add_order(self, order, bracket=None):
+        self._record('order', order=_order_record(order, bracket))
+
+    def update_order(self, order_id, **changes):
+        self._record('update', id=order_id, changes=changes)
+
+    def remove_order(self, order_id):
+        self._record('remove', id=order_id)
+
+    def set_position(self, symbol, amount, price=None):
+        self._record('position', symbol=symbol, amount=amount, price=price)
+
+    # Net a fill into the symbol's position (qty is signed), keeping the average entry price
+    def apply_fill(self, symbol, qty, price):
+        current = self.positions.get(symbol, {'amount': 0.0, 'price': None})
+        amount = current['amount'] + qty
+        if abs(amount) < 1e-12:
+            self.set_position(symbol, 0.0, None)
+        elif current['amount'] == 0 or (current['amount'] > 0) != (amount > 0):
+            self.set_position(symbol, amount, price)
+        elif abs(amount) > abs(current['amount']):
+            self.set_position(symbol, amount, (current['amount'] * current['price'] + qty * price) / amount)
+        else:
+            self.set_position(symbol, amount, current['price'])
+
+    # Track a bracket_orders.place_bracket_order result; its group key is the entry order id
+    # so groups stay unique across restarts. Only the protective legs are indexed as open
+    # orders: the market entry has filled, even when the response (as Bybit's does) carries
+    # no status. Native brackets have no separate legs and are marked as such.
+    def add_bracket(self, bracket):
+        group = str(bracket['entry']['id'])
+        native = bracket['stop_loss'] is bracket['entry'] or bracket['take_profit'] is bracket['entry']
+        self._record('bracket', bracket={
+            'id': group, 'symbol': bracket['symbol'], 'side': bracket['side'], 'amount': bracket['amount'],
+            'price': bracket['price'], 'stop_loss_price': bracket['stop_loss_price'],
+            'take_profit_price': bracket['take_profit_price'], 'native': native})
+        for leg in ('stop_loss', 'take_profit'):
+            order = bracket[leg]
+            if order is not None and order is not bracket['entry']:
+                self.add_order(order, group)
+        qty = bracket['amount'] if bracket['side'] == 'buy' else -bracket['amount']
+        self.apply_fill(bracket['symbol'], qty, bracket['price'])
+        return group
+
+    def close_bracket(self, group):
+        for order_id in list(self.by_bracket.get(group, ())):
+            self.remove_order(order_id)
+        self._record('close_bracket', id=group)
+
+    def get(self, order_id):
+        return self.orders.get(order_id)
+
+    def open_orders(self, symbol=None):
+        ids = self.orders if symbol is None else self.by_symbol.get(symbol, ())
+        return [self.orders[i] for i in ids]
+
+    # Open protective legs of a bracket (never its entry, which older state may still list)
+    def bracket_orders(self, group):
+        return [self.orders[i] for i in self.by_bracket.get(group, ()) if i != group]
+
+    def open_brackets(self, symbol=None):
+        return [b for b in self.brackets.values() if symbol is None or b['symbol'] == symbol]
+
+    def position(self, symbol):
+        return self.positions.get(symbol, {'amount': 0.0})['amount']
+
+    # Write the full state atomically and start a new journal
+    def snapshot(self):
+        state = {'seq': self.seq, 'orders': list(self.orders.values()), 'positions': self.positions,
+                 'brackets': self.brackets}
+        tmp = self.snapshot_path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(state, f, separators=(',', ':'))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.snapshot_path)
+        # Entries up to self.seq are in the snapshot; a crash before this truncation only
+        # leaves entries that recovery skips by sequence number
+        if self._journal is not None:
+            self._journal.close()
+        self._journal = open(self.journal_path, 'w')
+        self._since_snapshot = 0
+
+    def _load(self):
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path) as f:
+                state = json.load(f)
+            self.seq = state['seq']
+            for order in state['orders']:
+                self._put(order)
+            self.positions = state['positions']
+            self.brackets = state['brackets']
+        replayed = 0
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path) as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Torn last line from a crash mid-write
+                        logging.warning(f"Skipping unreadable journal entry in {self.journal_path}")
+                        break
+                    if entry['seq'] > self.seq:
+                        self.seq = entry['seq']
+                        self._apply(entry.pop('op'), entry)
+                        replayed += 1
+        self._since_snapshot = replayed
+        return replayed
+
+    # Bring the open orders in line with the exchange using one bulk query. Orders the
+    # exchange no longer lists are removed and returned as 'missing'; orders only the
+    # exchange knows are adopted. Missing protective legs of open brackets are settled
+    # (see _settle_legs), native brackets are checked against the exchange's positions
+    # (see _settle_native), and the brackets closed either way are returned as
+    # 'closed_brackets'.
+    def reconcile(self, exchange, symbol=None):
+        remote = {str(o['id']): o for o in exchange.fetch_open_orders(symbol)}
+        local = set(self.orders) if symbol is None else set(self.by_symbol.get(symbol, ()))
+        missing = sorted(local - set(remote))
+        adopted = sorted(set(remote) - local)
+        updated = 0
+        legs = defaultdict(list)
+        for order_id in missing:
+            order = self.orders[order_id]
+            if order.get('bracket') in self.brackets and order_id != order['bracket']:
+                legs[order['bracket']].append(order)
+            self.remove_order(order_id)
+        for order_id in adopted:
+            self.add_order(dict(remote[order_id], id=order_id))
+        for order_id in local & set(remote):
+            order, fresh = self.orders[order_id], remote[order_id]
+            changes = {k: fresh[k] for k in ('status', 'filled', 'remaining', 'price')
+                       if fresh.get(k) is not None and fresh.get(k) != order.get(k)}
+            if changes:
+                self.update_order(order_id, **changes)
+                updated += 1
+        closed = [group for group, orders in legs.items() if self._settle_legs(exchange, group, orders)]
+        closed += self._settle_native(exchange, symbol)
+        return {'missing': missing, 'adopted': adopted, 'updated': updated, 'closed_brackets': closed}
+
+    # Protective legs of a bracket that disappeared while the bot was down. The exchange is
+    # asked how much of each filled; that amount leaves the position, the other legs are
+    # cancelled and the bracket is closed. A leg whose outcome cannot be fetched is taken
+    # as filled, since the exchange no longer holds it. Returns whether the bracket closed.
+    def _settle_legs(self, exchange, group, orders):
+        bracket = self.brackets[group]
+        filled, value = 0.0, 0.0
+        for order in orders:
+            try:
+                fresh = exchange.fetch_order(order['id'], bracket['symbol'])
+                amount = fresh.get('filled') or 0.0
+                price = fresh.get('average') or fresh.get('price') or order.get('price')
+            except Exception as e:
+                logging.warning(f"Could not fetch missing order {order['id']} of bracket {group}, assuming it filled: {e}")
+                amount, price = order.get('amount') or bracket['amount'], order.get('price') or order.get('stopPrice')
+            filled += amount
+            value += amount * (price or bracket['price'])
+        if filled <= 0:
+            logging.warning(f"Protective legs {[o['id'] for o in orders]} of bracket {group} were cancelled on the exchange")
+            return False
+        qty = -filled if bracket['side'] == 'buy' else filled
+        self.apply_fill(bracket['symbol'], qty, value / filled)
+        for order in self.bracket_orders(group):
+            try:
+                exchange.cancel_order(order['id'], bracket['symbol'])
+            except Exception as e:
+                logging.warning(f"Could not cancel remaining leg {order['id']} of bracket {group}: {e}")
+        self.close_bracket(group)
+        logging.info(f"Bracket {group} closed while down: {filled} {bracket['symbol']} at {value / filled}")
+        return True
+
+    # Native brackets have no legs to miss, so a stop-loss or take-profit that fired while
+    # the bot was down only shows in the exchange's positions. Where the exchange reports
+    # positions, the oldest native brackets of each symbol and side are closed until the
+    # stored amount matches what the exchange still holds. Returns the closed groups.
+    def _settle_native(self, exchange, symbol=None):
+        native = [b for b in self.brackets.values() if b.get('native') and (symbol is None or b['symbol'] == symbol)]
+        if not native or not (getattr(exchange, 'has', {}) or {}).get('fetchPositions'):
+            return []
+        held = defaultdict(float)
+        for position in exchange.fetch_positions(sorted({b['symbol'] for b in native})):
+            held[(position['symbol'], position.get('side'))] += abs(position.get('contracts') or 0.0)
+        excess = defaultdict(float)
+        for bracket in native:
+            excess[(bracket['symbol'], 'long' if bracket['side'] == 'buy' else 'short')] += bracket['amount']
+        closed = []
+        for bracket in native:
+            key = (bracket['symbol'], 'long' if bracket['side'] == 'buy' else 'short')
+            if excess[key] - held[key] <= 1e-12:
+                continue
+            excess[key] -= bracket['amount']
+            qty = -bracket['amount'] if bracket['side'] == 'buy' else bracket['amount']
+            self.apply_fill(bracket['symbol'], qty, bracket['stop_loss_price'])
+            self.close_bracket(bracket['id'])
+            closed.append(bracket['id'])
+            logging.info(f"Native bracket {bracket['id']} closed while down: {bracket['symbol']} position no longer held")
+        return closed
+
+    # Rebuild from snapshot and journal, then reconcile if an exchange is given
+    @classmethod
+    def recover(cls, directory=DEFAULT_STATE_DIR, exchange=None, **kwargs):
+        start = time.perf_counter()
+        store = cls(directory, **kwargs)
+        replayed = store._load()
+        report = store.reconcile(exchange) if exchange is not None else None
+        store.snapshot()
+        logging.info(f"Recovered {len(store.orders)} open orders and {len(store.positions)} positions "
+                     f"({replayed} journal entries) in {(time.perf_counter() - start) * 1000:.1f} ms; reconcile: "
+                     f"{None if report is None else {k: len(v) if isinstance(v, list) else v for k, v in report.items()}}")
+        store.last_reconcile = report
+        return store
+
+    def close(self):
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
@@ -0,0 +1,148 @@
+import itertools
+import logging
+import os
+from multiprocessing import Pool, shared_memory
+import numpy as np
+import pandas as pd
+from vectorized_backtest import backtest_vectorized
+from indicator_registry import IndicatorRegistry
+from performance_analytics import equity_stats
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+OHLCV_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+# Per-worker state: the attached shared-memory block, the OHLCV view over it and an indicator registry
+_worker = {}
+
+# Copy the OHLCV columns of a DataFrame into one shared-memory block
+def create_shared_ohlcv(df):
+    shape = (len(OHLCV_COLUMNS), len(df))
+    shm = shared_memory.SharedMemory(create=True, size=max(int(np.prod(shape)) * 8, 1))
+    ohlcv = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+    for row, column in enumerate(OHLCV_COLUMNS):
+        ohlcv[row] = df[column].to_numpy(dtype=np.float64)
+    return shm, shape
+
+# Attach a worker process to the shared OHLCV block without copying it
+def _init_worker(shm_name, shape):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    _worker['shm'] = shm
+    _worker['ohlcv'] = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+    _worker['registry'] = IndicatorRegistry()
+
+# SMA crossover signals with RSI filters: +1 buy, -1 sell, 0 hold
+def crossover_signals(fast_ma, slow_ma, rsi_values=None, rsi_overbought=None, rsi_oversold=None):
+    above = fast_ma > slow_ma
+    below = fast_ma < slow_ma
+    buy = np.zeros(len(fast_ma), dtype=bool)
+    sell = np.zeros(len(fast_ma), dtype=bool)
+    buy[1:] = above[1:] & (fast_ma[:-1] <= slow_ma[:-1])
+    sell[1:] = below[1:] & (fast_ma[:-1] >= slow_ma[:-1])
+    if rsi_values is not None and rsi_overbought is not None:
+        buy &= rsi_values < rsi_overbought
+    if rsi_values is not None and rsi_oversold is not None:
+        sell &= rsi_values > rsi_oversold
+    return buy.astype(np.int8) - sell.astype(np.int8)
+
+# Insert stop-loss / take-profit exits (checked on close) into a signal array
+def apply_brackets(close, codes, stop_loss=None, take_profit=None):
+    if stop_loss is None and take_profit is None:
+        return codes
+    out = np.zeros_like(codes)
+    n = len(close)
+    i = 0
+    buys = np.flatnonzero(codes == 1)
+    while True:
+        # Next entry is the first buy signal at or after i
+        k = np.searchsorted(buys, i)
+        if k == len(buys):
+            break
+        entry = buys[k]
+        out[entry] = 1
+        lower = close[entry] * (1 - stop_loss) if stop_loss is not None else -np.inf
+        upper = close[entry] * (1 + take_profit) if take_profit is not None else np.inf
+        # Scan forward in growing chunks so long holds don't rescan the whole tail
+        start, step, exit_at = entry + 1, 256, n
+        while start < n:
+            stop = min(start + step, n)
+            hit = (codes[start:stop] == -1) | (close[start:stop] <= lower) | (close[start:stop] >= upper)
+            if hit.any():
+                exit_at = start + int(np.argmax(hit))
+                break
+            start, step = stop, step * 2
+        if exit_at == n:
+            break
+        out[exit_at] = -1
+        i = exit_at + 1
+    return out
+
+# Evaluate one parameter combination inside a worker; the statistics are those of
+# performance_analytics.equity_stats, so Sharpe is annualized with periods_per_year
+def evaluate(params):
+    close = _worker['ohlcv'][OHLCV_COLUMNS.index('close')]
+    # The shared close series never changes during a sweep, so it is keyed by name instead of hashed
+    registry = _worker['registry']
+    fast_ma = registry.get('SMA', close, key='close', length=params['fast'])
+    slow_ma = registry.get('SMA', close, key='close', length=params['slow'])
+    rsi_values = registry.get('RSI', close, key='close', length=14)
+    codes = crossover_signals(fast_ma, slow_ma, rsi_values, params['rsi_overbought'], params['rsi_oversold'])
+    codes = apply_brackets(close, codes, params['stop_loss'], params['take_profit'])
+    result = backtest_vectorized(close, codes, params['initial_balance'], params['fee'], params['slippage'])
+    equity = np.concatenate(([float(params['initial_balance'])], result['equity']))
+    stats = equity_stats(equity, periods_per_year=params['periods_per_year'])
+    row = {k: v for k, v in params.items() if k not in ('initial_balance', 'fee', 'slippage', 'periods_per_year')}
+    row.update({
+        'final_balance': stats['final_equity'],
+        'total_return': stats['total_return'],
+        'max_drawdown': stats['max_drawdown'],
+        'sharpe': stats['sharpe'],
+        'trades': len(result['trades']),
+    })
+    return row
+
+# Build every valid parameter combination from the grids; periods_per_year is the number
+# of bars per year of the swept candles (365 for daily, 24 * 365 for hourly)
+def build_grid(fast_windows, slow_windows, rsi_overbought=(None,), rsi_oversold=(None,),
+               stop_losses=(None,), take_profits=(None,), initial_balance=1000, fee=0.0, slippage=0.0,
+               periods_per_year=365):
+    grid = []
+    for fast, slow, ob, os_, sl, tp in itertools.product(fast_windows, slow_windows, rsi_overbought,
+                                                        rsi_oversold, stop_losses, take_profits):
+        if fast >= slow:
+            continue
+        grid.append({'fast': fast, 'slow': slow, 'rsi_overbought': ob, 'rsi_oversold': os_,
+                     'stop_loss': sl, 'take_profit': tp, 'initial_balance': initial_balance,
+                     'fee': fee, 'slippage': slippage, 'periods_per_year': periods_per_year})
+    return grid
+
+# Run the sweep across a process pool and return the ranked results table
+def run_sweep(df, grid, processes=None, rank_by='total_return', chunksize=None):
+    processes = processes or os.cpu_count()
+    if chunksize is None:
+        # Keep windows sharing a worker cache together while still giving every core several chunks
+        chunksize = max(1, len(grid) // (processes * 8))
+    shm, shape = create_shared_ohlcv(df)
+    try:
+        logging.info(f"Running parameter sweep: {len(grid)} combinations on {processes} processes")
+        with Pool(processes, initializer=_init_worker, initargs=(shm.name, shape)) as pool:
+            rows = list(pool.imap_unordered(evaluate, grid, chunksize=chunksize))
+    finally:
+        shm.close()
+        shm.unlink()
+    results = pd.DataFrame(rows)
+    if results.empty:
+        return results
+    return results.sort_values(rank_by, ascending=False, ignore_index=True)
+
+# Example usage
+if __name__ == "__main__":
+    from Technical_Indicators import initialize_exchange, fetch_ohlcv
+
+    exchange = initialize_exchange('YOUR_API_KEY', 'YOUR_API_SECRET')
+    df = fetch_ohlcv(exchange, 'BTC/USDT', timeframe='1h', limit=1000)
+    grid = build_grid(fast_windows=range(10, 60, 5), slow_windows=range(100, 260, 20),
+                      rsi_overbought=(None, 70, 80), rsi_oversold=(None, 20, 30),
+                      stop_losses=(None, 0.02, 0.05), take_profits=(None, 0.05, 0.10), periods_per_year=24 * 365)
+    print(run_sweep(df, grid).head(20))
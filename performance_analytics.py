@@ -0,0 +1,358 @@
+import logging
+import math
+from collections import deque
+import numpy as np
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Bars processed per pass by equity_stats; a few float64 arrays of this size are live at
+# once, so a 100M-bar curve (memory-mapped or in RAM) costs ~50 MB of working memory
+CHUNK_SIZE = 1 << 20
+
+TRADE_PERCENTILES = (5, 25, 50, 75, 95)
+
+# Per-trade return histogram of StreamingStats: 0.1% bins from -100% to +100%, with the
+# outer bins holding everything beyond
+TRADE_BIN_WIDTH = 0.001
+TRADE_BINS = 2001
+
+# Fraction below the running peak at every bar (the underwater curve). Works through the
+# curve in chunks carrying the running peak; pass `out` (e.g. an np.lib.format.open_memmap
+# array) to keep the result off the heap as well.
+def drawdown(equity, chunk_size=CHUNK_SIZE, out=None):
+    equity = np.asarray(equity)
+    out = np.empty(len(equity)) if out is None else out
+    peak = -np.inf
+    for start in range(0, len(equity), chunk_size):
+        chunk = np.asarray(equity[start:start + chunk_size], dtype=np.float64)
+        running = np.maximum.accumulate(chunk)
+        np.maximum(running, peak, out=running)
+        peak = running[-1]
+        np.divide(chunk, running, out=running)
+        np.subtract(1.0, running, out=out[start:start + len(chunk)])
+    return out
+
+# Fraction below the highest equity of the trailing `window` bars. The rolling maximum is
+# van Herk/Gil-Werman: prefix and suffix maxima over blocks of `window` bars, so the cost
+# does not depend on the window length. Chunks are whole blocks and the suffix maxima of
+# the last block are carried into the next chunk, so working memory is a few chunks (or a
+# few windows, if longer) whatever the length of the curve.
+def rolling_drawdown(equity, window, chunk_size=CHUNK_SIZE, out=None):
+    equity = np.asarray(equity)
+    n = len(equity)
+    out = np.empty(n) if out is None else out
+    step = max(chunk_size // window, 1) * window
+    carried = np.full(window, -np.inf)
+    for start in range(0, n, step):
+        chunk = np.asarray(equity[start:start + step], dtype=np.float64)
+        blocks = -(-len(chunk) // window)
+        padded = np.full((blocks, window), -np.inf)
+        padded.ravel()[:len(chunk)] = chunk
+        prefix = np.maximum.accumulate(padded, axis=1)
+        suffix = np.maximum.accumulate(padded[:, ::-1], axis=1)[:, ::-1]
+        # A window ending at offset k of a block starts at offset k + 1 of the block before
+        earlier = np.full((blocks, window), -np.inf)
+        earlier[0, :-1] = carried[1:]
+        earlier[1:, :-1] = suffix[:-1, 1:]
+        carried = suffix[-1].copy()
+        np.maximum(prefix, earlier, out=prefix)
+        peak = prefix.ravel()[:len(chunk)]
+        np.divide(chunk, peak, out=peak)
+        np.subtract(1.0, peak, out=out[start:start + len(chunk)])
+    return out
+
+# Length in bars of every underwater period (equity below its running peak), in order.
+# Chunked like drawdown; a period still open at the end of a chunk carries over.
+def underwater_periods(equity, chunk_size=CHUNK_SIZE):
+    equity = np.asarray(equity)
+    periods = []
+    peak, run = -np.inf, 0
+    for start in range(0, len(equity), chunk_size):
+        chunk = np.asarray(equity[start:start + chunk_size], dtype=np.float64)
+        running = np.maximum.accumulate(chunk)
+        np.maximum(running, peak, out=running)
+        peak = running[-1]
+        below = chunk < running
+        edges = np.diff(below.astype(np.int8), prepend=np.int8(run > 0), append=np.int8(0))
+        starts = np.flatnonzero(edges == 1)
+        if run:
+            starts = np.concatenate(([-run], starts))
+        lengths = np.flatnonzero(edges == -1) - starts
+        run = 0
+        if below[-1]:
+            run, lengths = int(lengths[-1]), lengths[:-1]
+        periods.append(lengths)
+    if run:
+        periods.append(np.array([run]))
+    return np.concatenate(periods) if periods else np.empty(0, dtype=np.intp)
+
+# Merge the count, mean and sum of squared deviations of two samples (Chan et al.)
+def _merge_moments(n_a, mean_a, m2_a, n_b, mean_b, m2_b):
+    n = n_a + n_b
+    if n == 0:
+        return 0, 0.0, 0.0
+    delta = mean_b - mean_a
+    return n, mean_a + delta * n_b / n, m2_a + m2_b + delta * delta * n_a * n_b / n
+
+def _ratios(n, mean, variance, downside, max_drawdown, first, last, periods_per_year, risk_free):
+    excess = mean - risk_free / periods_per_year
+    std = math.sqrt(variance)
+    down = math.sqrt(downside / n) if n else 0.0
+    growth = last / first if first > 0 else np.nan
+    annualized = growth ** (periods_per_year / n) - 1 if n and growth > 0 else (np.nan if n else 0.0)
+    annualize = math.sqrt(periods_per_year)
+    return {
+        'total_return': growth - 1,
+        'annualized_return': annualized,
+        'volatility': std * annualize,
+        'sharpe': excess / std * annualize if std > 0 else 0.0,
+        'sortino': excess / down * annualize if down > 0 else 0.0,
+        'max_drawdown': max_drawdown,
+        'calmar': annualized / max_drawdown if max_drawdown > 0 else 0.0,
+    }
+
+# Statistics of an equity curve, computed in chunks of `chunk_size` bars with the running
+# peak, return moments and underwater run carried between chunks, so memory stays flat
+# however long the curve is (np.load(..., mmap_mode='r') arrays stream from disk).
+#   position         optional exposure per bar as a fraction of equity (1 = all in, as
+#                    the backtests return it), for exposure and turnover
+#   trades           optional trades array from a backtest, for trade_stats
+#   risk_free        annual rate subtracted from returns in Sharpe and Sortino
+def equity_stats(equity, position=None, trades=None, periods_per_year=365, risk_free=0.0, chunk_size=CHUNK_SIZE):
+    equity = np.asarray(equity)
+    bars = len(equity)
+    if bars == 0:
+        return {}
+    rf = risk_free / periods_per_year
+    n, mean, m2, downside = 0, 0.0, 0.0, 0.0
+    peak, max_drawdown = -np.inf, 0.0
+    run, longest, underwater = 0, 0, 0
+    previous = None
+    for start in range(0, bars, chunk_size):
+        chunk = np.asarray(equity[start:start + chunk_size], dtype=np.float64)
+        values = chunk if previous is None else np.concatenate(([previous], chunk))
+        previous = chunk[-1]
+        if len(values) > 1:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                returns = values[1:] / values[:-1] - 1
+            chunk_mean = float(returns.mean())
+            n, mean, m2 = _merge_moments(n, mean, m2, len(returns), chunk_mean, float(((returns - chunk_mean) ** 2).sum()))
+            downside += float((np.minimum(returns - rf, 0.0) ** 2).sum())
+
+        running = np.maximum.accumulate(chunk)
+        np.maximum(running, peak, out=running)
+        peak = running[-1]
+        below = chunk < running
+        if below.any():
+            max_drawdown = max(max_drawdown, float((1 - chunk / running).max()))
+        # Underwater run length at each bar, continuing the run left over from the last chunk
+        index = np.arange(len(chunk))
+        dry = np.maximum.accumulate(np.where(below, -1, index))
+        runs = np.where(dry < 0, index + 1 + run, index - dry)
+        longest = max(longest, int(runs.max()))
+        run = int(runs[-1])
+        underwater += int(below.sum())
+
+    stats = _ratios(n, mean, m2 / n if n else 0.0, downside, max_drawdown, float(equity[0]), float(equity[-1]),
+                    periods_per_year, risk_free)
+    stats.update({
+        'max_time_under_water': longest,
+        'time_under_water': underwater / bars,
+        'bars': bars,
+        'final_equity': float(equity[-1]),
+    })
+    if position is not None:
+        stats.update(exposure_stats(position, periods_per_year, chunk_size))
+    if trades is not None:
+        stats['trades'] = trade_stats(trades)
+    return stats
+
+# Share of bars with a position, and turnover (sum of |position changes|, in equity
+# multiples) in total and per year
+def exposure_stats(position, periods_per_year=365, chunk_size=CHUNK_SIZE):
+    bars = len(position)
+    invested, traded, previous = 0, 0.0, 0.0
+    for start in range(0, bars, chunk_size):
+        chunk = np.asarray(position[start:start + chunk_size], dtype=np.float64)
+        invested += int(np.count_nonzero(chunk))
+        traded += float(np.abs(np.diff(chunk, prepend=previous)).sum())
+        previous = chunk[-1]
+    return {
+        'exposure': invested / bars if bars else 0.0,
+        'turnover': traded,
+        'annual_turnover': traded * periods_per_year / bars if bars else 0.0,
+    }
+
+# Distribution of closed-trade results. Takes the trades array of backtest_vectorized
+# ('return' per trade) or backtest_brackets ('pnl' per trade, with entry price and qty),
+# or a plain array of per-trade returns.
+def trade_stats(trades, percentiles=TRADE_PERCENTILES):
+    trades = np.asarray(trades)
+    holding = None
+    if trades.dtype.names is None:
+        returns = trades.astype(np.float64)
+    else:
+        if 'return' in trades.dtype.names:
+            returns = trades['return']
+        else:
+            returns = trades['pnl'] / (trades['entry_price'] * trades['qty'])
+        closed = trades['exit_index'] >= 0
+        holding = (trades['exit_index'] - trades['entry_index'])[closed]
+    returns = returns[~np.isnan(returns)]
+    if len(returns) == 0:
+        return {'count': 0}
+    wins = returns[returns > 0]
+    losses = returns[returns < 0]
+    stats = {
+        'count': len(returns),
+        'win_rate': len(wins) / len(returns),
+        'mean_return': float(returns.mean()),
+        'std_return': float(returns.std()),
+        'best': float(returns.max()),
+        'worst': float(returns.min()),
+        'avg_win': float(wins.mean()) if len(wins) else 0.0,
+        'avg_loss': float(losses.mean()) if len(losses) else 0.0,
+        'profit_factor': float(wins.sum() / -losses.sum()) if len(losses) else np.inf,
+        **{f'p{p}': float(v) for p, v in zip(percentiles, np.percentile(returns, percentiles))},
+    }
+    if holding is not None and len(holding):
+        stats['mean_holding_bars'] = float(holding.mean())
+        stats['max_holding_bars'] = int(holding.max())
+    return stats
+
+# equity_stats updated one bar at a time for live monitoring: every update() is O(1) and
+# the state has a fixed size whatever the number of bars. Per-trade percentiles come from
+# a fixed-width return histogram, so they are within TRADE_BIN_WIDTH of the exact values.
+# With `window`, the drawdown from the trailing window's peak is kept as well (a
+# monotonic deque of at most `window` bars).
+class StreamingStats:
+
+    def __init__(self, periods_per_year=365, risk_free=0.0, window=None):
+        self.periods_per_year = periods_per_year
+        self.risk_free = risk_free
+        self.window = window
+        self.bars = 0
+        self.first = None
+        self.last = None
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.downside = 0.0
+        self.peak = -math.inf
+        self.drawdown = 0.0
+        self.max_drawdown = 0.0
+        self.run = 0
+        self.longest = 0
+        self.underwater = 0
+        self.position = 0.0
+        self.invested = 0
+        self.traded = 0.0
+        self.rolling_drawdown = 0.0
+        self._window_peaks = deque()
+        self.trade_count = 0
+        self.trade_mean = 0.0
+        self.trade_m2 = 0.0
+        self.wins = 0
+        self.losses = 0
+        self.gross_win = 0.0
+        self.gross_loss = 0.0
+        self.best = -math.inf
+        self.worst = math.inf
+        self.trade_bins = np.zeros(TRADE_BINS, dtype=np.int64)
+
+    # New bar: equity and, optionally, the position as a fraction of equity
+    def update(self, equity, position=None):
+        if self.last is not None:
+            r = equity / self.last - 1 if self.last != 0 else math.nan
+            self.n += 1
+            delta = r - self.mean
+            self.mean += delta / self.n
+            self.m2 += delta * (r - self.mean)
+            excess = r - self.risk_free / self.periods_per_year
+            if excess < 0:
+                self.downside += excess * excess
+        else:
+            self.first = equity
+        self.last = equity
+        if equity > self.peak:
+            self.peak = equity
+        self.drawdown = 1 - equity / self.peak if self.peak > 0 else 0.0
+        if self.drawdown > 0:
+            self.run += 1
+            self.underwater += 1
+            if self.drawdown > self.max_drawdown:
+                self.max_drawdown = self.drawdown
+            if self.run > self.longest:
+                self.longest = self.run
+        else:
+            self.run = 0
+        if position is not None:
+            self.traded += abs(position - self.position)
+            self.position = position
+        if self.position != 0:
+            self.invested += 1
+        if self.window is not None:
+            peaks = self._window_peaks
+            while peaks and peaks[-1][1] <= equity:
+                peaks.pop()
+            peaks.append((self.bars, equity))
+            if peaks[0][0] <= self.bars - self.window:
+                peaks.popleft()
+            self.rolling_drawdown = 1 - equity / peaks[0][1]
+        self.bars += 1
+
+    # Closed trade with return r (0.02 = +2%)
+    def on_trade(self, r):
+        self.trade_count += 1
+        delta = r - self.trade_mean
+        self.trade_mean += delta / self.trade_count
+        self.trade_m2 += delta * (r - self.trade_mean)
+        if r > 0:
+            self.wins += 1
+            self.gross_win += r
+        elif r < 0:
+            self.losses += 1
+            self.gross_loss -= r
+        self.best = max(self.best, r)
+        self.worst = min(self.worst, r)
+        index = int(round(r / TRADE_BIN_WIDTH)) + TRADE_BINS // 2
+        self.trade_bins[min(max(index, 0), TRADE_BINS - 1)] += 1
+
+    def _trade_percentile(self, p):
+        target = max(1, math.ceil(p / 100 * self.trade_count))
+        index = int(np.searchsorted(np.cumsum(self.trade_bins), target))
+        return (index - TRADE_BINS // 2) * TRADE_BIN_WIDTH
+
+    # Same keys as equity_stats (with position and trades) so far
+    def stats(self):
+        if not self.bars:
+            return {}
+        stats = _ratios(self.n, self.mean, self.m2 / self.n if self.n else 0.0, self.downside, self.max_drawdown,
+                        self.first, self.last, self.periods_per_year, self.risk_free)
+        stats.update({
+            'max_time_under_water': self.longest,
+            'time_under_water': self.underwater / self.bars,
+            'bars': self.bars,
+            'final_equity': self.last,
+            'drawdown': self.drawdown,
+            'exposure': self.invested / self.bars,
+            'turnover': self.traded,
+            'annual_turnover': self.traded * self.periods_per_year / self.bars,
+        })
+        if self.window is not None:
+            stats['rolling_drawdown'] = self.rolling_drawdown
+        if self.trade_count:
+            stats['trades'] = {
+                'count': self.trade_count,
+                'win_rate': self.wins / self.trade_count,
+                'mean_return': self.trade_mean,
+                'std_return': math.sqrt(self.trade_m2 / self.trade_count),
+                'best': self.best,
+                'worst': self.worst,
+                'avg_win': self.gross_win / self.wins if self.wins else 0.0,
+                'avg_loss': -self.gross_loss / self.losses if self.losses else 0.0,
+                'profit_factor': self.gross_win / self.gross_loss if self.gross_loss else math.inf,
+                **{f'p{p}': self._trade_percentile(p) for p in TRADE_PERCENTILES},
+            }
+        return stats
@@ -0,0 +1,91 @@
+import logging
+import shutil
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from candle_window import CandleWindows
+from clock_service import ClockService, exchange_time_source, install_clock
+from simulated_exchange import SimulatedExchange, synthetic_candles
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Summarise latency samples (seconds) as a row of milliseconds and throughput
+def summarize_latencies(name, samples):
+    ms = np.asarray(samples) * 1000
+    return {
+        'stage': name,
+        'count': len(ms),
+        'mean_ms': ms.mean(),
+        'p50_ms': np.percentile(ms, 50),
+        'p90_ms': np.percentile(ms, 90),
+        'p99_ms': np.percentile(ms, 99),
+        'max_ms': ms.max(),
+        'throughput_per_s': len(ms) / (ms.sum() / 1000) if ms.sum() > 0 else float('inf'),
+    }
+
+# Run the stages in order `iterations` times, feeding each stage the previous one's
+# output, and report per-stage and end-to-end latency percentiles and throughput.
+# `before_iteration` runs untimed before each pass (e.g. to reveal the next candle).
+def benchmark_pipeline(stages, iterations=100, warmup=5, before_iteration=None):
+    timings = {name: [] for name, _ in stages}
+    totals = []
+    for i in range(warmup + iterations):
+        if before_iteration is not None:
+            before_iteration(i)
+        value = None
+        start = time.perf_counter()
+        for name, stage in stages:
+            stage_start = time.perf_counter()
+            value = stage(value)
+            if i >= warmup:
+                timings[name].append(time.perf_counter() - stage_start)
+        if i >= warmup:
+            totals.append(time.perf_counter() - start)
+    rows = [summarize_latencies(name, samples) for name, samples in timings.items()]
+    rows.append(summarize_latencies('total', totals))
+    return pd.DataFrame(rows).set_index('stage')
+
+# The run_trade_bot path (fetch -> indicators -> signals -> orders) against an exchange,
+# timing tradingbot's own functions. Candles go to a store under `root` and a private
+# window set, so benchmark data never mixes with the bot's real store; requests are
+# stamped with `clock` when given instead of the shared one.
+def trade_bot_stages(exchange, root, symbol='BTC/USDT', timeframe='1h', clock=None):
+    from tradingbot import calculate_indicators, execute_trades, fetch_data, generate_signals
+
+    windows = CandleWindows()
+
+    def fetch(_):
+        return fetch_data(exchange, symbol, timeframe, root=root, windows=windows, clock=clock)
+
+    def orders(df):
+        execute_trades(exchange, df)
+        return df
+
+    return [('fetch_data', fetch), ('calculate_indicators', calculate_indicators),
+            ('generate_signals', generate_signals), ('place_orders', orders)]
+
+# Benchmark the bot against a simulated Bybit fed with synthetic candles
+def run_benchmark(iterations=100, latency=0.0, candles=5000, symbol='BTC/USDT', timeframe='1h', seed=0):
+    rows = synthetic_candles(candles, timeframe, seed=seed)
+    exchange = SimulatedExchange(latency=latency, seed=seed)
+    exchange.load_candles(symbol, timeframe, rows)
+    exchange.candles[(symbol, timeframe)]['cursor'] = candles - iterations - 10
+    # A clock of its own sampling the simulated exchange, not NTP, and not left behind as
+    # the process-wide shared clock
+    clock = ClockService([exchange_time_source(exchange)]).start()
+    install_clock(exchange, clock)
+    root = tempfile.mkdtemp(prefix='pipeline-benchmark-')
+    try:
+        report = benchmark_pipeline(trade_bot_stages(exchange, root, symbol, timeframe, clock), iterations,
+                                    before_iteration=lambda i: exchange.advance(symbol, timeframe))
+    finally:
+        clock.close()
+        shutil.rmtree(root, ignore_errors=True)
+    logging.info(f"Pipeline benchmark ({iterations} iterations, {latency * 1000:.1f} ms simulated latency)\n{report.round(3)}")
+    return report
+
+# Example usage
+if __name__ == "__main__":
+    run_benchmark()
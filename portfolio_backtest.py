@@ -0,0 +1,138 @@
+import itertools
+import logging
+import os
+from multiprocessing import Pool
+import numpy as np
+import pandas as pd
+from indicator_registry import default_registry, fingerprint
+from ohlcv_store import read_candles
+from parameter_sweep import crossover_signals
+from vectorized_backtest import backtest_vectorized
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Rolling walk-forward windows as (train_start, train_end, test_end) bar offsets
+def walk_forward_windows(length, train_bars, test_bars, step=None):
+    step = step or test_bars
+    return [(start, start + train_bars, min(start + train_bars + test_bars, length))
+            for start in range(0, length - train_bars - 1, step)]
+
+# In-memory series shared by every window of a run: symbol -> (timestamp, close). Handed to
+# each pool worker once through the initializer, so tasks carry only offsets
+_series = {}
+
+def _init_series(series):
+    global _series
+    _series = series
+
+# Timestamps and close prices for a task, from the on-disk store (memory-mapped, no
+# pickling) or from the series shared with this process
+def _load(task):
+    if 'root' in task:
+        candles = read_candles(task['root'], task['symbol'], task['timeframe'])
+        return candles['timestamp'], candles['close']
+    return _series[task['symbol']]
+
+# Crossover strategy equity over close[start:end]; moving averages only look back, so they
+# are computed once per series and shared by every window and parameter combination
+def _run(close, key, fast, slow, start, end, fee):
+    fast_ma = default_registry.get('SMA', close, key=key, length=fast)
+    slow_ma = default_registry.get('SMA', close, key=key, length=slow)
+    codes = crossover_signals(fast_ma[start:end], slow_ma[start:end])
+    return backtest_vectorized(close[start:end], codes, 1.0, fee)['equity']
+
+# Train on one window, pick the best parameters and return the out-of-sample bar returns
+def evaluate_window(task):
+    timestamps, close = _load(task)
+    close = np.asarray(close, dtype=np.float64)
+    train_start, train_end, test_end = task['window']
+    # Content fingerprint of the whole series, hashed once per symbol by the caller
+    key = task['key']
+    best, best_score = None, -np.inf
+    for fast, slow in task['grid']:
+        equity = _run(close, key, fast, slow, train_start, train_end, task['fee'])
+        score = equity[-1] - 1 if len(equity) else -np.inf
+        if score > best_score:
+            best, best_score = (fast, slow), score
+    train_returns = np.diff(np.log(close[train_start:train_end]))
+    equity = _run(close, key, best[0], best[1], train_end, test_end, task['fee'])
+    returns = np.diff(equity, prepend=1.0) / np.concatenate(([1.0], equity[:-1]))
+    return {
+        'symbol': task['symbol'], 'window': task['window_id'], 'fast': best[0], 'slow': best[1],
+        'train_return': best_score, 'train_volatility': float(train_returns.std()) if len(train_returns) else 0.0,
+        'timestamp': np.asarray(timestamps[train_end:test_end]), 'returns': returns,
+    }
+
+# Raw capital weight of each symbol-window: equal, or inverse train-window volatility
+def allocation_weight(result, method='equal'):
+    if method == 'inverse_volatility':
+        return 1 / result['train_volatility'] if result['train_volatility'] > 0 else 0.0
+    return 1.0
+
+# Combine the partial out-of-sample return series into portfolio bar returns; at every
+# timestamp the weights are normalised over the symbols trading at that time
+def combine(results, method='equal'):
+    weighted, weights = [], []
+    for r in results:
+        if len(r['returns']):
+            w = allocation_weight(r, method)
+            weighted.append(pd.Series(r['returns'] * w, index=r['timestamp']))
+            weights.append(pd.Series(w, index=r['timestamp']))
+    if not weighted:
+        return pd.Series(dtype=np.float64)
+    total = pd.concat(weights).groupby(level=0).sum()
+    returns = pd.concat(weighted).groupby(level=0).sum() / total.where(total > 0)
+    return returns.fillna(0.0).sort_index()
+
+# Portfolio-level statistics from bar returns with `periods_per_year` bars per year
+def portfolio_stats(returns, periods_per_year=365):
+    if returns.empty:
+        return {}
+    values = returns.to_numpy()
+    equity = np.cumprod(1 + values)
+    peak = np.maximum.accumulate(np.maximum(equity, 1.0))
+    std = values.std()
+    return {
+        'total_return': equity[-1] - 1,
+        'annualized_return': equity[-1] ** (periods_per_year / len(values)) - 1,
+        'sharpe': values.mean() / std * np.sqrt(periods_per_year) if std > 0 else 0.0,
+        'max_drawdown': float(((peak - equity) / peak).max()),
+        'bars': len(values),
+    }
+
+# Walk-forward every symbol over rolling windows on a process pool.
+# `data` maps symbol -> DataFrame with timestamp/close columns; alternatively pass
+# `symbols` with `root`/`timeframe` so workers memory-map candles from the local store.
+def run_portfolio_backtest(data=None, symbols=None, root=None, timeframe='1d', train_bars=180, test_bars=30,
+                           step=None, fast_windows=(10, 20, 50), slow_windows=(100, 200), fee=0.0,
+                           allocation='equal', processes=None, periods_per_year=365):
+    grid = [(f, s) for f, s in itertools.product(fast_windows, slow_windows) if f < s]
+    tasks, series = [], {}
+    for symbol in (symbols if data is None else list(data)):
+        if data is None:
+            base = {'symbol': symbol, 'root': root, 'timeframe': timeframe}
+            close = read_candles(root, symbol, timeframe)['close']
+        else:
+            df = data[symbol]
+            close = df['close'].to_numpy(dtype=np.float64)
+            series[symbol] = (df['timestamp'].to_numpy(), close)
+            base = {'symbol': symbol, 'timeframe': timeframe}
+        base['key'] = fingerprint(np.asarray(close, dtype=np.float64))
+        for window_id, window in enumerate(walk_forward_windows(len(close), train_bars, test_bars, step)):
+            tasks.append(dict(base, window=window, window_id=window_id, grid=grid, fee=fee))
+    processes = processes or os.cpu_count()
+    logging.info(f"Walk-forward portfolio backtest: {len(tasks)} symbol-windows on {processes} processes")
+    if processes > 1:
+        with Pool(processes, initializer=_init_series, initargs=(series,)) as pool:
+            results = pool.map(evaluate_window, tasks, chunksize=max(1, len(tasks) // (processes * 4)))
+    else:
+        _init_series(series)
+        try:
+            results = [evaluate_window(task) for task in tasks]
+        finally:
+            _init_series({})
+    returns = combine(results, allocation)
+    windows = pd.DataFrame([{k: v for k, v in r.items() if k not in ('timestamp', 'returns')} for r in results])
+    return {'returns': returns, 'equity': (1 + returns).cumprod(), 'stats': portfolio_stats(returns, periods_per_year),
+            'windows': windows}
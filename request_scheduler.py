@@ -0,0 +1,188 @@
+import bisect
+import itertools
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+import numpy as np
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Request classes, most urgent first
+ORDER, ACCOUNT, MARKET_DATA = 0, 1, 2
+PRIORITY_NAMES = {ORDER: 'order', ACCOUNT: 'account', MARKET_DATA: 'market_data'}
+
+# Bybit v5 limits as (max weight, window seconds): 600 requests per 5 s per IP, and
+# per-UID limits per second on the order and account endpoints
+BYBIT_WINDOWS = {
+    'ip': (600, 5.0),
+    'order_create': (10, 1.0),
+    'order_cancel': (10, 1.0),
+    'order_query': (50, 1.0),
+    'account': (50, 1.0),
+}
+
+# Token buckets as (tokens per second, burst). A bucket lets through at most
+# burst + rate * window in any window, so each is sized to stay just within
+# BYBIT_WINDOWS while sustaining 70-90% of the allowed rate.
+BYBIT_LIMITS = {
+    'ip': (105.0, 50.0),
+    'order_create': (7.0, 2.0),
+    'order_cancel': (7.0, 2.0),
+    'order_query': (38.0, 10.0),
+    'account': (38.0, 10.0),
+}
+
+# Method -> (bucket weights, priority)
+BYBIT_ENDPOINTS = {
+    'create_order': ({'ip': 1, 'order_create': 1}, ORDER),
+    'edit_order': ({'ip': 1, 'order_create': 1}, ORDER),
+    'cancel_order': ({'ip': 1, 'order_cancel': 1}, ORDER),
+    'cancel_all_orders': ({'ip': 1, 'order_cancel': 1}, ORDER),
+    'fetch_order': ({'ip': 1, 'order_query': 1}, ACCOUNT),
+    'fetch_open_orders': ({'ip': 1, 'order_query': 1}, ACCOUNT),
+    'fetch_closed_orders': ({'ip': 1, 'order_query': 1}, ACCOUNT),
+    'fetch_my_trades': ({'ip': 1, 'order_query': 1}, ACCOUNT),
+    'fetch_positions': ({'ip': 1, 'account': 1}, ACCOUNT),
+    'fetch_balance': ({'ip': 1, 'account': 1}, ACCOUNT),
+}
+DEFAULT_ENDPOINT = ({'ip': 1}, MARKET_DATA)
+
+SCHEDULED_PREFIXES = ('fetch', 'create', 'cancel', 'edit')
+
+# Weighted token buckets shared by every thread using the exchange. Waiting requests are
+# granted in priority order; a request only waits behind a more urgent one when that one
+# is short of a bucket they both need, so market data keeps using the IP budget while an
+# order waits for its per-UID bucket, but never takes tokens an order could use now.
+class RequestScheduler:
+
+    def __init__(self, limits=BYBIT_LIMITS, endpoints=BYBIT_ENDPOINTS, clock=time.monotonic, max_samples=10_000):
+        self.rates = {name: rate for name, (rate, _) in limits.items()}
+        self.bursts = {name: burst for name, (_, burst) in limits.items()}
+        self.tokens = dict(self.bursts)
+        self.endpoints = endpoints
+        self.clock = clock
+        self.updated = clock()
+        self.waiting = []
+        self.granted = set()
+        self.condition = threading.Condition()
+        self._seq = itertools.count()
+        self.max_depth = defaultdict(int)
+        self.requests = defaultdict(int)
+        self.waits = defaultdict(lambda: deque(maxlen=max_samples))
+
+    def _refill(self):
+        now = self.clock()
+        elapsed = now - self.updated
+        self.updated = now
+        for name, rate in self.rates.items():
+            self.tokens[name] = min(self.bursts[name], self.tokens[name] + elapsed * rate)
+
+    # Grant every waiting request that may go now; returns seconds until the next could
+    def _dispatch(self):
+        self._refill()
+        short = set()
+        next_wake = None
+        for entry in list(self.waiting):
+            _, _, weights = entry
+            missing = [name for name, weight in weights.items() if self.tokens[name] < weight]
+            if not missing and not short.intersection(weights):
+                for name, weight in weights.items():
+                    self.tokens[name] -= weight
+                self.waiting.remove(entry)
+                self.granted.add(entry[1])
+                continue
+            short.update(missing)
+            for name in missing:
+                wake = (weights[name] - self.tokens[name]) / self.rates[name]
+                next_wake = wake if next_wake is None else min(next_wake, wake)
+        return next_wake
+
+    # Block until the method may be sent; returns the seconds spent waiting
+    def acquire(self, method):
+        weights, priority = self.endpoints.get(method, DEFAULT_ENDPOINT)
+        start = self.clock()
+        with self.condition:
+            entry = (priority, next(self._seq), weights)
+            bisect.insort(self.waiting, entry, key=lambda e: e[:2])
+            depth = sum(1 for e in self.waiting if e[0] == priority)
+            self.max_depth[priority] = max(self.max_depth[priority], depth)
+            while True:
+                next_wake = self._dispatch()
+                if entry[1] in self.granted:
+                    self.granted.discard(entry[1])
+                    # Others may have become eligible in the same pass
+                    self.condition.notify_all()
+                    break
+                self.condition.wait(next_wake)
+            waited = self.clock() - start
+            self.requests[priority] += 1
+            self.waits[priority].append(waited)
+        return waited
+
+    # Queue depth and wait-time percentiles (ms) per request class
+    def metrics(self, percentiles=(50, 90, 99)):
+        with self.condition:
+            self._refill()
+            report = {}
+            for priority, name in PRIORITY_NAMES.items():
+                waits = np.asarray(self.waits[priority]) * 1000
+                report[name] = {
+                    'queue_depth': sum(1 for e in self.waiting if e[0] == priority),
+                    'max_queue_depth': self.max_depth[priority],
+                    'requests': self.requests[priority],
+                    **{f'wait_p{p}_ms': float(np.percentile(waits, p)) if len(waits) else 0.0 for p in percentiles},
+                }
+            report['tokens'] = dict(self.tokens)
+            return report
+
+# Scheduled method for each Bybit v5 REST path a ccxt exchange requests; other paths are market data
+BYBIT_PATHS = {
+    'v5/order/create': 'create_order',
+    'v5/order/amend': 'edit_order',
+    'v5/order/cancel': 'cancel_order',
+    'v5/order/cancel-all': 'cancel_all_orders',
+    'v5/order/realtime': 'fetch_open_orders',
+    'v5/order/history': 'fetch_closed_orders',
+    'v5/execution/list': 'fetch_my_trades',
+    'v5/position/list': 'fetch_positions',
+    'v5/account/wallet-balance': 'fetch_balance',
+}
+
+# Route every request of an exchange through a scheduler, in place, the way install_clock
+# sets the nonce. On a ccxt exchange each HTTP request is scheduled by its REST path in
+# fetch2, so unified methods that send several requests are charged for each of them,
+# and ccxt's own uniform throttle is turned off. Exchanges without fetch2 (the simulated
+# one) get their unified methods wrapped instead. A recording wrapper
+# (exchange_recorder.RecordingExchange) is looked through, so the scheduler sits on the
+# exchange itself and requests are neither recorded twice nor scheduled twice.
+def install_scheduler(exchange, scheduler, paths=BYBIT_PATHS):
+    wrapper, exchange = exchange, vars(exchange).get('_exchange', exchange)
+    if hasattr(exchange, 'fetch2'):
+        fetch2 = exchange.fetch2
+
+        def scheduled_fetch2(path, api='public', method='GET', params={}, headers=None, body=None, config={}):
+            scheduler.acquire(paths.get(path, path))
+            return fetch2(path, api, method, params, headers, body, config)
+
+        exchange.fetch2 = scheduled_fetch2
+        exchange.enableRateLimit = False
+        return wrapper
+    for name in dir(exchange):
+        attribute = getattr(exchange, name)
+        if callable(attribute) and name.startswith(SCHEDULED_PREFIXES) and name != 'load_markets':
+            setattr(exchange, name, _scheduled(scheduler, name, attribute))
+    return wrapper
+
+def _scheduled(scheduler, name, function):
+    def scheduled(*args, **kwargs):
+        scheduler.acquire(name)
+        return function(*args, **kwargs)
+    return scheduled
+
+# Scheduler shared by every exchange object in this process (the limits are per IP and account)
+default_scheduler = RequestScheduler()
+
+def schedule(exchange, scheduler=None):
+    return install_scheduler(exchange, scheduler or default_scheduler)
@@ -0,0 +1,168 @@
+import logging
+import math
+import numpy as np
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Check results
+APPROVED, MAX_NOTIONAL, SYMBOL_EXPOSURE, DAILY_LOSS, LEVERAGE, NO_PRICE = range(6)
+REASONS = ['approved', 'max_notional', 'symbol_exposure', 'daily_loss', 'leverage', 'no_price']
+
+DAY_MS = 86_400_000
+
+# Pre-trade risk checks and volatility-based sizing for a fixed set of symbols. All state
+# lives in per-symbol arrays: positions, last prices, Wilder ATR and an EWMA of squared
+# log returns, updated one candle at a time (for one symbol or the whole portfolio at
+# once). Gross exposure and equity are kept current on every fill and price update, so a
+# single check() is a handful of scalar operations; check_orders() runs the same rules as
+# array operations over a batch.
+#   max_order_notional   largest notional of one order
+#   max_symbol_exposure  largest |position| notional per symbol, as a fraction of equity
+#   max_leverage         largest gross notional / equity after the order
+#   max_daily_loss       fraction of start-of-day equity; once lost, only orders that
+#                        reduce a position are approved until the next UTC day
+class RiskEngine:
+
+    def __init__(self, symbols, equity, max_order_notional=10_000.0, max_symbol_exposure=0.25, max_leverage=2.0,
+                 max_daily_loss=0.03, atr_length=14, vol_halflife=20, periods_per_year=24 * 365):
+        self.symbols = list(symbols)
+        self.index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        n = len(self.symbols)
+        self.position = np.zeros(n)
+        self.price = np.full(n, np.nan)
+        self.atr = np.full(n, np.nan)
+        self.variance = np.full(n, np.nan)
+        self.bars = np.zeros(n, dtype=np.int64)
+        self._tr_sum = np.zeros(n)
+        self.cash = float(equity)
+        self.equity = float(equity)
+        self.day_start_equity = float(equity)
+        self.day = None
+        self.gross = 0.0
+        self.max_order_notional = max_order_notional
+        self.max_symbol_exposure = max_symbol_exposure
+        self.max_leverage = max_leverage
+        self.max_daily_loss = max_daily_loss
+        self.atr_length = atr_length
+        self.vol_alpha = 1 - 0.5 ** (1 / vol_halflife)
+        self.periods_per_year = periods_per_year
+        self.rejections = np.zeros(len(REASONS), dtype=np.int64)
+
+    def _mark(self):
+        value = np.nan_to_num(self.position * self.price)
+        self.gross = float(np.abs(value).sum())
+        self.equity = self.cash + float(value.sum())
+
+    def _roll_day(self, timestamp):
+        day = timestamp // DAY_MS
+        if day != self.day:
+            self.day = day
+            self.day_start_equity = self.equity
+
+    # New candle for one symbol
+    def update(self, symbol, high, low, close, timestamp=None):
+        i = self.index[symbol]
+        self.update_many(np.array([i]), np.array([high]), np.array([low]), np.array([close]), timestamp)
+
+    # New candles for several symbols at once; `indices` are positions in self.symbols
+    def update_many(self, indices, high, low, close, timestamp=None):
+        high, low, close = (np.asarray(a, dtype=np.float64) for a in (high, low, close))
+        previous = self.price[indices]
+        seen = ~np.isnan(previous)
+        tr = np.where(seen, np.maximum(high, previous) - np.minimum(low, previous), high - low)
+        bars = self.bars[indices] + 1
+        # Wilder ATR seeded with the mean of the first atr_length true ranges
+        self._tr_sum[indices] += np.where(bars <= self.atr_length, tr, 0.0)
+        atr = self.atr[indices]
+        self.atr[indices] = np.where(bars < self.atr_length, np.nan,
+                                     np.where(bars == self.atr_length, self._tr_sum[indices] / self.atr_length,
+                                              atr + (tr - atr) / self.atr_length))
+        returns = np.where(seen, np.log(close / np.where(seen, previous, close)), np.nan)
+        variance = self.variance[indices]
+        self.variance[indices] = np.where(~seen, variance,
+                                          np.where(np.isnan(variance), returns ** 2,
+                                                   variance + self.vol_alpha * (returns ** 2 - variance)))
+        self.bars[indices] = bars
+        self.price[indices] = close
+        self._mark()
+        if timestamp is not None:
+            self._roll_day(timestamp)
+
+    # Apply an executed trade; qty is signed (+buy, -sell)
+    def on_fill(self, symbol, qty, price, fee=0.0):
+        i = self.index[symbol]
+        self.position[i] += qty
+        self.cash -= qty * price + fee
+        if np.isnan(self.price[i]):
+            self.price[i] = price
+        self._mark()
+
+    # Annualized realized volatility per symbol
+    def volatility(self):
+        return np.sqrt(self.variance * self.periods_per_year)
+
+    # Order size risking `risk_per_trade` of equity with the stop `atr_multiple` ATRs away
+    def size_by_atr(self, symbol, risk_per_trade=0.01, atr_multiple=2.0):
+        atr = self.atr[self.index[symbol]]
+        return 0.0 if not atr > 0 else self.equity * risk_per_trade / (atr * atr_multiple)
+
+    # Order size giving the position a `target_volatility` share of equity in annual volatility
+    def size_by_volatility(self, symbol, target_volatility=0.2):
+        i = self.index[symbol]
+        volatility = math.sqrt(self.variance[i] * self.periods_per_year)
+        return 0.0 if not volatility > 0 else self.equity * target_volatility / (volatility * self.price[i])
+
+    # Stop-loss distance as a fraction of price, for place_order_with_risk_management
+    def atr_stop(self, symbol, atr_multiple=2.0):
+        i = self.index[symbol]
+        return float(self.atr[i] * atr_multiple / self.price[i])
+
+    # Check one order; qty is signed. Returns one of the reason codes (APPROVED = 0).
+    def check(self, symbol, qty, price=None):
+        i = self.index[symbol]
+        price = float(self.price[i]) if price is None else price
+        if not price > 0:
+            return self._reject(NO_PRICE)
+        position = float(self.position[i])
+        after = position + qty
+        reducing = abs(after) <= abs(position)
+        if abs(qty) * price > self.max_order_notional:
+            return self._reject(MAX_NOTIONAL)
+        if reducing:
+            return APPROVED
+        equity = self.equity
+        if self.day_start_equity - equity >= self.max_daily_loss * self.day_start_equity:
+            return self._reject(DAILY_LOSS)
+        if abs(after) * price > self.max_symbol_exposure * equity:
+            return self._reject(SYMBOL_EXPOSURE)
+        if self.gross + (abs(after) - abs(position)) * price > self.max_leverage * equity:
+            return self._reject(LEVERAGE)
+        return APPROVED
+
+    def _reject(self, reason):
+        self.rejections[reason] += 1
+        return reason
+
+    # Check a batch of orders against the current portfolio as array operations; each
+    # order is judged on its own, as if it were the only one sent. Returns reason codes.
+    def check_orders(self, symbols, qty, price=None):
+        indices = np.array([self.index[s] for s in symbols]) if not isinstance(symbols, np.ndarray) else symbols
+        qty = np.asarray(qty, dtype=np.float64)
+        price = self.price[indices] if price is None else np.asarray(price, dtype=np.float64)
+        position = self.position[indices]
+        after = position + qty
+        reducing = np.abs(after) <= np.abs(position)
+        lost = self.day_start_equity - self.equity >= self.max_daily_loss * self.day_start_equity
+        reasons = np.select(
+            [~(price > 0), np.abs(qty) * price > self.max_order_notional, reducing, np.full(len(qty), lost),
+             np.abs(after) * price > self.max_symbol_exposure * self.equity,
+             self.gross + (np.abs(after) - np.abs(position)) * price > self.max_leverage * self.equity],
+            [NO_PRICE, MAX_NOTIONAL, APPROVED, DAILY_LOSS, SYMBOL_EXPOSURE, LEVERAGE], APPROVED).astype(np.int8)
+        np.add.at(self.rejections, reasons[reasons != APPROVED], 1)
+        return reasons
+
+    def report(self):
+        return {'equity': self.equity, 'gross': self.gross, 'leverage': self.gross / self.equity if self.equity else np.inf,
+                'daily_pnl': self.equity - self.day_start_equity,
+                'rejections': {REASONS[i]: int(c) for i, c in enumerate(self.rejections) if i and c}}
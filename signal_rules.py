@@ -0,0 +1,190 @@
+import ast
+import json
+import logging
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# A rule is a Python-style expression over DataFrame columns, e.g.
+#   "crosses_above(SMA_50, SMA_200) and RSI < 70"
+# Column names, numbers, arithmetic, comparisons (chained too), and/or/not, the helper
+# functions below and lookbacks such as RSI[1] (the value one bar ago) are allowed.
+# Each rule is compiled once into a single expression of NumPy array operations.
+
+# Value n bars ago (NaN where no history exists); a negative n would read future bars
+def shift(values, n=1):
+    if n < 0:
+        raise ValueError(f"Lookback must not be negative: {n}")
+    values = np.asarray(values, dtype=np.float64)
+    if n == 0:
+        return values
+    out = np.full(len(values), np.nan)
+    out[n:] = values[:-n]
+    return out
+
+# a moves from at-or-below b to above b on this bar
+def crosses_above(a, b):
+    return (a > b) & (shift(a) <= shift(b))
+
+# a moves from at-or-above b to below b on this bar
+def crosses_below(a, b):
+    return (a < b) & (shift(a) >= shift(b))
+
+# Highest value over the last n bars including the current one
+def highest(values, n):
+    out = np.full(len(values), np.nan)
+    if 0 < n <= len(values):
+        out[n - 1:] = sliding_window_view(np.asarray(values, dtype=np.float64), n).max(axis=1)
+    return out
+
+# Lowest value over the last n bars including the current one
+def lowest(values, n):
+    out = np.full(len(values), np.nan)
+    if 0 < n <= len(values):
+        out[n - 1:] = sliding_window_view(np.asarray(values, dtype=np.float64), n).min(axis=1)
+    return out
+
+FUNCTIONS = {
+    'crosses_above': crosses_above,
+    'crosses_below': crosses_below,
+    'shift': shift,
+    'highest': highest,
+    'lowest': lowest,
+    'abs': np.abs,
+}
+
+ALLOWED_NODES = (
+    ast.Expression, ast.BoolOp, ast.And, ast.Or, ast.UnaryOp, ast.Not, ast.USub, ast.UAdd,
+    ast.BinOp, ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Compare, ast.Lt, ast.LtE, ast.Gt,
+    ast.GtE, ast.Eq, ast.NotEq, ast.Call, ast.Name, ast.Load, ast.Constant, ast.Subscript,
+)
+
+# Rewrites a parsed rule into NumPy element-wise operations
+class _RuleTransformer(ast.NodeTransformer):
+
+    def __init__(self):
+        self.columns = set()
+
+    def visit_BoolOp(self, node):
+        op = ast.BitAnd() if isinstance(node.op, ast.And) else ast.BitOr()
+        values = [self.visit(v) for v in node.values]
+        result = values[0]
+        for value in values[1:]:
+            result = ast.BinOp(left=result, op=op, right=value)
+        return result
+
+    def visit_UnaryOp(self, node):
+        operand = self.visit(node.operand)
+        if isinstance(node.op, ast.Not):
+            return ast.UnaryOp(op=ast.Invert(), operand=operand)
+        return ast.UnaryOp(op=node.op, operand=operand)
+
+    def visit_Compare(self, node):
+        # a < b < c becomes (a < b) & (b < c)
+        operands = [self.visit(node.left)] + [self.visit(c) for c in node.comparators]
+        result = None
+        for left, op, right in zip(operands, node.ops, operands[1:]):
+            compare = ast.Compare(left=left, ops=[op], comparators=[right])
+            result = compare if result is None else ast.BinOp(left=result, op=ast.BitAnd(), right=compare)
+        return result
+
+    def visit_Call(self, node):
+        if not isinstance(node.func, ast.Name) or node.func.id not in FUNCTIONS or node.keywords:
+            raise ValueError(f"Unsupported function call in rule: {ast.unparse(node)}")
+        # shift(close, -1) reads the next bar, like close[-1]
+        if node.func.id == 'shift' and len(node.args) > 1 and isinstance(node.args[1], ast.UnaryOp) \
+                and isinstance(node.args[1].op, ast.USub):
+            raise ValueError(f"Lookback must not be negative: {ast.unparse(node)}")
+        node.args = [self.visit(a) for a in node.args]
+        return node
+
+    def visit_Name(self, node):
+        if node.id in FUNCTIONS:
+            raise ValueError(f"Function {node.id} must be called")
+        self.columns.add(node.id)
+        return ast.Subscript(value=ast.Name(id='_columns', ctx=ast.Load()), slice=ast.Constant(node.id), ctx=ast.Load())
+
+    def visit_Subscript(self, node):
+        # RSI[2] is the value two bars ago
+        if not isinstance(node.slice, ast.Constant) or not isinstance(node.slice.value, int):
+            raise ValueError(f"Lookback must be an integer number of bars: {ast.unparse(node)}")
+        return ast.Call(func=ast.Name(id='shift', ctx=ast.Load()), args=[self.visit(node.value), node.slice], keywords=[])
+
+# Bars of history a parsed rule reads before the current one: lookbacks and shift() add
+# their offset, crossovers one bar and highest/lowest(x, n) n - 1 bars. Offsets that are
+# not integer constants raise ValueError, since the history needed is then unbounded.
+def rule_lookback(node):
+    def constant(arg):
+        if not isinstance(arg, ast.Constant) or not isinstance(arg.value, int):
+            raise ValueError(f"Offset must be an integer constant: {ast.unparse(arg)}")
+        return arg.value
+
+    if isinstance(node, ast.Subscript):
+        return rule_lookback(node.value) + max(constant(node.slice), 0)
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Name):
+        inner = max((rule_lookback(a) for a in node.args), default=0)
+        name = node.func.id
+        if name in ('crosses_above', 'crosses_below'):
+            return inner + 1
+        if name == 'shift':
+            return rule_lookback(node.args[0]) + max(constant(node.args[1]) if len(node.args) > 1 else 1, 0)
+        if name in ('highest', 'lowest'):
+            return rule_lookback(node.args[0]) + max(constant(node.args[1]) - 1, 0)
+        return inner
+    return max((rule_lookback(child) for child in ast.iter_child_nodes(node)), default=0)
+
+# Compile one rule string into a function of a column mapping returning a boolean array.
+# evaluate.lookback is the rule's rule_lookback, or None when it is unbounded.
+def compile_rule(rule):
+    tree = ast.parse(rule, mode='eval')
+    for node in ast.walk(tree):
+        if not isinstance(node, ALLOWED_NODES):
+            raise ValueError(f"Unsupported syntax in rule {rule!r}: {type(node).__name__}")
+    try:
+        lookback = rule_lookback(tree)
+    except ValueError:
+        lookback = None
+    transformer = _RuleTransformer()
+    tree = ast.fix_missing_locations(transformer.visit(tree))
+    code = compile(tree, f'<rule {rule}>', 'eval')
+    columns = sorted(transformer.columns)
+
+    def evaluate(data):
+        namespace = dict(FUNCTIONS, __builtins__={})
+        namespace['_columns'] = {c: np.asarray(data[c], dtype=np.float64) for c in columns}
+        result = eval(code, namespace)
+        return np.broadcast_to(np.asarray(result, dtype=bool), (len(data[columns[0]]),) if columns else np.shape(result))
+
+    evaluate.rule = rule
+    evaluate.columns = columns
+    evaluate.lookback = lookback
+    return evaluate
+
+SIGNAL_LABELS = np.array(['hold', 'buy', 'sell'], dtype=object)
+
+# Compile a {'buy': rule, 'sell': rule} strategy; buy wins when both fire on the same bar
+def compile_strategy(rules):
+    buy = compile_rule(rules['buy'])
+    sell = compile_rule(rules['sell'])
+
+    def signals(data):
+        buys = buy(data)
+        codes = buys.astype(np.int8)
+        codes[sell(data) & ~buys] = 2
+        return SIGNAL_LABELS[codes]
+
+    signals.columns = sorted(set(buy.columns) | set(sell.columns))
+    signals.lookback = None if None in (buy.lookback, sell.lookback) else max(buy.lookback, sell.lookback)
+    return signals
+
+# Load a strategy definition from a JSON file
+def load_strategy(path):
+    with open(path) as f:
+        rules = json.load(f)
+    logging.info(f"Loaded strategy rules from {path}: {rules}")
+    return compile_strategy(rules)
+
+# The crossover rules hard-coded in every trading_strategy copy
+SMA_CROSSOVER = {
+    'buy': 'crosses_above(SMA_50, SMA_200)',
+    'sell': 'crosses_below(SMA_50, SMA_200)',
+}
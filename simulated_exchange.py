@@ -0,0 +1,219 @@
+import itertools
+import logging
+import random
+import threading
+import time
+from collections import deque
+import ccxt
+import numpy as np
+from ohlcv_store import timeframe_to_ms
+from request_scheduler import BYBIT_ENDPOINTS, DEFAULT_ENDPOINT
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Random-walk OHLCV rows in ccxt list-of-lists layout
+def synthetic_candles(count, timeframe='1h', start=1_700_000_000_000, price=30000.0, volatility=0.01, seed=0):
+    rng = np.random.default_rng(seed)
+    close = price * np.exp(np.cumsum(rng.normal(0, volatility, count)))
+    open_ = np.concatenate(([price], close[:-1]))
+    spread = np.abs(rng.normal(0, volatility / 2, count)) * close
+    rows = np.empty((count, 6))
+    rows[:, 0] = start + np.arange(count) * timeframe_to_ms(timeframe)
+    rows[:, 1] = open_
+    rows[:, 2] = np.maximum(open_, close) + spread
+    rows[:, 3] = np.minimum(open_, close) - spread
+    rows[:, 4] = close
+    rows[:, 5] = rng.uniform(1, 100, count)
+    return rows
+
+# In-process stand-in for ccxt.bybit with the same method surface, fed from recorded or
+# synthetic candles. Latency, rate limits, clock skew and error injection are configurable:
+#   latency       seconds added to every call (plus uniform jitter up to `jitter`)
+#   rate_limit    max requests per second before ccxt.RateLimitExceeded is raised
+#   endpoint_limits  {bucket: (max weight, window seconds)} enforced over a sliding window
+#                 with the request_scheduler endpoint weights, e.g. BYBIT_WINDOWS
+#   clock_skew    ms the server clock is ahead of local time; a params['timestamp'] outside
+#                 recvWindow is rejected with ccxt.InvalidNonce like Bybit's retCode 10002
+#   error_rate    probability that any call raises ccxt.NetworkError
+#   inject(method, error)  queues an exception for the next call of a method
+class SimulatedExchange:
+
+    id = 'bybit'
+
+    def __init__(self, candles=None, latency=0.0, jitter=0.0, rate_limit=None, clock_skew=0,
+                 error_rate=0.0, recv_window=5000, seed=0, clock=time.time, endpoint_limits=None):
+        self.candles = {}
+        for (symbol, timeframe), rows in (candles or {}).items():
+            self.load_candles(symbol, timeframe, rows)
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit = rate_limit
+        self.rateLimit = 1000 / rate_limit if rate_limit else 20
+        self.endpoint_limits = endpoint_limits or {}
+        self._usage = {bucket: deque() for bucket in self.endpoint_limits}
+        self.rejected = 0
+        self.clock_skew = clock_skew
+        self.error_rate = error_rate
+        self.recv_window = recv_window
+        self.clock = clock
+        self.random = random.Random(seed)
+        self.has = {'fetchOHLCV': True, 'createOrder': True, 'cancelOrder': True, 'fetchOrder': True,
+                    'fetchOpenOrders': True, 'fetchOrderBook': True, 'fetchTicker': True, 'fetchTime': True,
+                    'createOrderWithTakeProfitAndStopLoss': True}
+        self.options = {'recvWindow': recv_window}
+        self.orders = {}
+        self.calls = []
+        self.injected = {}
+        self._ids = itertools.count(1)
+        self._recent = deque()
+        self._lock = threading.Lock()
+
+    def load_candles(self, symbol, timeframe, rows):
+        rows = np.asarray(rows, dtype=np.float64)
+        self.candles[(symbol, timeframe)] = {'rows': rows, 'cursor': len(rows)}
+
+    # Reveal the next n candles of a symbol (the cursor marks the newest visible candle)
+    def advance(self, symbol, timeframe, n=1):
+        series = self.candles[(symbol, timeframe)]
+        series['cursor'] = min(len(series['rows']), series['cursor'] + n)
+
+    def inject(self, method, error):
+        self.injected.setdefault(method, deque()).append(error)
+
+    def _visible(self, symbol, timeframe):
+        series = self.candles.get((symbol, timeframe))
+        if series is None:
+            raise ccxt.BadSymbol(f'bybit does not have market symbol {symbol} {timeframe}')
+        return series['rows'][:series['cursor']]
+
+    # Common request handling: accounting, rate limit, injected errors, latency, timestamp check
+    def _request(self, method, params=None):
+        with self._lock:
+            now = time.monotonic()
+            self.calls.append(method)
+            if self.rate_limit:
+                while self._recent and now - self._recent[0] >= 1.0:
+                    self._recent.popleft()
+                if len(self._recent) >= self.rate_limit:
+                    raise ccxt.RateLimitExceeded('bybit {"retCode":10006,"retMsg":"Too many visits!"}')
+                self._recent.append(now)
+            if self.endpoint_limits:
+                self._charge(method, now)
+            queued = self.injected.get(method)
+            error = queued.popleft() if queued else None
+            fail = self.error_rate and self.random.random() < self.error_rate
+            delay = self.latency + (self.random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay:
+            time.sleep(delay)
+        if error is not None:
+            raise error
+        if fail:
+            raise ccxt.NetworkError(f'bybit simulated network error in {method}')
+        timestamp = (params or {}).get('timestamp')
+        if timestamp is not None:
+            server = self.milliseconds() + self.clock_skew
+            window = (params or {}).get('recvWindow', self.recv_window)
+            if not server - window <= timestamp < server + 1000:
+                raise ccxt.InvalidNonce(
+                    'bybit {"retCode":10002,"retMsg":"invalid request, please check your server timestamp or recv_window param. '
+                    f'req_timestamp[{timestamp}],server_timestamp[{server}],recv_window[{window}]"}}')
+
+    # Sliding-window weight check per bucket; called with the lock held
+    def _charge(self, method, now):
+        weights, _ = BYBIT_ENDPOINTS.get(method, DEFAULT_ENDPOINT)
+        for bucket, weight in weights.items():
+            if bucket not in self.endpoint_limits:
+                continue
+            limit, window = self.endpoint_limits[bucket]
+            usage = self._usage[bucket]
+            while usage and now - usage[0][0] >= window:
+                usage.popleft()
+            if sum(w for _, w in usage) + weight > limit:
+                self.rejected += 1
+                raise ccxt.RateLimitExceeded(f'bybit {{"retCode":10006,"retMsg":"Too many visits! {bucket} limit exceeded"}}')
+        for bucket, weight in weights.items():
+            if bucket in self._usage:
+                self._usage[bucket].append((now, weight))
+
+    def milliseconds(self):
+        return int(self.clock() * 1000)
+
+    def nonce(self):
+        return self.milliseconds()
+
+    def fetch_time(self, params=None):
+        self._request('fetch_time', params)
+        return self.milliseconds() + self.clock_skew
+
+    def load_markets(self, reload=False, params=None):
+        return {symbol: {'symbol': symbol} for symbol, _ in self.candles}
+
+    def fetch_ohlcv(self, symbol, timeframe='1m', since=None, limit=None, params=None):
+        self._request('fetch_ohlcv', params)
+        rows = self._visible(symbol, timeframe)
+        if since is not None:
+            rows = rows[np.searchsorted(rows[:, 0], since):]
+            rows = rows[:limit or 200]
+        else:
+            rows = rows[-(limit or 200):]
+        return [[int(r[0]), r[1], r[2], r[3], r[4], r[5]] for r in rows]
+
+    def _last_price(self, symbol):
+        for (s, _), series in self.candles.items():
+            if s == symbol and series['cursor']:
+                return float(series['rows'][series['cursor'] - 1, 4])
+        raise ccxt.BadSymbol(f'bybit does not have market symbol {symbol}')
+
+    def fetch_ticker(self, symbol, params=None):
+        self._request('fetch_ticker', params)
+        last = self._last_price(symbol)
+        return {'symbol': symbol, 'last': last, 'bid': last * 0.9999, 'ask': last * 1.0001, 'timestamp': self.milliseconds()}
+
+    def fetch_order_book(self, symbol, limit=25, params=None):
+        self._request('fetch_order_book', params)
+        last = self._last_price(symbol)
+        levels = np.arange(1, limit + 1)
+        return {
+            'symbol': symbol,
+            'bids': [[last * (1 - 0.0001 * i), 1.0 / i] for i in levels],
+            'asks': [[last * (1 + 0.0001 * i), 1.0 / i] for i in levels],
+            'timestamp': self.milliseconds(),
+            'nonce': None,
+        }
+
+    def create_order(self, symbol, type, side, amount, price=None, params=None):
+        self._request('create_order', params)
+        if amount <= 0:
+            raise ccxt.InvalidOrder(f'bybit invalid order amount {amount}')
+        last = self._last_price(symbol)
+        filled = type == 'market'
+        order = {
+            'id': str(next(self._ids)), 'symbol': symbol, 'type': type, 'side': side, 'amount': amount,
+            'price': last if filled else price, 'average': last if filled else None,
+            'filled': amount if filled else 0.0, 'remaining': 0.0 if filled else amount,
+            'status': 'closed' if filled else 'open', 'timestamp': self.milliseconds(), 'info': dict(params or {}),
+        }
+        self.orders[order['id']] = order
+        return dict(order)
+
+    def cancel_order(self, id, symbol=None, params=None):
+        self._request('cancel_order', params)
+        order = self.orders.get(id)
+        if order is None or order['status'] != 'open':
+            raise ccxt.OrderNotFound(f'bybit order {id} not found')
+        order['status'] = 'canceled'
+        return dict(order)
+
+    def fetch_order(self, id, symbol=None, params=None):
+        self._request('fetch_order', params)
+        if id not in self.orders:
+            raise ccxt.OrderNotFound(f'bybit order {id} not found')
+        return dict(self.orders[id])
+
+    def fetch_open_orders(self, symbol=None, since=None, limit=None, params=None):
+        self._request('fetch_open_orders', params)
+        return [dict(o) for o in self.orders.values() if o['status'] == 'open' and (symbol is None or o['symbol'] == symbol)]
+
+    def close(self):
+        pass
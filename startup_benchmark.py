@@ -0,0 +1,67 @@
+import logging
+import os
+import subprocess
+import sys
+import time
+import pandas as pd
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Time `tradebot --help` may take to start, interpreter start-up included
+STARTUP_BUDGET = 0.2
+
+# Dependencies the CLI and `import tradebot` must not load
+HEAVY_MODULES = ('ccxt', 'pandas', 'numpy', 'pandas_ta', 'ta', 'aiohttp', 'ntplib')
+
+# Name -> Python arguments; the bare interpreter is the baseline for the overhead column
+STARTUP_CASES = {
+    'python': ['-c', 'pass'],
+    'import tradebot': ['-c', 'import tradebot'],
+    'tradebot --help': ['-m', 'tradebot', '--help'],
+    'import risk_engine': ['-c', 'import risk_engine'],
+    'import Backtesting': ['-c', 'import Backtesting'],
+}
+
+# Wall-clock seconds of each of `repeats` runs of the interpreter with `args`
+def time_startup(args, repeats=5):
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        subprocess.run([sys.executable] + list(args), cwd=ROOT, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+# HEAVY_MODULES imported by running `code`
+def heavy_modules_loaded(code):
+    probe = f"{code}\nimport sys\nprint(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    output = subprocess.run([sys.executable, '-c', probe], cwd=ROOT, check=True, capture_output=True, text=True).stdout
+    lines = output.strip().splitlines()
+    return [m for m in lines[-1].split(',') if m] if lines else []
+
+# Best and median start-up per case, and its overhead over the bare interpreter
+def run_benchmark(cases=STARTUP_CASES, repeats=5):
+    rows = []
+    for name, args in cases.items():
+        try:
+            samples = time_startup(args, repeats)
+        except subprocess.CalledProcessError as e:
+            logging.warning(f"Skipping '{name}': exited with {e.returncode}")
+            continue
+        code = args[1] if args[0] == '-c' else 'import tradebot.cli; tradebot.cli.build_parser()'
+        rows.append({'case': name, 'best_ms': min(samples) * 1000, 'median_ms': sorted(samples)[len(samples) // 2] * 1000,
+                     'heavy_modules': ','.join(heavy_modules_loaded(code))})
+    report = pd.DataFrame(rows).set_index('case')
+    report.insert(2, 'overhead_ms', report['best_ms'] - report.loc['python', 'best_ms'])
+    logging.info(f"Start-up benchmark (best of {repeats})\n{report.round(1).to_string()}")
+    best = report.loc['tradebot --help', 'best_ms'] / 1000
+    if best > STARTUP_BUDGET:
+        logging.warning(f"tradebot --help took {best * 1000:.0f} ms, over the {STARTUP_BUDGET * 1000:.0f} ms budget")
+    return report
+
+# Example usage
+if __name__ == "__main__":
+    run_benchmark()
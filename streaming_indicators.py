@@ -0,0 +1,192 @@
+import math
+from collections import deque
+
+NAN = float('nan')
+
+# Incremental indicators for the live loop. Each object keeps only its rolling state and
+# update() folds in one closed candle in constant time, returning the latest value (NaN
+# until enough candles have been seen). Defaults mirror pandas_ta as used by tradingbot.
+
+# Simple moving average from a running sum over the last `length` values
+class SMA:
+
+    def __init__(self, length):
+        self.length = length
+        self.window = deque()
+        self.total = 0.0
+        self.value = NAN
+
+    def update(self, x):
+        self.window.append(x)
+        self.total += x
+        if len(self.window) > self.length:
+            self.total -= self.window.popleft()
+        self.value = self.total / self.length if len(self.window) == self.length else NAN
+        return self.value
+
+# Exponential moving average; presma=True seeds with the SMA of the first `length`
+# values like pandas_ta, presma=False matches pandas ewm(span=length, adjust=False)
+class EMA:
+
+    def __init__(self, length, presma=True):
+        self.length = length
+        self.alpha = 2 / (length + 1)
+        self.presma = presma
+        self.count = 0
+        self.seed = 0.0
+        self.value = NAN
+
+    def update(self, x):
+        self.count += 1
+        if self.presma and self.count <= self.length:
+            self.seed += x
+            self.value = self.seed / self.length if self.count == self.length else NAN
+        elif self.count == 1:
+            self.value = x
+        else:
+            self.value += self.alpha * (x - self.value)
+        return self.value
+
+# Wilder's moving average (alpha = 1/length); adjust=True matches pandas_ta.rma,
+# adjust=False matches the ta library
+class RMA:
+
+    def __init__(self, length, adjust=True):
+        self.length = length
+        self.decay = 1 - 1 / length
+        self.adjust = adjust
+        self.count = 0
+        self.numerator = 0.0
+        self.denominator = 0.0
+        self.mean = NAN
+        self.value = NAN
+
+    def update(self, x):
+        self.count += 1
+        if self.adjust:
+            self.numerator = x + self.decay * self.numerator
+            self.denominator = 1 + self.decay * self.denominator
+            self.mean = self.numerator / self.denominator
+        else:
+            self.mean = x if self.count == 1 else self.mean + (1 - self.decay) * (x - self.mean)
+        self.value = self.mean if self.count >= self.length else NAN
+        return self.value
+
+# Relative strength index from Wilder-smoothed average gains and losses
+class RSI:
+
+    def __init__(self, length=14, adjust=True):
+        self.gain = RMA(length, adjust)
+        self.loss = RMA(length, adjust)
+        self.previous = None
+        self.value = NAN
+
+    def update(self, close):
+        if self.previous is not None:
+            delta = close - self.previous
+            gain = self.gain.update(max(delta, 0.0))
+            loss = self.loss.update(max(-delta, 0.0))
+            total = gain + loss
+            self.value = 100 * gain / total if total else NAN
+        self.previous = close
+        return self.value
+
+# MACD line and signal line; the signal EMA starts at the first valid MACD value
+class MACD:
+
+    def __init__(self, fast=12, slow=26, signal=9, presma=True):
+        self.fast = EMA(fast, presma)
+        self.slow = EMA(slow, presma)
+        self.signal_ema = EMA(signal, presma)
+        self.value = NAN
+        self.signal = NAN
+
+    def update(self, close):
+        self.value = self.fast.update(close) - self.slow.update(close)
+        if not math.isnan(self.value):
+            self.signal = self.signal_ema.update(self.value)
+        return self.value
+
+# Parabolic SAR tracking only the trend direction, extreme point and acceleration factor
+class ParabolicSAR:
+
+    def __init__(self, af0=0.02, max_af=0.2):
+        self.af0 = af0
+        self.max_af = max_af
+        self.af = af0
+        self.count = 0
+        self.first = None
+        self.falling = False
+        self.sar = NAN
+        self.ep = NAN
+        self.previous = None
+        self.before_previous = None
+        self.value = NAN
+
+    def update(self, high, low, close=None):
+        self.count += 1
+        if self.count == 1:
+            self.first = (high, low, close)
+        elif self.count == 2:
+            # Initial direction from the first two bars' directional movement, as in pandas_ta.psar
+            first_high, first_low, first_close = self.first
+            up, down = high - first_high, first_low - low
+            self.falling = down > up and down > 0
+            self.sar = first_close if first_close is not None else (first_high if self.falling else first_low)
+            self.ep = first_low if self.falling else first_high
+            self.previous = (first_high, first_low)
+            self._step(high, low)
+        else:
+            self._step(high, low)
+        return self.value
+
+    def _step(self, high, low):
+        sar = self.sar + self.af * (self.ep - self.sar)
+        lows = [self.previous[1]] + ([self.before_previous[1]] if self.before_previous else [])
+        highs = [self.previous[0]] + ([self.before_previous[0]] if self.before_previous else [])
+        if self.falling:
+            reverse = high > sar
+            if low < self.ep:
+                self.ep = low
+                self.af = min(self.af + self.af0, self.max_af)
+            sar = max(max(highs), sar)
+        else:
+            reverse = low < sar
+            if high > self.ep:
+                self.ep = high
+                self.af = min(self.af + self.af0, self.max_af)
+            sar = min(min(lows), sar)
+        if reverse:
+            sar = self.ep
+            self.af = self.af0
+            self.falling = not self.falling
+            self.ep = low if self.falling else high
+        self.sar = sar
+        self.value = sar
+        self.before_previous = self.previous
+        self.previous = (high, low)
+
+# The tradingbot.calculate_indicators set, updated one closed candle at a time
+class IndicatorSet:
+
+    def __init__(self):
+        self.sma50 = SMA(50)
+        self.sma200 = SMA(200)
+        self.ema12 = EMA(12)
+        self.ema26 = EMA(26)
+        self.macd = MACD(12, 26, 9)
+        self.rsi = RSI(14)
+        self.sar = ParabolicSAR()
+
+    def update(self, high, low, close):
+        self.macd.update(close)
+        return {
+            'SMA50': self.sma50.update(close),
+            'SMA200': self.sma200.update(close),
+            'EMA12': self.ema12.update(close),
+            'EMA26': self.ema26.update(close),
+            'MACD': self.macd.value,
+            'MACD_signal': self.macd.signal,
+            'RSI': self.rsi.update(close),
+            'SAR': self.sar.update(high, low, close),
+        }
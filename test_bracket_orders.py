@@ -0,0 +1,64 @@
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock
+import ccxt
+from bracket_orders import place_bracket_order
+
+class TestBracketOrders(unittest.TestCase):
+
+    def make_exchange(self, fail_type=None, delay=0.0):
+        exchange = MagicMock()
+        exchange.has = {'createOrderWithTakeProfitAndStopLoss': True}
+        ids = iter(range(1, 100))
+
+        def create_order(symbol, type, side, amount, price=None, params=None):
+            time.sleep(delay)
+            if type == fail_type:
+                raise ccxt.InsufficientFunds('bybit leg rejected')
+            return {'id': str(next(ids)), 'price': 50000 if type == 'market' else price}
+
+        exchange.create_order.side_effect = create_order
+        return exchange
+
+    def test_protective_legs_are_sent_concurrently(self):
+        exchange = self.make_exchange(delay=0.1)
+        start = time.perf_counter()
+        bracket = place_bracket_order(exchange, 'BTC/USDT', 'buy', 0.001, 0.01, 0.02)
+        self.assertLess(time.perf_counter() - start, 0.28)
+        self.assertEqual(bracket['status'], 'open')
+        self.assertEqual(bracket['stop_loss_price'], 49500.0)
+        exchange.create_order.assert_any_call('BTC/USDT', 'stop', 'sell', 0.001, 49500.0)
+        exchange.create_order.assert_any_call('BTC/USDT', 'limit', 'sell', 0.001, 51000.0)
+        self.assertEqual(set(bracket['latency']), {'entry', 'stop_loss', 'take_profit'})
+
+    def test_failed_leg_cancels_orphan_and_flattens(self):
+        exchange = self.make_exchange(fail_type='stop')
+        with self.assertRaises(ccxt.InsufficientFunds) as ctx:
+            place_bracket_order(exchange, 'BTC/USDT', 'buy', 0.001, 0.01, 0.02)
+        bracket = ctx.exception.bracket
+        self.assertEqual(bracket['status'], 'failed')
+        exchange.cancel_order.assert_called_once()
+        exchange.create_order.assert_called_with('BTC/USDT', 'market', 'sell', 0.001, None, {'reduceOnly': True})
+
+    def test_price_lookup_failure_does_not_flatten(self):
+        exchange = MagicMock()
+        exchange.has = {}
+        exchange.create_order.return_value = {'id': '1', 'price': None}
+        exchange.fetch_order.side_effect = ccxt.NetworkError('bybit timeout')
+        with self.assertRaises(ccxt.NetworkError) as ctx:
+            place_bracket_order(exchange, 'BTC/USDT', 'buy', 0.001, 0.01, 0.02)
+        self.assertEqual(ctx.exception.bracket['status'], 'failed')
+        exchange.create_order.assert_called_once_with('BTC/USDT', 'market', 'buy', 0.001)
+        exchange.cancel_order.assert_not_called()
+
+    def test_native_bracket_is_one_round_trip(self):
+        exchange = self.make_exchange()
+        bracket = place_bracket_order(exchange, 'BTC/USDT', 'sell', 0.001, 0.01, 0.02, reference_price=50000)
+        exchange.create_order.assert_called_once_with(
+            'BTC/USDT', 'market', 'sell', 0.001, None,
+            {'stopLoss': {'triggerPrice': 50500.0}, 'takeProfit': {'triggerPrice': 49000.0}})
+        self.assertEqual(bracket['status'], 'open')
+
+if __name__ == '__main__':
+    unittest.main()
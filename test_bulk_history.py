@@ -0,0 +1,67 @@
+import threading
+import time
+import unittest
+import ccxt
+import numpy as np
+from bulk_history import RateLimiter, load_history_many, split_windows
+
+MINUTE = 60_000
+
+# Local stand-in that caps page size, enforces a request rate and tracks concurrency
+class FakeExchange:
+
+    def __init__(self, start, count, page_cap=200, max_per_second=400, latency=0.002):
+        self.start = start
+        self.count = count
+        self.page_cap = page_cap
+        self.max_per_second = max_per_second
+        self.latency = latency
+        self.rateLimit = 1
+        self.lock = threading.Lock()
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def milliseconds(self):
+        return self.start + self.count * MINUTE
+
+    def fetch_ohlcv(self, symbol, timeframe='1m', since=None, limit=None, params=None):
+        with self.lock:
+            now = time.monotonic()
+            self.requests = [t for t in self.requests if now - t < 1.0]
+            if len(self.requests) >= self.max_per_second:
+                raise ccxt.RateLimitExceeded('bybit {"retCode":10006,"retMsg":"Too many visits!"}')
+            self.requests.append(now)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(self.latency)
+        first = max(0, (since - self.start + MINUTE - 1) // MINUTE)
+        last = min(self.count, first + min(limit, self.page_cap))
+        with self.lock:
+            self.in_flight -= 1
+        return [[self.start + i * MINUTE, 1.0, 2.0, 0.5, float(i), 1.0] for i in range(first, last)]
+
+class TestBulkHistory(unittest.TestCase):
+
+    def test_split_windows(self):
+        self.assertEqual(split_windows(0, 2500 * MINUTE, '1m', 1000),
+                         [(0, 1000 * MINUTE), (1000 * MINUTE, 2000 * MINUTE), (2000 * MINUTE, 2500 * MINUTE)])
+
+    def test_loads_full_range_despite_page_cap(self):
+        exchange = FakeExchange(start=1_700_000_000_000, count=5000)
+        history = load_history_many(exchange, ['BTC/USDT', 'ETH/USDT'], '1m', exchange.start,
+                                    page_size=1000, max_in_flight=4, rate=300)
+        for data in history.values():
+            self.assertEqual(len(data), 5000)
+            self.assertTrue((np.diff(data[:, 0]) == MINUTE).all())
+        self.assertLessEqual(exchange.max_in_flight, 4)
+
+    def test_rate_limiter_spaces_requests(self):
+        limiter = RateLimiter(rate=200, burst=1)
+        start = time.monotonic()
+        for _ in range(21):
+            limiter.acquire()
+        self.assertGreaterEqual(time.monotonic() - start, 0.09)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+import numpy as np
+import pandas as pd
+from candle_arrays import Candles, fetch_candles
+
+
+def ccxt_rows(n, start=1_700_000_000_000):
+    return [[start + i * 3_600_000, 100.0 + i, 101.0 + i, 99.0 + i, 100.5 + i, 10.0 + i] for i in range(n)]
+
+
+class TestCandleArrays(unittest.TestCase):
+
+    def test_from_ccxt_columns(self):
+        candles = Candles.from_ccxt(ccxt_rows(5))
+        self.assertEqual(len(candles), 5)
+        self.assertEqual(candles.timestamp.dtype, np.int64)
+        self.assertEqual(candles.timestamp[1], 1_700_000_000_000 + 3_600_000)
+        np.testing.assert_allclose(candles.close, [100.5, 101.5, 102.5, 103.5, 104.5])
+        self.assertTrue(candles.values.flags.c_contiguous)
+        tail = candles.tail(2)
+        self.assertTrue(np.shares_memory(tail.close, candles.values))
+        np.testing.assert_allclose(tail.high, [104.0, 105.0])
+
+    def test_to_pandas_is_zero_copy(self):
+        candles = Candles.from_ccxt(ccxt_rows(50), dtype=np.float64)
+        df = candles.to_pandas()
+        self.assertEqual(list(df.columns), ['timestamp', 'open', 'high', 'low', 'close', 'volume'])
+        self.assertTrue(np.shares_memory(df['close'].to_numpy(), candles.values))
+        self.assertTrue(np.shares_memory(df['timestamp'].to_numpy(), candles.timestamp))
+        self.assertEqual(df['timestamp'].iloc[0], pd.Timestamp(1_700_000_000_000, unit='ms'))
+
+    def test_memory_against_same_candles_in_a_dataframe(self):
+        rows = ccxt_rows(1000)
+        df = pd.DataFrame(rows, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
+        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+        frame_bytes = df.memory_usage(deep=True).sum()
+        # float32 prices: 28 bytes per candle against 48 plus the index
+        self.assertGreaterEqual(frame_bytes / Candles.from_ccxt(rows).nbytes, 1.6)
+        # float64, as the live windows hold them: same size, and to_pandas adds no copy
+        candles = Candles.from_ccxt(rows, dtype=np.float64)
+        self.assertLessEqual(candles.nbytes, frame_bytes)
+        self.assertTrue(np.shares_memory(candles.to_pandas()['open'].to_numpy(), candles.values))
+
+    def test_fetch_candles(self):
+        class Exchange:
+            def fetch_ohlcv(self, symbol, timeframe, limit, params):
+                return ccxt_rows(limit)
+
+        candles = fetch_candles(Exchange(), 'BTC/USDT', limit=3)
+        self.assertEqual(len(candles), 3)
+        self.assertEqual(candles.close.dtype, np.float32)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import shutil
+import tempfile
+import tracemalloc
+import unittest
+import numpy as np
+from candle_window import CandleWindow, CandleWindows, refresh_window
+from test_ohlcv_store import HOUR, FakeExchange, make_candles
+
+class TestCandleWindow(unittest.TestCase):
+
+    def test_forming_candle_updates_in_place_and_rolls_on_close(self):
+        window = CandleWindow(capacity=3)
+        window.extend(make_candles(0, 2))
+        window.update(HOUR, 2.0, 5.0, 1.0, 4.0, 20.0)
+        self.assertEqual(len(window), 2)
+        self.assertEqual(window.view().close[-1], 4.0)
+        window.extend(make_candles(2 * HOUR, 3))
+        view = window.view()
+        self.assertTrue(window.full)
+        np.testing.assert_array_equal(view.timestamp, [2 * HOUR, 3 * HOUR, 4 * HOUR])
+        np.testing.assert_array_equal(view.close, [1.5, 2.5, 3.5])
+        self.assertFalse(window.update(0, 1.0, 1.0, 1.0, 1.0, 1.0))
+        self.assertFalse(view.close.flags.writeable)
+
+    def test_view_is_ordered_and_shares_memory(self):
+        window = CandleWindow(capacity=4)
+        window.extend(make_candles(0, 10))
+        view = window.view()
+        self.assertTrue(np.shares_memory(view.values, window.values))
+        self.assertTrue((np.diff(view.timestamp) == HOUR).all())
+        df = view.to_pandas()
+        self.assertEqual(df['close'].tolist(), [7.5, 8.5, 9.5, 10.5])
+
+    def test_steady_state_allocates_nothing(self):
+        window = CandleWindow(capacity=250)
+        window.extend(make_candles(0, 300))
+        tracemalloc.start()
+        try:
+            for i in range(300, 5000):
+                window.update(i * HOUR, 1.0, 2.0, 0.5, 1.5, 10.0)
+                window.update(i * HOUR, 1.0, 2.5, 0.5, 1.7, 11.0)
+            current, _ = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.assertLess(current, 4096)
+        self.assertEqual(window.view().close[-1], 1.7)
+
+    def test_refresh_window_from_store(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        exchange = FakeExchange(make_candles(0, 400))
+        window = CandleWindows(capacity=250).get('BTC/USDT', '1h')
+        refresh_window(exchange, window, 'BTC/USDT', '1h', root=root)
+        self.assertEqual(len(window), 250)
+        self.assertEqual(window.last_timestamp, 399 * HOUR)
+        exchange.candles[-1][4] = 99.0
+        exchange.candles += make_candles(400 * HOUR, 2)
+        exchange.now = exchange.candles[-1][0] + HOUR // 2
+        refresh_window(exchange, window, 'BTC/USDT', '1h', root=root)
+        view = window.view()
+        self.assertEqual(view.timestamp[-1], 401 * HOUR)
+        self.assertEqual(view.close[-3], 99.0)
+        self.assertEqual(view.timestamp[0], 152 * HOUR)
+
+if __name__ == '__main__':
+    unittest.main()
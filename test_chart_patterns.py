@@ -0,0 +1,69 @@
+import unittest
+import numpy as np
+import pandas as pd
+from chart_patterns import (PATTERNS, bull_flag, double_top, head_and_shoulders, inverse_head_and_shoulders, scan_patterns,
+                            triple_bottom, triple_top)
+
+# Original per-row loops from Placing Orders.py / Risk Management.py
+def loop_head_and_shoulders(df):
+    pattern = [0] * len(df)
+    for i in range(2, len(df) - 1):
+        if df['high'][i - 2] < df['high'][i - 1] > df['high'][i] and \
+           df['high'][i - 1] > df['high'][i + 1] and \
+           df['low'][i - 2] > df['low'][i - 1] < df['low'][i] and \
+           df['low'][i - 1] < df['low'][i + 1]:
+            pattern[i] = 1
+    return pattern
+
+def loop_double_top(df):
+    pattern = [0] * len(df)
+    for i in range(1, len(df) - 1):
+        if df['high'][i - 1] < df['high'][i] > df['high'][i + 1] and \
+           df['high'][i] == df['high'][i + 1]:
+            pattern[i] = 1
+    return pattern
+
+class TestChartPatterns(unittest.TestCase):
+
+    def test_existing_patterns_unchanged(self):
+        rng = np.random.default_rng(9)
+        df = pd.DataFrame({'high': rng.integers(100, 110, 5000).astype(float),
+                           'low': rng.integers(90, 100, 5000).astype(float)})
+        self.assertEqual(head_and_shoulders(df['high'], df['low']).tolist(), loop_head_and_shoulders(df))
+        self.assertEqual(double_top(df['high']).tolist(), loop_double_top(df))
+        self.assertEqual(head_and_shoulders([1.0, 2.0], [0.5, 1.0]).tolist(), [0, 0])
+
+    def test_triple_top_and_inverse_head_and_shoulders(self):
+        wave = np.array([1, 3, 5, 3, 1], dtype=float)
+        high = np.concatenate([wave + 100, wave + 100, wave + 100.5, [100]])
+        # The third top at bar 12 is only known two bars later
+        self.assertEqual(np.flatnonzero(triple_top(high, order=2)).tolist(), [14])
+        self.assertEqual(triple_top(high[:14], order=2).sum(), 0)
+        low = np.concatenate([100 - wave, 98 - wave, 100 - wave, [100]])
+        self.assertEqual(np.flatnonzero(inverse_head_and_shoulders(low + 1, low, order=2)).tolist(), [14])
+
+    def test_swing_patterns_do_not_look_ahead(self):
+        rng = np.random.default_rng(4)
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, 3000)))
+        high, low = close * 1.005, close * 0.995
+        for detect in (triple_top, triple_bottom, inverse_head_and_shoulders):
+            full = detect(high, low, tolerance=0.05)
+            self.assertGreater(full.sum(), 0)
+            for end in range(1000, 3000, 97):
+                self.assertEqual(detect(high[:end], low[:end], tolerance=0.05).tolist(), full[:end].tolist())
+
+    def test_bull_flag(self):
+        close = np.concatenate([np.linspace(100, 120, 11), [119.8, 119.6, 119.7, 119.5, 119.4]])
+        hits = bull_flag(close + 0.1, close - 0.1, close, pole=10, flag=5)
+        self.assertEqual(np.flatnonzero(hits).tolist(), [15])
+
+    def test_scan_runs_every_registered_pattern(self):
+        rng = np.random.default_rng(2)
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, 10_000)))
+        results = scan_patterns(close * 1.005, close * 0.995, close)
+        self.assertEqual(set(results), set(PATTERNS))
+        for values in results.values():
+            self.assertEqual(len(values), len(close))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+from unittest.mock import MagicMock
+from clock_service import ClockService, exchange_time_source, install_clock
+
+# Local clock we can move by hand
+class FakeClock:
+
+    def __init__(self, start_ms):
+        self.now_ns = int(start_ms * 1e6)
+
+    def __call__(self):
+        return self.now_ns
+
+    def advance(self, ms):
+        self.now_ns += int(ms * 1e6)
+
+class TestClockService(unittest.TestCase):
+
+    def setUp(self):
+        self.local = FakeClock(1_717_838_559_373)
+        self.start_ms = self.local() / 1e6
+        # Server is 270 s ahead (as in the README logs) and drifts 5 ms per hour
+        self.skew, self.drift = 270_070.0, 5 / 3.6e6
+        self.server = lambda: self.local() / 1e6 + self.skew + self.drift * (self.local() / 1e6 - self.start_ms)
+        self.clock = ClockService([lambda local_ms: (local_ms(), self.server())], local_clock=self.local)
+
+    def tearDown(self):
+        self.clock.close()
+
+    def test_fits_offset_and_drift(self):
+        for _ in range(10):
+            self.clock.sample()
+            self.local.advance(60_000)
+        self.assertAlmostEqual(self.clock.offset_ms(), self.server() - self.local() / 1e6, places=3)
+        self.assertLessEqual(abs(self.clock.milliseconds() - self.server()), 1)
+
+    def test_prefers_the_first_source_and_never_mixes_them(self):
+        failing = [True]
+
+        def exchange_source(local_ms):
+            if failing[0]:
+                raise TimeoutError('exchange unreachable')
+            return local_ms(), self.server()
+
+        # NTP agrees with the local clock; the exchange is 270 s ahead of both
+        clock = ClockService([exchange_source, lambda local_ms: (local_ms(), local_ms())], local_clock=self.local)
+        try:
+            with self.assertLogs(level='WARNING'):
+                clock.sample()
+            self.assertAlmostEqual(clock.offset_ms(), 0.0, places=3)
+            failing[0] = False
+            for _ in range(5):
+                self.local.advance(60_000)
+                clock.sample()
+            self.assertAlmostEqual(clock.offset_ms(), self.server() - self.local() / 1e6, places=3)
+            self.assertEqual(clock.state[4], 5)
+        finally:
+            clock.close()
+
+    def test_readers_share_the_published_fit(self):
+        self.clock.sample()
+        reader = ClockService.attach(self.clock.name, local_clock=self.local)
+        try:
+            self.assertEqual(reader.milliseconds(), self.clock.milliseconds())
+        finally:
+            reader.close()
+
+    def test_writer_stuck_mid_publish_falls_back_to_local_clock(self):
+        self.clock.sample()
+        # Leave the sequence counter odd, as a writer killed mid-publish would
+        self.clock.state[0] += 1
+        with self.assertLogs(level='WARNING'):
+            self.assertEqual(self.clock.milliseconds(), int(self.local() / 1e6))
+        self.clock.state[0] += 1
+        self.assertAlmostEqual(self.clock.offset_ms(), self.skew, places=3)
+
+    def test_exchange_source_and_nonce(self):
+        exchange = MagicMock()
+        exchange.fetch_time.side_effect = lambda: int(self.server())
+        clock = ClockService([exchange_time_source(exchange)], local_clock=self.local)
+        try:
+            clock.sample()
+            install_clock(exchange, clock)
+            self.assertLessEqual(abs(exchange.nonce() - self.server()), 1)
+        finally:
+            clock.close()
+
+if __name__ == '__main__':
+    unittest.main()
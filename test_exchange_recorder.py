@@ -0,0 +1,87 @@
+import os
+import shutil
+import tempfile
+import unittest
+import ccxt
+import numpy as np
+from exchange_recorder import RecordingExchange, ReplayExchange, ReplayMismatch, read_log
+from simulated_exchange import SimulatedExchange, synthetic_candles
+
+# A small bot cycle: fetch candles, decide on an SMA crossover, place an order, then hit
+# the recvWindow timestamp error from the README
+def session(exchange):
+    decisions = []
+    for _ in range(3):
+        rows = exchange.fetch_ohlcv('BTC/USDT', '1h', limit=60, params={'timestamp': exchange.milliseconds()})
+        close = np.array([r[4] for r in rows])
+        decisions.append(close[-10:].mean() > close[-50:].mean())
+        if decisions[-1]:
+            order = exchange.create_order('BTC/USDT', 'market', 'buy', 0.01)
+            decisions.append(exchange.fetch_order(order['id'], 'BTC/USDT')['status'])
+    try:
+        exchange.fetch_ticker('BTC/USDT', params={'timestamp': exchange.milliseconds() - 10_000_000})
+    except ccxt.InvalidNonce as e:
+        decisions.append(str(e))
+    return decisions
+
+class TestExchangeRecorder(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.path = os.path.join(self.root, 'session.tbx')
+
+    def record(self):
+        simulated = SimulatedExchange({('BTC/USDT', '1h'): synthetic_candles(500)})
+        recorder = RecordingExchange(simulated, self.path)
+        decisions = session(recorder)
+        self.assertEqual(recorder.id, 'bybit')
+        recorder.close()
+        return decisions
+
+    def test_replay_reproduces_decisions(self):
+        decisions = self.record()
+        self.assertTrue(any('10002' in str(d) for d in decisions))
+        replay = ReplayExchange(self.path)
+        self.assertEqual(session(replay), decisions)
+        self.assertEqual(replay.remaining(), {})
+
+    def test_log_contents_and_compression(self):
+        self.record()
+        records = list(read_log(self.path))
+        self.assertEqual(records[0].method, 'milliseconds')
+        ohlcv = [r for r in records if r.method == 'fetch_ohlcv']
+        self.assertEqual(len(ohlcv), 3)
+        self.assertEqual(len(ohlcv[0].result), 60)
+        self.assertEqual(records[-1].error[0], 'InvalidNonce')
+        self.assertTrue(all(r.duration_ns >= 0 for r in records))
+        # 3 pages of 60 candles as JSON would be ~20 KB
+        self.assertLess(os.path.getsize(self.path), 12_000)
+
+    def test_strict_replay_detects_changed_requests_and_torn_tail(self):
+        self.record()
+        with open(self.path, 'ab') as f:
+            f.write(b'\x10\x00')
+        replay = ReplayExchange(self.path)
+        replay.milliseconds()
+        with self.assertRaises(ReplayMismatch):
+            replay.fetch_ohlcv('BTC/USDT', '1h', limit=100)
+
+    def test_records_are_on_disk_before_close(self):
+        recorder = RecordingExchange(SimulatedExchange({('BTC/USDT', '1h'): synthetic_candles(100)}), self.path)
+        self.addCleanup(recorder.close)
+        recorder.fetch_ohlcv('BTC/USDT', '1h', limit=10)
+        self.assertEqual([r.method for r in read_log(self.path)], ['fetch_ohlcv'])
+
+    def test_concurrent_legs_replay_in_either_order(self):
+        recorder = RecordingExchange(SimulatedExchange({('BTC/USDT', '1h'): synthetic_candles(100)}), self.path)
+        stop = recorder.create_order('BTC/USDT', 'stop', 'sell', 0.01, 25000.0)
+        target = recorder.create_order('BTC/USDT', 'limit', 'sell', 0.01, 35000.0)
+        recorder.close()
+        replay = ReplayExchange(self.path)
+        self.assertEqual(replay.create_order('BTC/USDT', 'limit', 'sell', 0.01, 35000.0)['id'], target['id'])
+        self.assertEqual(replay.create_order('BTC/USDT', 'stop', 'sell', 0.01, 25000.0)['id'], stop['id'])
+        self.assertEqual(replay.remaining(), {})
+
+if __name__ == '__main__':
+    unittest.main()
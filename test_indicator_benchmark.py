@@ -0,0 +1,30 @@
+import os
+import tempfile
+import unittest
+from indicator_benchmark import check_regressions, load_results, run_suite, save_results
+
+class TestIndicatorBenchmark(unittest.TestCase):
+
+    def test_suite_times_and_compares_backends(self):
+        timings, diffs = run_suite(sizes=[1_000, 5_000], backends=['ta', 'pandas'], repeats=1)
+        self.assertEqual(set(timings['backend']), {'ta', 'pandas'})
+        self.assertTrue((timings['seconds'] > 0).all())
+        sma = diffs[(diffs['indicator'] == 'SMA') & (diffs['size'] == 5_000)].iloc[0]
+        self.assertLess(sma['max_rel_diff'], 1e-9)
+        self.assertEqual(sma['nan_mismatch'], 0)
+        # ta's RSI is Wilder-smoothed, the hand-written one uses a plain rolling mean
+        rsi = diffs[(diffs['indicator'] == 'RSI') & (diffs['size'] == 5_000)].iloc[0]
+        self.assertGreater(rsi['max_abs_diff'], 0.1)
+
+    def test_results_round_trip_and_regressions(self):
+        timings, diffs = run_suite(sizes=[1_000], backends=['pandas'], indicators=['SMA'], repeats=1)
+        path = os.path.join(tempfile.mkdtemp(), 'results.jsonl')
+        first = save_results(timings, diffs, path)
+        timings['seconds'] *= 2
+        second = save_results(timings, diffs, path)
+        self.assertEqual(len(load_results(path)), 2)
+        self.assertEqual(len(check_regressions(first, second)), 1)
+        self.assertEqual(check_regressions(second, first), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+import numpy as np
+import pandas as pd
+from indicator_registry import PANDAS_TA_COLUMNS, TA_COLUMNS, IndicatorRegistry, add_indicator_columns
+from test_streaming_indicators import pandas_ta_ema, pandas_ta_psar, pandas_ta_rsi
+
+class TestIndicatorRegistry(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(4)
+        self.close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, 5000)))
+        self.registry = IndicatorRegistry()
+
+    def test_same_request_returns_cached_array(self):
+        first = self.registry.get('SMA', self.close, length=200)
+        second = self.registry.get('SMA', self.close.copy(), length=200)
+        self.assertIs(first, second)
+        self.assertFalse(first.flags.writeable)
+        self.assertEqual(self.registry.stats()['hits'], 1)
+        changed = self.close.copy()
+        changed[-1] += 1
+        self.assertIsNot(self.registry.get('SMA', changed, length=200), first)
+
+    def test_matches_hand_written_calculate_indicators(self):
+        df = add_indicator_columns(pd.DataFrame({'close': self.close}), self.registry)
+        close = pd.Series(self.close)
+        ema_12, ema_26 = close.ewm(span=12, adjust=False).mean(), close.ewm(span=26, adjust=False).mean()
+        macd = ema_12 - ema_26
+        np.testing.assert_array_equal(df['SMA_200'], close.rolling(window=200).mean())
+        np.testing.assert_array_equal(df['MACD'], macd)
+        np.testing.assert_array_equal(df['MACD_signal'], macd.ewm(span=9, adjust=False).mean())
+        # MACD reused the cached EMAs and the signal line reused the cached MACD
+        self.assertEqual(self.registry.stats()['hits'], 3)
+
+    def test_library_column_sets(self):
+        close = pd.Series(self.close)
+        df = pd.DataFrame({'high': close * 1.005, 'low': close * 0.995, 'close': close})
+        bot = add_indicator_columns(df.copy(), self.registry, PANDAS_TA_COLUMNS)
+        macd = pandas_ta_ema(close, 12) - pandas_ta_ema(close, 26)
+        np.testing.assert_allclose(bot['EMA26'], pandas_ta_ema(close, 26), rtol=1e-12)
+        np.testing.assert_allclose(bot['MACD'], macd, rtol=1e-12)
+        np.testing.assert_allclose(bot['MACD_signal'], pandas_ta_ema(macd.loc[macd.first_valid_index():], 9).reindex(macd.index),
+                                   rtol=1e-12)
+        np.testing.assert_allclose(bot['RSI'], pandas_ta_rsi(close, 14), rtol=1e-12)
+        np.testing.assert_allclose(bot['SAR'], pandas_ta_psar(df['high'], df['low'], close), rtol=1e-12)
+        # The ta library leaves the EMA warm-up empty; past it the values agree
+        import ta
+        backtest = add_indicator_columns(df.copy(), self.registry, TA_COLUMNS)
+        np.testing.assert_array_equal(backtest['SMA_50'], ta.trend.sma_indicator(close, window=50))
+        np.testing.assert_allclose(backtest['RSI'], ta.momentum.rsi(close, window=14), rtol=1e-12)
+        for column, reference in (('MACD', ta.trend.macd(close)), ('MACD_diff', ta.trend.macd_diff(close))):
+            np.testing.assert_allclose(backtest[column][300:], reference[300:], rtol=1e-8, atol=1e-10)
+
+    def test_lru_eviction_respects_memory_budget(self):
+        registry = IndicatorRegistry(memory_budget=self.close.nbytes * 2)
+        for length in (10, 20, 30):
+            registry.get('SMA', self.close, key='close', length=length)
+        self.assertEqual(registry.stats()['entries'], 2)
+        self.assertEqual(registry.stats()['evictions'], 1)
+        registry.get('SMA', self.close, key='close', length=20)
+        self.assertEqual(registry.stats()['hits'], 1)
+
+if __name__ == '__main__':
+    unittest.main()
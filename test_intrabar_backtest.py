@@ -0,0 +1,58 @@
+import time
+import unittest
+import numpy as np
+from intrabar_backtest import STOP_LOSS, TAKE_PROFIT, SIGNAL, backtest_brackets
+
+class TestIntrabarBacktest(unittest.TestCase):
+
+    def bars(self, rows):
+        rows = np.array(rows, dtype=float)
+        return rows[:, 0], rows[:, 1], rows[:, 2], rows[:, 3]
+
+    def test_stop_hit_intrabar_although_close_recovers(self):
+        o, h, l, c = self.bars([[100, 100, 100, 100], [100, 101, 94, 99], [99, 100, 98, 99]])
+        result = backtest_brackets(o, h, l, c, ['buy', 'hold', 'hold'])
+        trade = result['trades'][0]
+        self.assertEqual((trade['exit_index'], trade['exit_reason']), (1, STOP_LOSS))
+        self.assertAlmostEqual(trade['exit_price'], 95.0)
+        self.assertAlmostEqual(result['equity'][-1], 995.0)
+
+    def test_fill_rules_for_bars_touching_both_levels(self):
+        o, h, l, c = self.bars([[100, 100, 100, 100], [104, 111, 94, 100]])
+        signal = ['buy', 'hold']
+        self.assertEqual(backtest_brackets(o, h, l, c, signal)['trades'][0]['exit_reason'], STOP_LOSS)
+        self.assertEqual(backtest_brackets(o, h, l, c, signal, fill_rule='target_first')['trades'][0]['exit_reason'], TAKE_PROFIT)
+        self.assertEqual(backtest_brackets(o, h, l, c, signal, fill_rule='nearest_open')['trades'][0]['exit_reason'], TAKE_PROFIT)
+        # Lower-timeframe candles show the target traded first
+        lower = (np.array([60, 120]), np.array([111.0, 100.0]), np.array([103.0, 94.0]))
+        result = backtest_brackets(o, h, l, c, signal, lower=lower, timestamps=np.array([0, 60]), timeframe_ms=120)
+        self.assertEqual(result['trades'][0]['exit_reason'], TAKE_PROFIT)
+
+    def test_gap_partial_fill_fees_and_signal_exit(self):
+        o, h, l, c = self.bars([[100, 100, 100, 100], [101, 110.5, 100, 105], [105, 106, 104, 104],
+                                [90, 91, 89, 90]])
+        result = backtest_brackets(o, h, l, c, ['buy', 'hold', 'hold', 'hold'], touch_fill_ratio=0.5, through=0.01,
+                                   maker_fee=0.001, taker_fee=0.002)
+        fills = result['fills']
+        self.assertEqual(fills['reason'].tolist(), [0, TAKE_PROFIT, STOP_LOSS])
+        self.assertEqual(fills['qty'].tolist(), [1.0, -0.5, -0.5])
+        self.assertEqual(fills['price'][2], 90.0)
+        trade = result['trades'][0]
+        self.assertAlmostEqual(trade['fees'], 0.2 + 0.055 + 0.09)
+        self.assertAlmostEqual(result['equity'][-1], 1000 + trade['pnl'])
+        o, h, l, c = self.bars([[100, 100, 100, 100], [100, 101, 99, 100]])
+        self.assertEqual(backtest_brackets(o, h, l, c, ['buy', 'sell'])['trades'][0]['exit_reason'], SIGNAL)
+
+    def test_tens_of_millions_of_bars(self):
+        n = 20_000_000
+        rng = np.random.default_rng(0)
+        close = 100 + np.cumsum(rng.normal(0, 0.01, n)).clip(-50, 50)
+        codes = np.zeros(n, dtype=np.int8)
+        codes[rng.integers(0, n, 2000)] = 1
+        start = time.perf_counter()
+        result = backtest_brackets(close, close + 0.05, close - 0.05, close, codes, stop_loss=0.01, take_profit=0.01)
+        self.assertLess(time.perf_counter() - start, 10.0)
+        self.assertGreater(len(result['trades']), 100)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import asyncio
+import time
+import unittest
+from unittest.mock import patch
+import numpy as np
+from live_engine import LiveEngine, next_close_ms
+from signal_rules import compile_strategy
+from streaming_indicators import IndicatorSet
+
+# Async stand-in for ccxt.async_support.bybit serving 1s candles up to the current time
+class FakeAsyncExchange:
+
+    def __init__(self):
+        self.calls = 0
+
+    def milliseconds(self):
+        return int(time.time() * 1000)
+
+    async def fetch_ohlcv(self, symbol, timeframe='1s', since=None, limit=None):
+        self.calls += 1
+        await asyncio.sleep(0.005)
+        now = self.milliseconds() // 1000 * 1000
+        start = since if since is not None else now - (limit - 1) * 1000
+        return [[t, 100.0, 101.0 + (t // 1000) % 7, 99.0, 100.0 + (t // 1000) % 5, 1.0]
+                for t in range(start, now + 1, 1000)]
+
+# History requests (the warm-up) always fail
+class NoHistoryExchange(FakeAsyncExchange):
+
+    async def fetch_ohlcv(self, symbol, timeframe='1s', since=None, limit=None):
+        if since is None:
+            self.calls += 1
+            raise TimeoutError('request timed out')
+        return await super().fetch_ohlcv(symbol, timeframe, since, limit)
+
+class TestLiveEngine(unittest.TestCase):
+
+    def test_next_close(self):
+        self.assertEqual(next_close_ms(3_600_000 * 5 + 1, '1h'), 3_600_000 * 6)
+        self.assertEqual(next_close_ms(60_000, '1m'), 120_000)
+
+    def test_decides_on_each_closed_candle_for_every_symbol(self):
+        exchange = FakeAsyncExchange()
+        decisions = []
+        symbols = [f'COIN{i}/USDT' for i in range(20)]
+        engine = LiveEngine(exchange, [(s, '1s') for s in symbols], settle_delay=0.05,
+                            on_decision=lambda symbol, tf, candle, values, signal: decisions.append((symbol, candle[0])),
+                            clock=exchange.milliseconds)
+        asyncio.run(engine.run(duration=2.6))
+        self.assertEqual({s for s, _ in decisions}, set(symbols))
+        for symbol in symbols:
+            stamps = [t for s, t in decisions if s == symbol]
+            self.assertEqual(len(stamps), len(set(stamps)))
+            self.assertGreaterEqual(len(stamps), 2)
+        report = engine.latency_report()
+        self.assertEqual(len(report), len(symbols))
+        self.assertTrue(all(0 <= r['p50'] < 500 for r in report.values()))
+
+    def test_failed_warm_up_never_decides_on_old_bars(self):
+        exchange = NoHistoryExchange()
+        decisions = []
+        engine = LiveEngine(exchange, [('BTC/USDT', '1s')], settle_delay=0.05, warmup_retries=2, warmup_backoff=0.01,
+                            on_decision=lambda symbol, tf, candle, values, signal: decisions.append(candle[0]),
+                            clock=exchange.milliseconds)
+        started = exchange.milliseconds()
+        asyncio.run(engine.run(duration=2.6))
+        self.assertGreaterEqual(exchange.calls, 3 + 2)
+        self.assertGreaterEqual(len(decisions), 2)
+        self.assertGreaterEqual(min(decisions), started // 1000 * 1000)
+        self.assertEqual(len(decisions), len(set(decisions)))
+
+    def test_rules_with_lookback_match_batch_signals(self):
+        rules = {'buy': 'crosses_above(close, SMA50) and RSI[2] < 60', 'sell': 'crosses_below(close, SMA50)'}
+        engine = LiveEngine(FakeAsyncExchange(), [('BTC/USDT', '1m')], rules=rules, clock=lambda: 10**13)
+        self.assertEqual(engine.history_length, 3)
+        engine._subscribe(('BTC/USDT', '1m'))
+        rng = np.random.default_rng(0)
+        close = 100 + np.cumsum(rng.normal(0, 1, 400))
+        candles = [[i * 60_000, c, c + 1, c - 1, c, 1.0] for i, c in enumerate(close)]
+        live = [asyncio.run(engine._decide('BTC/USDT', '1m', candle)) for candle in candles]
+        indicators = IndicatorSet()
+        columns = [dict(indicators.update(c + 1, c - 1, c), close=c) for c in close]
+        batch = compile_strategy(rules)({k: np.array([row[k] for row in columns]) for k in ('close', 'SMA50', 'RSI')})
+        self.assertEqual(live, list(batch))
+        self.assertIn('buy', live)
+        self.assertIn('sell', live)
+
+    def test_rejects_unusable_rules_and_defaults_to_shared_clock(self):
+        with self.assertRaises(ValueError):
+            LiveEngine(FakeAsyncExchange(), [], rules={'buy': 'highest(close, RSI) > 1', 'sell': 'close < 1'})
+        with self.assertRaises(ValueError):
+            LiveEngine(FakeAsyncExchange(), [], rules={'buy': 'ADX > 25', 'sell': 'close < 1'})
+
+        class Clock:
+            def milliseconds(self):
+                return 42
+
+        exchange = FakeAsyncExchange()
+        engine = LiveEngine(exchange, [])
+        with patch('live_engine.shared_clock', return_value=Clock()) as shared:
+            asyncio.run(engine.run(duration=0))
+        shared.assert_called_once_with(exchange)
+        self.assertEqual(engine.clock(), 42)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from live_engine import LiveEngine
+from market_feed import (BOOK, CANDLE, TRADE, FeedEvent, MarketFeed, ReplayFeed, StandInServer, WebSocketFeed,
+                         candle_events, write_events)
+
+SECOND = 1000
+
+def make_candles(count, step=SECOND):
+    return [[i * step, 100.0, 101.0 + i % 7, 99.0, 100.0 + i % 5, 1.0] for i in range(count)]
+
+class TestMarketFeed(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.path = os.path.join(self.root, 'events.jsonl')
+
+    def test_feeds_must_implement_events(self):
+        with self.assertRaises(TypeError):
+            MarketFeed()
+
+    def test_websocket_feed_from_stand_in_server(self):
+        events = [FeedEvent(TRADE, 'BTC/USDT', 1000, {'price': 100.5, 'amount': 0.25, 'side': 'buy'}),
+                  FeedEvent(CANDLE, 'BTC/USDT', 1500, {'timeframe': '1m', 'closed': False,
+                                                       'ohlcv': [0, 100.0, 101.0, 99.0, 100.5, 3.0]}),
+                  FeedEvent(BOOK, 'BTC/USDT', 2000, {'type': 'delta', 'seq': 7, 'bids': [[100.0, 1.0]], 'asks': []}),
+                  FeedEvent(TRADE, 'ETH/USDT', 2500, {'price': 10.0, 'amount': 1.0, 'side': 'sell'})]
+
+        async def main():
+            server = await StandInServer().start()
+            host, port = server.address
+            self.assertGreater(port, 0)
+            self.assertEqual(server.url, f'ws://{host}:{port}/v5/public/spot')
+            feed = WebSocketFeed(['BTC/USDT'], url=server.url)
+            subscription = feed.subscribe()
+            pump = asyncio.create_task(feed.run())
+            await server.wait_for_subscriber()
+            for event in events:
+                await server.publish(event)
+            received = []
+            async for event in subscription:
+                received.append(event)
+                if len(received) == 3:
+                    feed.stop()
+            await pump
+            await server.stop()
+            return received
+
+        self.assertEqual(asyncio.run(main()), events[:3])
+
+    def test_replay_speed(self):
+        write_events(self.path, candle_events(make_candles(11), 'BTC/USDT', '1s'))
+
+        async def replay(speed):
+            feed = ReplayFeed(self.path, speed=speed)
+            subscription = feed.subscribe(kinds=[CANDLE])
+            pump = asyncio.create_task(feed.run())
+            start = time.monotonic()
+            received = [event async for event in subscription]
+            await pump
+            return received, time.monotonic() - start, feed
+
+        received, elapsed, feed = asyncio.run(replay(20))
+        self.assertEqual(len(received), 11)
+        self.assertGreaterEqual(elapsed, 0.45)
+        self.assertEqual(feed.clock(), 11 * SECOND)
+        _, elapsed, _ = asyncio.run(replay(None))
+        self.assertLess(elapsed, 0.2)
+
+    def test_live_engine_stress_at_1000x(self):
+        symbols = ['BTC/USDT', 'ETH/USDT']
+        events = sorted((e for s in symbols for e in candle_events(make_candles(1000), s, '1s')),
+                        key=lambda e: e.timestamp)
+        write_events(self.path, events)
+        feed = ReplayFeed(self.path, speed=1000)
+        decisions = []
+        engine = LiveEngine(None, [(s, '1s') for s in symbols], clock=feed.clock,
+                            on_decision=lambda symbol, tf, candle, values, signal: decisions.append((symbol, candle[0])))
+        start = time.monotonic()
+        asyncio.run(engine.run_feed(feed))
+        self.assertLess(time.monotonic() - start, 3.0)
+        self.assertEqual(len(decisions), 2000)
+        self.assertEqual(len(set(decisions)), 2000)
+        report = engine.latency_report()
+        # Decisions keep up with the replayed clock: most are made within one replayed bar
+        self.assertTrue(all(r['p50'] <= 1000 for r in report.values()))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from ohlcv_store import fetch_ohlcv_cached, partition_dir, read_candles, update_candles
+
+HOUR = 3_600_000
+
+class FakeExchange:
+
+    def __init__(self, candles):
+        self.candles = candles
+        self.now = candles[-1][0] + HOUR // 2
+        self.calls = []
+
+    def milliseconds(self):
+        return self.now
+
+    def fetch_ohlcv(self, symbol, timeframe='1h', since=None, limit=None, params=None):
+        self.calls.append((since, limit))
+        rows = [c for c in self.candles if since is None or c[0] >= since]
+        return rows[-limit:] if since is None else rows[:200]
+
+def make_candles(start, count):
+    return [[start + i * HOUR, 1.0 + i, 2.0 + i, 0.5 + i, 1.5 + i, 10.0] for i in range(count)]
+
+class TestOhlcvStore(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+
+    def test_initial_fetch_then_top_up(self):
+        exchange = FakeExchange(make_candles(0, 150))
+        df = fetch_ohlcv_cached(exchange, 'BTC/USDT', '1h', 100, root=self.root)
+        self.assertEqual(len(df), 100)
+        self.assertEqual(exchange.calls, [(None, 100)])
+
+        # The forming candle changes and three new candles close
+        exchange.candles[-1][4] = 99.0
+        exchange.candles += make_candles(150 * HOUR, 3)
+        exchange.now = exchange.candles[-1][0] + HOUR // 2
+        self.assertEqual(update_candles(exchange, 'BTC/USDT', '1h', 100, root=self.root), 3)
+        self.assertEqual(exchange.calls[-1], (149 * HOUR, None))
+
+        candles = read_candles(self.root, 'BTC/USDT', '1h')
+        self.assertIsInstance(candles['close'], np.memmap)
+        self.assertEqual(len(candles['timestamp']), 103)
+        self.assertEqual(candles['close'][99], 99.0)
+        self.assertTrue((np.diff(candles['timestamp']) == HOUR).all())
+        # The frame returned before the update still sees the candles it was built from
+        self.assertEqual(len(df), 100)
+        self.assertEqual(df['close'].iloc[-1], 150.5)
+        self.assertEqual(df['timestamp'].iloc[-1].value // 1_000_000, 149 * HOUR)
+
+    def test_interrupted_append_is_repaired(self):
+        exchange = FakeExchange(make_candles(0, 100))
+        update_candles(exchange, 'BTC/USDT', '1h', 100, root=self.root)
+        close = read_candles(self.root, 'BTC/USDT', '1h')['close']
+        with open(os.path.join(partition_dir(self.root, 'BTC/USDT', '1h'), 'close.bin'), 'ab') as f:
+            f.write(b'\x01\x02\x03')
+        exchange.candles += make_candles(100 * HOUR, 2)
+        exchange.now = exchange.candles[-1][0] + HOUR // 2
+        self.assertEqual(update_candles(exchange, 'BTC/USDT', '1h', 100, root=self.root), 2)
+        self.assertEqual(list(read_candles(self.root, 'BTC/USDT', '1h')['close'][-3:]), [100.5, 1.5, 2.5])
+        self.assertEqual(close[-1], 100.5)
+
+    def test_paginates_large_gaps(self):
+        exchange = FakeExchange(make_candles(0, 100))
+        update_candles(exchange, 'ETH/USDT', '1h', 100, root=self.root)
+        exchange.candles += make_candles(100 * HOUR, 500)
+        exchange.now = exchange.candles[-1][0] + HOUR // 2
+        self.assertEqual(update_candles(exchange, 'ETH/USDT', '1h', 100, root=self.root), 500)
+        self.assertEqual(len(read_candles(self.root, 'ETH/USDT', '1h')['close']), 600)
+
+if __name__ == '__main__':
+    unittest.main()
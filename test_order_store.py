@@ -0,0 +1,157 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from bracket_orders import place_bracket_order
+from order_store import OrderStore
+from simulated_exchange import SimulatedExchange, synthetic_candles
+
+def limit_order(i, symbol='BTC/USDT'):
+    return {'id': str(i), 'symbol': symbol, 'type': 'limit', 'side': 'sell', 'amount': 0.01,
+            'price': 40000.0 + i, 'status': 'open', 'filled': 0.0, 'info': {'raw': 'dropped'}}
+
+# Bybit's create_order response carries only the order id: no status, price or fill
+class BybitLikeExchange(SimulatedExchange):
+
+    def create_order(self, symbol, type, side, amount, price=None, params=None):
+        order = super().create_order(symbol, type, side, amount, price, params)
+        return dict(order, status=None, price=None, average=None, filled=None, remaining=None)
+
+# Reports the positions it holds; none are left once a native stop has fired
+class PositionsExchange(SimulatedExchange):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.has['fetchPositions'] = True
+        self.held = []
+
+    def fetch_positions(self, symbols=None, params=None):
+        self._request('fetch_positions', params)
+        return [dict(p) for p in self.held if symbols is None or p['symbol'] in symbols]
+
+class TestOrderStore(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+
+    def test_indexes_and_bracket(self):
+        store = OrderStore(self.root)
+        bracket = {'id': 1, 'symbol': 'BTC/USDT', 'side': 'buy', 'amount': 0.5, 'price': 100.0,
+                   'stop_loss_price': 95.0, 'take_profit_price': 110.0,
+                   'entry': {'id': 'e1', 'symbol': 'BTC/USDT', 'status': 'closed'},
+                   'stop_loss': {'id': 's1', 'symbol': 'BTC/USDT', 'status': 'open'},
+                   'take_profit': {'id': 't1', 'symbol': 'BTC/USDT', 'status': 'open'}}
+        group = store.add_bracket(bracket)
+        store.add_order(limit_order(7, 'ETH/USDT'))
+        self.assertEqual(group, 'e1')
+        self.assertEqual({o['id'] for o in store.bracket_orders(group)}, {'s1', 't1'})
+        self.assertEqual([o['id'] for o in store.open_orders('ETH/USDT')], ['7'])
+        self.assertNotIn('info', store.get('7'))
+        self.assertEqual(store.position('BTC/USDT'), 0.5)
+        store.apply_fill('BTC/USDT', 0.5, 110.0)
+        self.assertAlmostEqual(store.positions['BTC/USDT']['price'], 105.0)
+        store.update_order('s1', status='canceled')
+        store.close_bracket(group)
+        self.assertEqual(store.bracket_orders(group), [])
+        self.assertEqual(len(store.open_orders()), 1)
+
+    def test_recover_from_snapshot_and_journal(self):
+        store = OrderStore(self.root, snapshot_every=50)
+        for i in range(120):
+            store.add_order(limit_order(i))
+        store.update_order('5', filled=0.005)
+        store.remove_order('6')
+        store.set_position('BTC/USDT', 1.5, 30000.0)
+        store.close()
+        # A crash mid-write leaves a torn last line
+        with open(store.journal_path, 'a') as f:
+            f.write('{"op":"order","ord')
+        recovered = OrderStore.recover(self.root)
+        self.assertEqual(set(recovered.orders), set(store.orders))
+        self.assertEqual(recovered.get('5')['filled'], 0.005)
+        self.assertEqual(recovered.position('BTC/USDT'), 1.5)
+        self.assertEqual(recovered.seq, store.seq)
+
+    def test_restart_with_thousands_of_orders_reconciles_under_a_second(self):
+        exchange = SimulatedExchange({('BTC/USDT', '1h'): synthetic_candles(10)})
+        store = OrderStore(self.root, snapshot_every=2_000)
+        for i in range(5_000):
+            order = exchange.create_order('BTC/USDT', 'limit', 'sell', 0.01, 40000.0 + i)
+            store.add_order(order, bracket=str(i // 2))
+        store.close()
+        # While the bot was down: two orders cancelled, one placed by hand
+        exchange.cancel_order('1')
+        exchange.cancel_order('2')
+        exchange.create_order('BTC/USDT', 'limit', 'buy', 0.01, 20000.0)
+        start = time.perf_counter()
+        recovered = OrderStore.recover(self.root, exchange)
+        self.assertLess(time.perf_counter() - start, 1.0)
+        self.assertEqual(recovered.last_reconcile['missing'], ['1', '2'])
+        self.assertEqual(recovered.last_reconcile['adopted'], ['5001'])
+        self.assertEqual(len(recovered.open_orders('BTC/USDT')), 4_999)
+        self.assertEqual(exchange.calls.count('fetch_open_orders'), 1)
+        self.assertTrue(os.path.exists(recovered.snapshot_path))
+
+    def test_restart_after_stop_leg_filled_closes_the_position(self):
+        exchange = SimulatedExchange({('BTC/USDT', '1h'): synthetic_candles(10)})
+        store = OrderStore(self.root)
+        group = store.add_bracket(place_bracket_order(exchange, 'BTC/USDT', 'buy', 0.5, 0.05, 0.10))
+        kept = store.add_bracket(place_bracket_order(exchange, 'BTC/USDT', 'buy', 0.25, 0.05, 0.10))
+        stop, target = sorted(store.bracket_orders(group), key=lambda o: o['type'])
+        store.close()
+        self.assertEqual(store.position('BTC/USDT'), 0.75)
+        # While the bot was down the first bracket's stop executed; the second's stop was cancelled by hand
+        exchange.orders[stop['id']].update(status='closed', filled=0.5, remaining=0.0, average=stop['price'])
+        kept_stop = [o for o in store.bracket_orders(kept) if o['type'] == 'stop'][0]
+        exchange.cancel_order(kept_stop['id'])
+        recovered = OrderStore.recover(self.root, exchange)
+        self.assertEqual(recovered.last_reconcile['closed_brackets'], [group])
+        self.assertAlmostEqual(recovered.position('BTC/USDT'), 0.25)
+        self.assertEqual([b['id'] for b in recovered.open_brackets('BTC/USDT')], [kept])
+        self.assertEqual(recovered.bracket_orders(group), [])
+        self.assertEqual(exchange.orders[target['id']]['status'], 'canceled')
+        # The state survives another restart
+        recovered.close()
+        again = OrderStore.recover(self.root)
+        self.assertAlmostEqual(again.position('BTC/USDT'), 0.25)
+        self.assertNotIn(group, again.brackets)
+
+    def test_entry_without_status_is_not_a_leg(self):
+        exchange = BybitLikeExchange({('BTC/USDT', '1h'): synthetic_candles(10)})
+        exchange.has['createOrderWithTakeProfitAndStopLoss'] = False
+        store = OrderStore(self.root)
+        group = store.add_bracket(place_bracket_order(exchange, 'BTC/USDT', 'buy', 0.5, 0.05, 0.10))
+        self.assertNotIn(group, store.orders)
+        self.assertEqual(sorted(o['type'] for o in store.bracket_orders(group)), ['limit', 'stop'])
+        store.close()
+        recovered = OrderStore.recover(self.root, exchange)
+        self.assertEqual(recovered.last_reconcile['closed_brackets'], [])
+        self.assertAlmostEqual(recovered.position('BTC/USDT'), 0.5)
+        self.assertEqual(sorted(o['status'] for o in exchange.orders.values() if o['type'] != 'market'), ['open', 'open'])
+
+    def test_restart_after_native_stop_fired_closes_the_position(self):
+        exchange = PositionsExchange({('BTC/USDT', '1h'): synthetic_candles(10)})
+        store = OrderStore(self.root)
+        first = store.add_bracket(place_bracket_order(exchange, 'BTC/USDT', 'buy', 0.5, 0.05, 0.10,
+                                                      reference_price=100.0))
+        kept = store.add_bracket(place_bracket_order(exchange, 'BTC/USDT', 'buy', 0.25, 0.05, 0.10,
+                                                     reference_price=100.0))
+        self.assertEqual(store.bracket_orders(first), [])
+        store.close()
+        # While the bot was down the first bracket's attached stop fired
+        exchange.held = [{'symbol': 'BTC/USDT', 'side': 'long', 'contracts': 0.25}]
+        recovered = OrderStore.recover(self.root, exchange)
+        self.assertEqual(recovered.last_reconcile['closed_brackets'], [first])
+        self.assertAlmostEqual(recovered.position('BTC/USDT'), 0.25)
+        self.assertEqual([b['id'] for b in recovered.open_brackets('BTC/USDT')], [kept])
+        # Nothing held any more closes the rest
+        recovered.close()
+        exchange.held = []
+        again = OrderStore.recover(self.root, exchange)
+        self.assertEqual(again.last_reconcile['closed_brackets'], [kept])
+        self.assertEqual(again.position('BTC/USDT'), 0.0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+import numpy as np
+import pandas as pd
+from indicator_registry import indicator
+from parameter_sweep import build_grid, crossover_signals, run_sweep, apply_brackets
+from performance_analytics import equity_stats
+from vectorized_backtest import backtest_vectorized
+
+class TestParameterSweep(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(3)
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, 2000)))
+        self.df = pd.DataFrame({'open': close, 'high': close * 1.01, 'low': close * 0.99,
+                                'close': close, 'volume': np.ones_like(close)})
+
+    def test_crossover_matches_trading_strategy_loop(self):
+        close = self.df['close']
+        fast, slow = close.rolling(50).mean(), close.rolling(200).mean()
+        expected = [0]
+        for i in range(1, len(close)):
+            if fast[i] > slow[i] and fast[i-1] <= slow[i-1]:
+                expected.append(1)
+            elif fast[i] < slow[i] and fast[i-1] >= slow[i-1]:
+                expected.append(-1)
+            else:
+                expected.append(0)
+        codes = crossover_signals(indicator('SMA', close, length=50), indicator('SMA', close, length=200))
+        self.assertEqual(codes.tolist(), expected)
+
+    def test_brackets_exit_on_stop_loss(self):
+        close = np.array([100, 100, 94, 96, 100, 100], dtype=float)
+        codes = np.array([0, 1, 0, 0, 1, -1], dtype=np.int8)
+        self.assertEqual(apply_brackets(close, codes, stop_loss=0.05).tolist(), [0, 1, -1, 0, 1, -1])
+
+    def test_run_sweep_ranks_results(self):
+        grid = build_grid(fast_windows=[10, 20], slow_windows=[50, 100], rsi_overbought=[None, 70],
+                          stop_losses=[None, 0.05])
+        results = run_sweep(self.df, grid, processes=2)
+        self.assertEqual(len(results), len(grid))
+        self.assertTrue(results['total_return'].is_monotonic_decreasing)
+
+    def test_sharpe_is_annualized_by_bars_per_year(self):
+        grid = build_grid(fast_windows=[10], slow_windows=[50], periods_per_year=24 * 365)
+        hourly = run_sweep(self.df, grid, processes=1)
+        daily = run_sweep(self.df, build_grid(fast_windows=[10], slow_windows=[50]), processes=1)
+        self.assertNotIn('periods_per_year', hourly.columns)
+        self.assertNotEqual(hourly['sharpe'][0], 0.0)
+        self.assertAlmostEqual(hourly['sharpe'][0] / daily['sharpe'][0], np.sqrt(24))
+        # The same number equity_stats gives for the backtested curve
+        close = self.df['close'].to_numpy()
+        codes = crossover_signals(indicator('SMA', close, length=10), indicator('SMA', close, length=50))
+        equity = np.concatenate(([1000.0], backtest_vectorized(close, codes, 1000)['equity']))
+        self.assertAlmostEqual(hourly['sharpe'][0], equity_stats(equity, periods_per_year=24 * 365)['sharpe'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from performance_analytics import (StreamingStats, drawdown, equity_stats, rolling_drawdown, trade_stats,
+                                   underwater_periods)
+from vectorized_backtest import backtest_vectorized
+
+def random_equity(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return 1000 * np.cumprod(1 + rng.normal(0.0002, 0.01, n))
+
+class TestPerformanceAnalytics(unittest.TestCase):
+
+    def test_matches_pandas_reference(self):
+        equity = random_equity(5000)
+        position = (np.arange(5000) // 50) % 2
+        stats = equity_stats(equity, position, periods_per_year=252, risk_free=0.02)
+        returns = pd.Series(equity).pct_change().dropna()
+        excess = returns - 0.02 / 252
+        peak = pd.Series(equity).cummax()
+        self.assertAlmostEqual(stats['sharpe'], excess.mean() / returns.std(ddof=0) * np.sqrt(252), places=9)
+        self.assertAlmostEqual(stats['sortino'], excess.mean() / np.sqrt((excess.clip(upper=0) ** 2).mean()) * np.sqrt(252),
+                               places=9)
+        self.assertAlmostEqual(stats['max_drawdown'], (1 - equity / peak).max(), places=12)
+        self.assertAlmostEqual(stats['calmar'], stats['annualized_return'] / stats['max_drawdown'], places=12)
+        self.assertAlmostEqual(stats['time_under_water'], (equity < peak).mean(), places=12)
+        self.assertEqual(stats['max_time_under_water'], underwater_periods(equity).max())
+        self.assertEqual(stats['exposure'], 0.5)
+        self.assertEqual(stats['turnover'], np.abs(np.diff(position, prepend=0)).sum())
+        np.testing.assert_allclose(drawdown(equity), 1 - equity / peak)
+
+    def test_chunking_and_memmap_give_same_stats(self):
+        equity = random_equity(100_000, seed=1)
+        whole = equity_stats(equity)
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        path = os.path.join(root, 'equity.npy')
+        np.save(path, equity)
+        chunked = equity_stats(np.load(path, mmap_mode='r'), chunk_size=777)
+        for key, value in whole.items():
+            self.assertAlmostEqual(chunked[key], value, places=9, msg=key)
+        np.testing.assert_allclose(drawdown(equity, chunk_size=777), drawdown(equity))
+        out = np.lib.format.open_memmap(os.path.join(root, 'drawdown.npy'), mode='w+', shape=equity.shape)
+        self.assertIs(drawdown(np.load(path, mmap_mode='r'), chunk_size=777, out=out), out)
+        np.testing.assert_allclose(out, drawdown(equity))
+        periods = underwater_periods(equity)
+        np.testing.assert_array_equal(underwater_periods(equity, chunk_size=777), periods)
+        np.testing.assert_array_equal(underwater_periods(equity, chunk_size=1), periods)
+        self.assertEqual(periods.sum(), round(whole['time_under_water'] * len(equity)))
+        self.assertEqual(periods.max(), whole['max_time_under_water'])
+
+    def test_rolling_drawdown_and_trades(self):
+        equity = random_equity(3000, seed=2)
+        for window in (1, 7, 250, 5000):
+            expected = 1 - equity / pd.Series(equity).rolling(window, min_periods=1).max().to_numpy()
+            np.testing.assert_allclose(rolling_drawdown(equity, window), expected, atol=1e-15)
+            np.testing.assert_allclose(rolling_drawdown(equity, window, chunk_size=777), expected, atol=1e-15)
+        close = random_equity(2000, seed=3)
+        signal = np.where(np.arange(2000) % 40 == 0, 1, np.where(np.arange(2000) % 40 == 20, -1, 0))
+        result = backtest_vectorized(close, signal, 1000, fee=0.001)
+        stats = trade_stats(result['trades'])
+        returns = result['trades']['return']
+        self.assertEqual(stats['count'], len(returns))
+        self.assertAlmostEqual(stats['p50'], np.median(returns))
+        self.assertAlmostEqual(stats['win_rate'], (returns > 0).mean())
+        self.assertEqual(stats['mean_holding_bars'], 20)
+
+    def test_streaming_matches_vectorized(self):
+        equity = random_equity(20_000, seed=4)
+        position = ((np.arange(20_000) // 100) % 3 == 0).astype(float)
+        trades = np.random.default_rng(5).normal(0.002, 0.03, 500)
+        live = StreamingStats(periods_per_year=8760, risk_free=0.01, window=500)
+        for value, held in zip(equity, position):
+            live.update(value, held)
+        for r in trades:
+            live.on_trade(r)
+        stats = live.stats()
+        expected = equity_stats(equity, position, trades, periods_per_year=8760, risk_free=0.01)
+        for key, value in expected.items():
+            if key == 'trades':
+                for name in ('count', 'win_rate', 'mean_return', 'std_return', 'best', 'worst', 'avg_win', 'avg_loss',
+                             'profit_factor'):
+                    self.assertAlmostEqual(stats['trades'][name], value[name], places=9, msg=name)
+                for name in ('p5', 'p25', 'p50', 'p75', 'p95'):
+                    self.assertAlmostEqual(stats['trades'][name], value[name], delta=0.002, msg=name)
+            else:
+                self.assertAlmostEqual(stats[key], value, places=6, msg=key)
+        self.assertAlmostEqual(stats['rolling_drawdown'], rolling_drawdown(equity, 500)[-1], places=12)
+        self.assertAlmostEqual(stats['drawdown'], drawdown(equity)[-1], places=12)
+
+if __name__ == '__main__':
+    unittest.main()
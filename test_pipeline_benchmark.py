@@ -0,0 +1,22 @@
+import unittest
+import clock_service
+from pipeline_benchmark import benchmark_pipeline, run_benchmark
+
+class TestPipelineBenchmark(unittest.TestCase):
+
+    def test_stage_report(self):
+        report = benchmark_pipeline([('double', lambda v: 2), ('add', lambda v: v + 1)], iterations=5, warmup=1)
+        self.assertEqual(list(report.index), ['double', 'add', 'total'])
+        self.assertTrue((report['count'] == 5).all())
+
+    def test_runs_the_bot_end_to_end(self):
+        shared = clock_service._shared_clock
+        report = run_benchmark(iterations=2, candles=500)
+        self.assertEqual(list(report.index), ['fetch_data', 'calculate_indicators', 'generate_signals', 'place_orders',
+                                              'total'])
+        self.assertTrue((report['count'] == 2).all())
+        # The benchmark's clock is its own, not the process-wide one
+        self.assertIs(clock_service._shared_clock, shared)
+
+if __name__ == '__main__':
+    unittest.main()
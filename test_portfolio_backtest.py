@@ -0,0 +1,55 @@
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from indicator_registry import default_registry
+from ohlcv_store import write_candles
+from portfolio_backtest import run_portfolio_backtest, walk_forward_windows
+from simulated_exchange import synthetic_candles
+
+class TestPortfolioBacktest(unittest.TestCase):
+
+    def setUp(self):
+        self.candles = {f'COIN{i}/USDT': synthetic_candles(1000 - 50 * i, '1d', start=86_400_000 * 50 * i, seed=i)
+                        for i in range(4)}
+        self.data = {s: pd.DataFrame(rows, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
+                     for s, rows in self.candles.items()}
+
+    def test_walk_forward_windows(self):
+        self.assertEqual(walk_forward_windows(100, 50, 20), [(0, 50, 70), (20, 70, 90), (40, 90, 100)])
+
+    def test_pool_matches_serial_run(self):
+        kwargs = dict(train_bars=300, test_bars=100, fast_windows=(10, 20), slow_windows=(50, 100))
+        serial = run_portfolio_backtest(self.data, processes=1, **kwargs)
+        pooled = run_portfolio_backtest(self.data, processes=2, **kwargs)
+        pd.testing.assert_series_equal(serial['returns'], pooled['returns'])
+        self.assertEqual(len(serial['windows']), sum(len(walk_forward_windows(len(df), 300, 100)) for df in self.data.values()))
+        self.assertEqual(set(serial['stats']), {'total_return', 'annualized_return', 'sharpe', 'max_drawdown', 'bars'})
+        # Out-of-sample bars start after the first training window of the earliest symbol
+        self.assertEqual(serial['returns'].index[0], self.candles['COIN0/USDT'][300, 0])
+
+    def test_reads_symbols_from_the_store(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        for symbol, rows in self.candles.items():
+            write_candles(root, symbol, '1d', rows)
+        from_store = run_portfolio_backtest(symbols=list(self.candles), root=root, processes=1, train_bars=300,
+                                            test_bars=100, allocation='inverse_volatility')
+        in_memory = run_portfolio_backtest(self.data, processes=1, train_bars=300, test_bars=100,
+                                           allocation='inverse_volatility')
+        np.testing.assert_allclose(from_store['returns'].to_numpy(), in_memory['returns'].to_numpy())
+
+    def test_series_with_the_same_endpoints_are_not_confused(self):
+        kwargs = dict(processes=1, train_bars=300, test_bars=100)
+        first = self.data['COIN0/USDT']
+        second = first.copy()
+        second.loc[1:len(second) - 2, 'close'] *= np.linspace(0.5, 1.5, len(second) - 2)
+        run_portfolio_backtest({'COIN0/USDT': first}, **kwargs)
+        after_first = run_portfolio_backtest({'COIN0/USDT': second}, **kwargs)
+        default_registry.clear()
+        fresh = run_portfolio_backtest({'COIN0/USDT': second}, **kwargs)
+        pd.testing.assert_series_equal(after_first['returns'], fresh['returns'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+import ccxt
+from exchange_recorder import RECORD_ENV, read_log, record_from_env
+from request_scheduler import ORDER, RequestScheduler, install_scheduler
+from simulated_exchange import SimulatedExchange, synthetic_candles
+
+# Scaled-down limits so a short test covers many windows
+WINDOWS = {'ip': (60, 1.0), 'order_create': (10, 1.0)}
+LIMITS = {'ip': (45.0, 12.0), 'order_create': (7.0, 2.0)}
+ENDPOINTS = {'create_order': ({'ip': 1, 'order_create': 1}, ORDER)}
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class TestRequestScheduler(unittest.TestCase):
+
+    def test_buckets_refill_at_their_rate(self):
+        clock = FakeClock()
+        scheduler = RequestScheduler(LIMITS, ENDPOINTS, clock=clock)
+        for _ in range(12):
+            self.assertEqual(scheduler.acquire('fetch_ohlcv'), 0.0)
+        self.assertAlmostEqual(scheduler.tokens['ip'], 0.0)
+        clock.now = 0.2
+        scheduler.acquire('create_order')
+        self.assertAlmostEqual(scheduler.tokens['ip'], 8.0)
+        self.assertAlmostEqual(scheduler.tokens['order_create'], 1.0)
+        metrics = scheduler.metrics()
+        self.assertEqual(metrics['market_data']['requests'], 12)
+        self.assertEqual(metrics['order']['requests'], 1)
+
+    def test_orders_jump_market_data_queue_without_tripping_limits(self):
+        exchange = SimulatedExchange({('BTC/USDT', '1h'): synthetic_candles(300)}, endpoint_limits=WINDOWS)
+        scheduler = RequestScheduler(LIMITS, ENDPOINTS)
+        scheduled = install_scheduler(exchange, scheduler)
+        stop = time.monotonic() + 2.0
+        errors, order_latency = [], []
+
+        def market_data():
+            while time.monotonic() < stop:
+                try:
+                    scheduled.fetch_ohlcv('BTC/USDT', '1h', limit=10)
+                except ccxt.RateLimitExceeded as e:
+                    errors.append(e)
+
+        def orders():
+            while time.monotonic() < stop:
+                start = time.monotonic()
+                try:
+                    scheduled.create_order('BTC/USDT', 'market', 'sell', 0.01)
+                except ccxt.RateLimitExceeded as e:
+                    errors.append(e)
+                order_latency.append(time.monotonic() - start)
+                time.sleep(0.2)
+
+        threads = [threading.Thread(target=market_data) for _ in range(8)] + [threading.Thread(target=orders)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(exchange.rejected, 0)
+        # The IP budget is used close to its allowed rate of 60 per second
+        self.assertGreaterEqual(len(exchange.calls) / 2.0, 0.7 * 60)
+        # Stop-loss style orders are not stuck behind the market-data flood
+        self.assertLess(max(order_latency), 0.1)
+        metrics = scheduler.metrics()
+        self.assertGreater(metrics['market_data']['max_queue_depth'], 1)
+        self.assertGreater(metrics['market_data']['wait_p50_ms'], metrics['order']['wait_p50_ms'])
+
+    def test_unscheduled_burst_trips_the_fake(self):
+        exchange = SimulatedExchange({('BTC/USDT', '1h'): synthetic_candles(300)}, endpoint_limits=WINDOWS)
+        with self.assertRaises(ccxt.RateLimitExceeded):
+            for _ in range(61):
+                exchange.fetch_ticker('BTC/USDT')
+        self.assertEqual(exchange.rejected, 1)
+
+    def test_stacked_on_a_recorder_each_request_is_scheduled_and_recorded_once(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        response = {'retCode': 0, 'retMsg': 'OK', 'result': {}, 'time': 1700000000123}
+        for i, stack in enumerate([lambda e, s: install_scheduler(record_from_env(e), s),
+                                   lambda e, s: record_from_env(install_scheduler(e, s))]):
+            path = os.path.join(root, f'{i}.tbx')
+            exchange = ccxt.bybit()
+            exchange.fetch = lambda url, method='GET', headers=None, body=None: response
+            scheduler = RequestScheduler()
+            with patch.dict(os.environ, {RECORD_ENV: path}):
+                wrapped = stack(exchange, scheduler)
+            self.assertEqual(wrapped.fetch_time(), 1700000000123)
+            wrapped.close()
+            self.assertEqual([r.method for r in read_log(path)], ['fetch_time'])
+            self.assertEqual(scheduler.metrics()['market_data']['requests'], 1)
+
+if __name__ == '__main__':
+    unittest.main()
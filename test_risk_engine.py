@@ -0,0 +1,94 @@
+import time
+import unittest
+import numpy as np
+import pandas as pd
+import tradebot
+from risk_engine import (APPROVED, DAILY_LOSS, LEVERAGE, MAX_NOTIONAL, NO_PRICE, SYMBOL_EXPOSURE, DAY_MS,
+                         RiskEngine)
+from simulated_exchange import SimulatedExchange, synthetic_candles
+from test_order_store import PositionsExchange
+
+def random_walk(n, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    return close * 1.005, close * 0.995, close
+
+class TestRiskEngine(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = RiskEngine(['BTC/USDT', 'ETH/USDT'], equity=10_000, max_order_notional=5_000,
+                                 max_symbol_exposure=0.4, max_leverage=0.6, max_daily_loss=0.05)
+        self.engine.update_many(np.array([0, 1]), [101.0, 51.0], [99.0, 49.0], [100.0, 50.0], timestamp=0)
+
+    def test_incremental_atr_matches_wilder(self):
+        engine = RiskEngine(['BTC/USDT'], equity=10_000)
+        high, low, close = random_walk(200)
+        for h, l, c in zip(high, low, close):
+            engine.update('BTC/USDT', h, l, c)
+        previous = np.r_[np.nan, close[:-1]]
+        tr = np.where(np.isnan(previous), high - low, np.maximum(high, previous) - np.minimum(low, previous))
+        atr = tr[:14].mean()
+        for value in tr[14:]:
+            atr += (value - atr) / 14
+        self.assertAlmostEqual(engine.atr[0], atr)
+        self.assertAlmostEqual(engine.size_by_atr('BTC/USDT', 0.01, 2.0), 10_000 * 0.01 / (2 * atr))
+        self.assertGreater(engine.size_by_volatility('BTC/USDT'), 0)
+
+    def test_limits(self):
+        engine = self.engine
+        self.assertEqual(engine.check('BTC/USDT', 60.0), MAX_NOTIONAL)
+        self.assertEqual(engine.check('BTC/USDT', 45.0), SYMBOL_EXPOSURE)
+        self.assertEqual(engine.check('BTC/USDT', 30.0), APPROVED)
+        engine.on_fill('BTC/USDT', 30.0, 100.0)
+        self.assertEqual(engine.check('ETH/USDT', 70.0), LEVERAGE)
+        self.assertEqual(engine.check('ETH/USDT', 50.0), APPROVED)
+        # A 6% drawdown stops new risk but still lets the position be reduced
+        engine.update('BTC/USDT', 81.0, 79.0, 80.0, timestamp=1000)
+        self.assertEqual(engine.check('ETH/USDT', 10.0), DAILY_LOSS)
+        self.assertEqual(engine.check('BTC/USDT', -30.0), APPROVED)
+        engine.update('BTC/USDT', 81.0, 79.0, 80.0, timestamp=DAY_MS)
+        self.assertEqual(engine.check('ETH/USDT', 10.0), APPROVED)
+        self.assertEqual(RiskEngine(['X'], 1000).check('X', 1.0), NO_PRICE)
+        self.assertEqual(engine.report()['rejections']['daily_loss'], 1)
+
+    def test_batch_matches_single_checks_and_latency(self):
+        rng = np.random.default_rng(1)
+        symbols = rng.choice(['BTC/USDT', 'ETH/USDT'], 1000)
+        qty = rng.uniform(-80, 80, 1000)
+        self.engine.on_fill('ETH/USDT', -20.0, 50.0)
+        batch = self.engine.check_orders(list(symbols), qty)
+        single = [self.engine.check(s, q) for s, q in zip(symbols, qty)]
+        np.testing.assert_array_equal(batch, single)
+        start = time.perf_counter()
+        for s, q in zip(symbols, qty):
+            self.engine.check(s, q)
+        self.assertLess((time.perf_counter() - start) / len(qty), 20e-6)
+
+    def test_script_rolls_the_day_and_books_bracket_exits(self):
+        script = tradebot.risk_management
+        data = pd.DataFrame({'timestamp': pd.to_datetime([0, DAY_MS - 1, DAY_MS], unit='ms'),
+                             'high': [101.0] * 3, 'low': [99.0] * 3, 'close': [100.0] * 3})
+        engine = RiskEngine(['BTC/USDT'], equity=10_000)
+        script.update_risk_engine(engine, 'BTC/USDT', data)
+        self.assertEqual(engine.day, 1)
+        for exchange in (SimulatedExchange({('BTC/USDT', '1h'): synthetic_candles(10)}),
+                         PositionsExchange({('BTC/USDT', '1h'): synthetic_candles(10)})):
+            native = isinstance(exchange, PositionsExchange)
+            exchange.has['createOrderWithTakeProfitAndStopLoss'] = native
+            engine = RiskEngine(['BTC/USDT'], equity=1_000_000, max_order_notional=1e9, max_symbol_exposure=1.0)
+            last = exchange.fetch_ticker('BTC/USDT')['last']
+            engine.update('BTC/USDT', last, last, last)
+            bracket = script.place_order_with_risk_management(exchange, 'BTC/USDT', 'buy', 0.5, 0.05, 0.10, engine)
+            exchange.held = [{'symbol': 'BTC/USDT', 'side': 'long', 'contracts': 0.5}]
+            self.assertEqual(script.book_bracket_exit(exchange, bracket, engine), 0.0)
+            self.assertEqual(engine.position[0], 0.5)
+            # The stop executes on the exchange
+            if native:
+                exchange.held = []
+            else:
+                exchange.orders[bracket['stop_loss']['id']].update(status='closed', filled=0.5, remaining=0.0)
+            self.assertEqual(script.book_bracket_exit(exchange, bracket, engine), -0.5)
+            self.assertEqual(engine.position[0], 0.0)
+
+if __name__ == '__main__':
+    unittest.main()
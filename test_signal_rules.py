@@ -0,0 +1,55 @@
+import time
+import unittest
+import numpy as np
+import pandas as pd
+from signal_rules import SMA_CROSSOVER, compile_rule, compile_strategy, shift
+
+class TestSignalRules(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(5)
+        close = pd.Series(100 * np.exp(np.cumsum(rng.normal(0, 0.01, 3000))))
+        self.df = pd.DataFrame({'close': close, 'SMA_50': close.rolling(50).mean(),
+                                'SMA_200': close.rolling(200).mean(), 'RSI': rng.uniform(0, 100, 3000)})
+
+    def test_crossover_matches_trading_strategy_loop(self):
+        df = self.df
+        expected = ['hold']
+        for i in range(1, len(df)):
+            if df['SMA_50'][i] > df['SMA_200'][i] and df['SMA_50'][i-1] <= df['SMA_200'][i-1]:
+                expected.append('buy')
+            elif df['SMA_50'][i] < df['SMA_200'][i] and df['SMA_50'][i-1] >= df['SMA_200'][i-1]:
+                expected.append('sell')
+            else:
+                expected.append('hold')
+        self.assertEqual(list(compile_strategy(SMA_CROSSOVER)(df)), expected)
+
+    def test_thresholds_logic_and_lookbacks(self):
+        rule = compile_rule('30 < RSI < 70 and not (close < SMA_50 or RSI[1] > 90)')
+        df = self.df
+        expected = (df['RSI'] > 30) & (df['RSI'] < 70) & ~((df['close'] < df['SMA_50']) | (df['RSI'].shift(1) > 90))
+        np.testing.assert_array_equal(rule(df), expected.to_numpy())
+        self.assertEqual(rule.columns, ['RSI', 'SMA_50', 'close'])
+
+    def test_rejects_arbitrary_code(self):
+        for rule in ["__import__('os').system('true')", 'close.real', 'lambda: 1', 'close[RSI]']:
+            with self.assertRaises(ValueError):
+                compile_rule(rule)
+
+    def test_rejects_future_bars(self):
+        for rule in ['close[-1] > close', 'shift(close, -1) > close', 'shift(close, -(1)) > close']:
+            with self.assertRaises(ValueError):
+                compile_rule(rule)
+        with self.assertRaises(ValueError):
+            shift(np.arange(5.0), -1)
+
+    def test_millions_of_bars(self):
+        n = 2_000_000
+        data = {'SMA_50': np.random.rand(n), 'SMA_200': np.random.rand(n)}
+        signals = compile_strategy(SMA_CROSSOVER)
+        start = time.perf_counter()
+        signals(data)
+        self.assertLess(time.perf_counter() - start, 1.0)
+
+if __name__ == '__main__':
+    unittest.main()
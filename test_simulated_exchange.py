@@ -0,0 +1,52 @@
+import unittest
+import ccxt
+from bracket_orders import place_bracket_order
+from pipeline_benchmark import benchmark_pipeline
+from simulated_exchange import SimulatedExchange, synthetic_candles
+
+class TestSimulatedExchange(unittest.TestCase):
+
+    def setUp(self):
+        self.exchange = SimulatedExchange({('BTC/USDT', '1h'): synthetic_candles(500)})
+
+    def test_fetch_ohlcv_and_cursor(self):
+        self.exchange.candles[('BTC/USDT', '1h')]['cursor'] = 300
+        rows = self.exchange.fetch_ohlcv('BTC/USDT', '1h', limit=100)
+        self.assertEqual(len(rows), 100)
+        self.exchange.advance('BTC/USDT', '1h', 2)
+        newer = self.exchange.fetch_ohlcv('BTC/USDT', '1h', since=rows[-1][0])
+        self.assertEqual([r[0] for r in newer], [rows[-1][0] + i * 3_600_000 for i in range(3)])
+
+    def test_clock_skew_reproduces_timestamp_error(self):
+        self.exchange.clock_skew = 270_070
+        with self.assertRaises(ccxt.InvalidNonce):
+            self.exchange.fetch_ohlcv('BTC/USDT', '1h', params={'timestamp': self.exchange.milliseconds(), 'recvWindow': 5000})
+        server = self.exchange.fetch_time()
+        self.assertEqual(len(self.exchange.fetch_ohlcv('BTC/USDT', '1h', limit=5, params={'timestamp': server})), 5)
+
+    def test_rate_limit_and_error_injection(self):
+        exchange = SimulatedExchange({('BTC/USDT', '1h'): synthetic_candles(10)}, rate_limit=3)
+        for _ in range(3):
+            exchange.fetch_ticker('BTC/USDT')
+        with self.assertRaises(ccxt.RateLimitExceeded):
+            exchange.fetch_ticker('BTC/USDT')
+        self.exchange.inject('create_order', ccxt.InsufficientFunds('no margin'))
+        with self.assertRaises(ccxt.InsufficientFunds):
+            self.exchange.create_order('BTC/USDT', 'market', 'buy', 0.001)
+
+    def test_bracket_order_round_trip(self):
+        bracket = place_bracket_order(self.exchange, 'BTC/USDT', 'buy', 0.001, 0.01, 0.02)
+        open_orders = self.exchange.fetch_open_orders('BTC/USDT')
+        self.assertEqual({o['id'] for o in open_orders}, {bracket['stop_loss']['id'], bracket['take_profit']['id']})
+        self.assertEqual(len(self.exchange.fetch_order_book('BTC/USDT', 5)['bids']), 5)
+
+    def test_benchmark_pipeline_reports_each_stage(self):
+        stages = [('fetch_data', lambda _: self.exchange.fetch_ohlcv('BTC/USDT', '1h', limit=100)),
+                  ('count', len)]
+        report = benchmark_pipeline(stages, iterations=20, warmup=2)
+        self.assertEqual(list(report.index), ['fetch_data', 'count', 'total'])
+        self.assertTrue((report['count'] == 20).all())
+        self.assertTrue((report['p99_ms'] >= report['p50_ms']).all())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+import unittest
+import numpy as np
+import pandas as pd
+from streaming_indicators import EMA, MACD, RSI, SMA, IndicatorSet, ParabolicSAR
+
+# Batch references written the way pandas_ta computes them
+def pandas_ta_ema(close, length):
+    close = close.copy()
+    close.iloc[length - 1] = close.iloc[:length].mean()
+    close.iloc[:length - 1] = np.nan
+    return close.ewm(span=length, adjust=False).mean()
+
+def pandas_ta_rsi(close, length):
+    delta = close.diff()
+    gain = delta.clip(lower=0).ewm(alpha=1 / length, min_periods=length).mean()
+    loss = (-delta.clip(upper=0)).ewm(alpha=1 / length, min_periods=length).mean()
+    return 100 * gain / (gain + loss)
+
+# pandas_ta.psar's loop, long and short columns merged. pandas_ta reads high/low[row - 2]
+# on the second bar, which wraps to the last bar of the series; only bars up to the
+# current one are used here.
+def pandas_ta_psar(high, low, close, af0=0.02, max_af=0.2):
+    up, down = high[1] - high[0], low[0] - low[1]
+    falling = down > up and down > 0
+    sar, ep, af = close[0], low[0] if falling else high[0], af0
+    values = np.full(len(high), np.nan)
+    for row in range(1, len(high)):
+        previous = slice(max(row - 2, 0), row)
+        _sar = sar + af * (ep - sar)
+        if falling:
+            reverse = high[row] > _sar
+            if low[row] < ep:
+                ep, af = low[row], min(af + af0, max_af)
+            _sar = max(high[previous].max(), _sar)
+        else:
+            reverse = low[row] < _sar
+            if high[row] > ep:
+                ep, af = high[row], min(af + af0, max_af)
+            _sar = min(low[previous].min(), _sar)
+        if reverse:
+            _sar, af, falling = ep, af0, not falling
+            ep = low[row] if falling else high[row]
+        sar = values[row] = _sar
+    return values
+
+class TestStreamingIndicators(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(11)
+        self.close = pd.Series(100 * np.exp(np.cumsum(rng.normal(0, 0.01, 1000))))
+
+    def stream(self, indicator):
+        return np.array([indicator.update(x) for x in self.close])
+
+    def test_sma_matches_rolling_mean(self):
+        np.testing.assert_allclose(self.stream(SMA(50)), self.close.rolling(50).mean(), rtol=1e-10)
+
+    def test_ema_matches_both_seedings(self):
+        np.testing.assert_allclose(self.stream(EMA(12)), pandas_ta_ema(self.close, 12), rtol=1e-10)
+        np.testing.assert_allclose(self.stream(EMA(12, presma=False)),
+                                   self.close.ewm(span=12, adjust=False).mean(), rtol=1e-10)
+
+    def test_macd_matches_batch(self):
+        macd = MACD()
+        values, signals = [], []
+        for x in self.close:
+            values.append(macd.update(x))
+            signals.append(macd.signal)
+        batch = pandas_ta_ema(self.close, 12) - pandas_ta_ema(self.close, 26)
+        batch_signal = pandas_ta_ema(batch.loc[batch.first_valid_index():], 9).reindex(batch.index)
+        np.testing.assert_allclose(values, batch, rtol=1e-10)
+        np.testing.assert_allclose(signals, batch_signal, rtol=1e-8, atol=1e-12)
+
+    def test_rsi_matches_batch(self):
+        np.testing.assert_allclose(self.stream(RSI(14)), pandas_ta_rsi(self.close, 14), rtol=1e-10)
+
+    def test_sar_matches_batch_on_trending_and_reversing_series(self):
+        rng = np.random.default_rng(5)
+        trending = np.linspace(100, 200, 300) + rng.normal(0, 0.5, 300)
+        reversing = 150 + 30 * np.sin(np.linspace(0, 6 * np.pi, 600)) + rng.normal(0, 0.5, 600)
+        for close in (trending, trending[::-1], self.close.to_numpy(), reversing):
+            high, low = close * 1.01, close * 0.99
+            sar = ParabolicSAR()
+            streamed = np.array([sar.update(h, l, c) for h, l, c in zip(high, low, close)])
+            np.testing.assert_allclose(streamed, pandas_ta_psar(high, low, close), rtol=1e-12)
+        # The sine series ends up long and short several times over
+        flips = np.count_nonzero(np.diff(np.sign(close[1:] - streamed[1:])))
+        self.assertGreater(flips, 4)
+
+    def test_sar_stays_on_the_right_side_of_price(self):
+        indicators = IndicatorSet()
+        for x in np.linspace(100, 200, 300):
+            latest = indicators.update(x * 1.01, x * 0.99, x)
+        self.assertLess(latest['SAR'], 200 * 0.99)
+        self.assertFalse(np.isnan(latest['SMA200']))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import importlib
+import socket
+import subprocess
+import sys
+import unittest
+from unittest.mock import patch
+import tradebot
+from startup_benchmark import HEAVY_MODULES, ROOT, STARTUP_BUDGET, heavy_modules_loaded, time_startup
+from tradebot.cli import COMMANDS, parse_command
+
+class TestTradebotPackage(unittest.TestCase):
+
+    def test_import_and_cli_stay_light(self):
+        self.assertEqual(heavy_modules_loaded('import tradebot, tradebot.cli; tradebot.cli.build_parser()'), [])
+        for module, _ in COMMANDS.values():
+            self.assertIn(module, tradebot.MODULES)
+        self.assertEqual(parse_command(['sweep', '--fast', '10']), ('sweep', ['--fast', '10']))
+        self.assertEqual(parse_command([]), (None, []))
+
+    def test_modules_load_lazily_by_snake_case_name(self):
+        import risk_engine
+        self.assertIs(tradebot.risk_engine, risk_engine)
+        import tradebot.risk_engine as imported
+        self.assertIs(imported, risk_engine)
+        self.assertEqual(risk_engine.__spec__.name, 'risk_engine')
+        placing_orders = tradebot.placing_orders
+        self.assertTrue(placing_orders.__file__.endswith('Placing Orders.py'))
+        self.assertIs(tradebot.load('placing_orders'), placing_orders)
+        self.assertIs(importlib.import_module('tradebot.placing_orders'), placing_orders)
+        self.assertTrue(callable(tradebot.risk_management.place_order_with_risk_management))
+        with self.assertRaises(AttributeError):
+            tradebot.not_a_module
+
+    def test_import_does_not_touch_network(self):
+        # Any socket use during import fails the import
+        code = ("import socket\n"
+                "def refuse(*args, **kwargs):\n"
+                "    raise AssertionError('network access at import time')\n"
+                "socket.socket.connect = socket.create_connection = socket.getaddrinfo = refuse\n"
+                "import tradebot\n"
+                "for name in ('backtesting', 'technical_indicators', 'trading_strategy', 'synchronize_exchange_time'):\n"
+                "    getattr(tradebot, name)\n")
+        result = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+    def test_cli_startup_budget(self):
+        self.assertLess(min(time_startup(['-m', 'tradebot', '--help'])), STARTUP_BUDGET)
+        self.assertIn('ccxt', HEAVY_MODULES)
+        self.assertEqual(heavy_modules_loaded('import Backtesting'), [])
+        scripts = ('tradingbot', 'placing_orders', 'risk_management', 'technical_indicators', 'trading_strategy')
+        self.assertEqual(heavy_modules_loaded(f'import tradebot\nfor name in {scripts!r}: tradebot.load(name)'), [])
+
+    def test_backtest_stops_when_ntp_is_unreachable(self):
+        with patch('synchronize_exchange_time.synchronize_time', side_effect=socket.gaierror('no route')), \
+                patch('ohlcv_store.fetch_ohlcv_cached') as fetch:
+            self.assertIsNone(tradebot.backtesting.main())
+        fetch.assert_not_called()
+
+    def test_ntp_offset_is_applied_in_milliseconds(self):
+        with patch('time.time', return_value=1000.0), patch('ohlcv_store.fetch_ohlcv_cached') as fetch:
+            tradebot.backtesting.fetch_ohlcv(None, 'BTC/USDT', time_offset=0.25)
+        self.assertEqual(fetch.call_args.kwargs['params']['timestamp'], 1_000_250)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,13 @@
+import shutil
+import tempfile
 import unittest
 from unittest.mock import MagicMock, patch
 import ccxt
-from tradingbot import initialize_exchange, synchronize_time, place_order_with_risk_management
+import pandas as pd
+from order_store import OrderStore
+from simulated_exchange import SimulatedExchange, synthetic_candles
+from test_order_store import BybitLikeExchange
+from tradingbot import execute_trades, initialize_exchange, synchronize_time, place_order_with_risk_management
 
 class TestTradingFunctions(unittest.TestCase):
 
@@ -25,11 +31,44 @@ class TestTradingFunctions(unittest.TestCase):
 
     def test_place_order_with_risk_management(self):
         self.exchange.create_order = MagicMock(return_value={'price': 50000})
-        
+        self.exchange.fetch_ticker = MagicMock(return_value={'last': 50000})
+
+        # Bybit takes stop loss and take profit on the entry order itself
         place_order_with_risk_management(self.exchange, 'BTC/USDT', 'buy', 0.001, 0.01, 0.02)
-        self.exchange.create_order.assert_any_call('BTC/USDT', 'market', 'buy', 0.001)
-        self.exchange.create_order.assert_any_call('BTC/USDT', 'stop', 'sell', 0.001, 49500.0)
-        self.exchange.create_order.assert_any_call('BTC/USDT', 'limit', 'sell', 0.001, 51000.0)
+        self.exchange.create_order.assert_called_once_with(
+            'BTC/USDT', 'market', 'buy', 0.001, None,
+            {'stopLoss': {'triggerPrice': 49500.0}, 'takeProfit': {'triggerPrice': 51000.0}})
+
+    def run_entry_and_exit(self, native, exchange_class=SimulatedExchange):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        exchange = exchange_class({('BTC/USDT', '1h'): synthetic_candles(10)})
+        exchange.has['createOrderWithTakeProfitAndStopLoss'] = native
+        store = OrderStore(root)
+        close = exchange.fetch_ticker('BTC/USDT')['last']
+        df = pd.DataFrame({'close': [close, close], 'Buy_Signal': [True, False], 'Sell_Signal': [False, True]})
+        execute_trades(exchange, df, store)
+        self.assertEqual(store.position('BTC/USDT'), 0.0)
+        self.assertEqual(store.open_brackets(), [])
+        self.assertEqual(store.open_orders(), [])
+        self.assertEqual([o['side'] for o in exchange.orders.values() if o['type'] == 'market'], ['buy', 'sell'])
+        return exchange
+
+    def test_exit_closes_the_long_bracket(self):
+        exchange = self.run_entry_and_exit(native=False)
+        self.assertEqual(sum(o['status'] == 'canceled' for o in exchange.orders.values()), 2)
+
+    def test_exit_sells_when_the_entry_response_has_no_status(self):
+        exchange = self.run_entry_and_exit(native=False, exchange_class=BybitLikeExchange)
+        self.assertEqual(sum(o['status'] == 'canceled' for o in exchange.orders.values()), 2)
+
+    def test_native_bracket_is_priced_off_the_ticker(self):
+        exchange = self.run_entry_and_exit(native=True)
+        entry = exchange.orders['1']
+        self.assertEqual(len(exchange.orders), 2)
+        self.assertIn('fetch_ticker', exchange.calls)
+        stop_loss, take_profit = entry['info']['stopLoss']['triggerPrice'], entry['info']['takeProfit']['triggerPrice']
+        self.assertAlmostEqual(take_profit / stop_loss, 1.10 / 0.95)
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,53 @@
+import time
+import unittest
+import numpy as np
+from vectorized_backtest import backtest_vectorized, signals_to_positions
+
+# Reference copy of the original per-row loop in Backtesting.backtest_strategy
+def loop_backtest(close, signal, balance=1000):
+    btc_balance = 0
+    for i in range(len(close)):
+        if signal[i] == 'buy' and balance > 0:
+            btc_balance = balance / close[i]
+            balance = 0
+        elif signal[i] == 'sell' and btc_balance > 0:
+            balance = btc_balance * close[i]
+            btc_balance = 0
+    return balance, btc_balance
+
+class TestVectorizedBacktest(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        self.close = 30000 * np.exp(np.cumsum(rng.normal(0, 0.03, 365)))
+        self.signal = rng.choice(['buy', 'sell', 'hold'], size=365, p=[0.05, 0.05, 0.9])
+
+    def test_signals_to_positions(self):
+        positions = signals_to_positions(['hold', 'sell', 'buy', 'hold', 'buy', 'sell', 'hold', 'buy'])
+        self.assertEqual(positions.tolist(), [0, 0, 1, 1, 1, 0, 0, 1])
+
+    def test_matches_loop_on_daily_case(self):
+        balance, btc_balance = loop_backtest(self.close, self.signal)
+        result = backtest_vectorized(self.close, self.signal)
+        self.assertAlmostEqual(result['balance'], balance, places=6)
+        self.assertAlmostEqual(result['units'], btc_balance, places=12)
+        self.assertAlmostEqual(result['equity'][-1], balance + btc_balance * self.close[-1], places=6)
+        self.assertAlmostEqual(result['pnl'].sum(), result['equity'][-1] - 1000, places=6)
+
+    def test_fees_and_slippage_reduce_equity(self):
+        free = backtest_vectorized(self.close, self.signal)
+        costly = backtest_vectorized(self.close, self.signal, fee=0.001, slippage=0.0005)
+        self.assertEqual(len(free['trades']), len(costly['trades']))
+        self.assertLess(costly['equity'][-1], free['equity'][-1])
+
+    def test_five_million_bars(self):
+        rng = np.random.default_rng(1)
+        close = 100 + np.cumsum(rng.normal(0, 0.1, 5_000_000)).clip(-50)
+        signal = rng.choice(np.array([1, -1, 0], dtype=np.int8), size=close.size, p=[0.001, 0.001, 0.998])
+        start = time.perf_counter()
+        result = backtest_vectorized(close, signal)
+        self.assertLess(time.perf_counter() - start, 1.0)
+        self.assertEqual(result['equity'].size, close.size)
+
+if __name__ == '__main__':
+    unittest.main()
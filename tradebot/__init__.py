@@ -0,0 +1,112 @@
+import importlib
+import importlib.abc
+import importlib.util
+import os
+import sys
+
+# The bot's modules live at the repository root, next to this package. They are only
+# imported when first used (tradebot.risk_engine, `import tradebot.placing_orders`,
+# `from tradebot import risk_engine`, ...), so importing tradebot or starting the CLI
+# loads neither ccxt nor pandas. `tradebot.X` is the same module object as the
+# top-level `X`; the files themselves are not moved into the package.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Importable name -> source file, for every module the package exposes. Scripts whose
+# file names contain spaces get a snake_case name.
+MODULES = {
+    'backtesting': 'Backtesting.py',
+    'placing_orders': 'Placing Orders.py',
+    'risk_management': 'Risk Management.py',
+    'technical_indicators': 'Technical_Indicators.py',
+    'trading_strategy': 'Trading Strategy.py',
+    'bracket_orders': 'bracket_orders.py',
+    'bulk_history': 'bulk_history.py',
+    'candle_arrays': 'candle_arrays.py',
+    'candle_window': 'candle_window.py',
+    'chart_patterns': 'chart_patterns.py',
+    'clock_service': 'clock_service.py',
+    'exchange_recorder': 'exchange_recorder.py',
+    'fetch_data': 'fetch_data.py',
+    'indicator_benchmark': 'indicator_benchmark.py',
+    'indicator_registry': 'indicator_registry.py',
+    'intrabar_backtest': 'intrabar_backtest.py',
+    'live_engine': 'live_engine.py',
+    'market_feed': 'market_feed.py',
+    'metrics': 'metrics.py',
+    'ohlcv_store': 'ohlcv_store.py',
+    'order_store': 'order_store.py',
+    'parameter_sweep': 'parameter_sweep.py',
+    'performance_analytics': 'performance_analytics.py',
+    'pipeline_benchmark': 'pipeline_benchmark.py',
+    'portfolio_backtest': 'portfolio_backtest.py',
+    'request_scheduler': 'request_scheduler.py',
+    'risk_engine': 'risk_engine.py',
+    'signal_rules': 'signal_rules.py',
+    'simulated_exchange': 'simulated_exchange.py',
+    'startup_benchmark': 'startup_benchmark.py',
+    'streaming_indicators': 'streaming_indicators.py',
+    'synchronize_exchange_time': 'synchronize_exchange_time.py',
+    'synchronize_time': 'synchronize_time.py',
+    'tradingbot': 'tradingbot.py',
+    'vectorized_backtest': 'vectorized_backtest.py',
+}
+
+def source_path(name):
+    return os.path.join(ROOT, MODULES[name])
+
+# Import one of MODULES. Modules importable under their own file name keep that name
+# (so `import tradingbot` elsewhere gets the same module object); the others are loaded
+# from their file and registered under the snake_case name.
+def load(name):
+    filename = MODULES[name]
+    stem = filename[:-3]
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    if stem.isidentifier():
+        return importlib.import_module(stem)
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.spec_from_file_location(name, source_path(name))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        del sys.modules[name]
+        raise
+    return module
+
+# Lets `import tradebot.X` resolve X through load(), so the submodule is the module
+# object already imported at the top level rather than a second copy of it
+class _ModuleFinder(importlib.abc.MetaPathFinder, importlib.abc.Loader):
+
+    def find_spec(self, fullname, path, target=None):
+        package, _, name = fullname.rpartition('.')
+        if package == __name__ and name in MODULES:
+            return importlib.util.spec_from_loader(fullname, self)
+        return None
+
+    def __init__(self):
+        self.specs = {}
+
+    def create_module(self, spec):
+        module = load(spec.name.rpartition('.')[2])
+        self.specs[spec.name] = module.__spec__
+        return module
+
+    # The import system stamps the alias spec onto the module; put the original back
+    def exec_module(self, module):
+        module.__spec__ = self.specs.pop(module.__spec__.name, module.__spec__)
+
+if not any(isinstance(finder, _ModuleFinder) for finder in sys.meta_path):
+    sys.meta_path.append(_ModuleFinder())
+
+def __getattr__(name):
+    if name not in MODULES:
+        raise AttributeError(f"module 'tradebot' has no attribute {name!r}")
+    module = load(name)
+    globals()[name] = module
+    return module
+
+def __dir__():
+    return sorted(list(globals()) + list(MODULES))
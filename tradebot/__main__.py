@@ -0,0 +1,4 @@
+import sys
+from tradebot.cli import main
+
+sys.exit(main())
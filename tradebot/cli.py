@@ -0,0 +1,60 @@
+import argparse
+import runpy
+import sys
+import tradebot
+
+# Command -> (module run as a script, help). Nothing is imported until a command runs.
+COMMANDS = {
+    'run': ('tradingbot', 'run the trading bot once'),
+    'live': ('live_engine', 'run the asyncio live engine'),
+    'feed': ('market_feed', 'print events from the Bybit websocket feed'),
+    'backtest': ('backtesting', 'backtest the SMA crossover strategy on daily candles'),
+    'strategy': ('trading_strategy', 'run the trading strategy script'),
+    'orders': ('placing_orders', 'run the order placement script'),
+    'risk': ('risk_management', 'run the risk management script'),
+    'indicators': ('technical_indicators', 'fetch candles and print technical indicators'),
+    'fetch': ('fetch_data', 'fetch OHLCV data'),
+    'sweep': ('parameter_sweep', 'run a strategy parameter sweep'),
+    'sync-time': ('synchronize_exchange_time', 'print the NTP clock offset'),
+    'bench-indicators': ('indicator_benchmark', 'benchmark indicator backends'),
+    'bench-pipeline': ('pipeline_benchmark', 'benchmark the bot pipeline on a simulated exchange'),
+    'bench-startup': ('startup_benchmark', 'benchmark CLI start-up and import times'),
+}
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='tradebot', description='Automated trading bot for Bybit.')
+    commands = parser.add_subparsers(dest='command', metavar='command')
+    for name, (module, help_text) in COMMANDS.items():
+        commands.add_parser(name, help=help_text, add_help=False)
+    return parser
+
+# Split the command line into the command and the arguments passed on to its script
+def parse_command(argv):
+    for i, arg in enumerate(argv):
+        if not arg.startswith('-'):
+            options = build_parser().parse_args(argv[:i + 1])
+            return options.command, list(argv[i + 1:])
+    build_parser().parse_args(argv)
+    return None, []
+
+# Run a command's module as a script, the same as `python <file>`, with the remaining
+# arguments in sys.argv
+def run_command(name, args=()):
+    module = COMMANDS[name][0]
+    path = tradebot.source_path(module)
+    if tradebot.ROOT not in sys.path:
+        sys.path.insert(0, tradebot.ROOT)
+    argv = sys.argv
+    sys.argv = [path] + list(args)
+    try:
+        runpy.run_path(path, run_name='__main__')
+    finally:
+        sys.argv = argv
+
+def main(argv=None):
+    command, args = parse_command(sys.argv[1:] if argv is None else argv)
+    if command is None:
+        build_parser().print_help()
+        return 2
+    run_command(command, args)
+    return 0
@@ -1,15 +1,18 @@
-import ccxt
-import pandas as pd
-import pandas_ta as ta
 import time
 import logging
-import ntplib
+from bracket_orders import fetch_reference_price, place_bracket_order
+from order_store import OrderStore
+from metrics import default_metrics, dump_on_exit, start_http_server, timed
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+# ccxt, pandas, numpy and ntplib (and the modules built on them) are imported inside the
+# functions that use them, so `import tradingbot` stays cheap
+
 # Function to synchronize time with an NTP server
 def synchronize_time(ntp_server='time.google.com', max_retries=3, backoff_factor=1):
+    import ntplib
     client = ntplib.NTPClient()
     retries = 0
     while retries < max_retries:
@@ -27,6 +30,9 @@ def synchronize_time(ntp_server='time.google.com', max_retries=3, backoff_factor
 
 # Function to initialize the Bybit exchange
 def initialize_exchange(api_key, api_secret):
+    import ccxt
+    from exchange_recorder import record_from_env
+    from request_scheduler import schedule
     try:
         exchange = ccxt.bybit({
             'apiKey': api_key,
@@ -34,80 +40,104 @@ def initialize_exchange(api_key, api_secret):
             'enableRateLimit': True,  # This helps to avoid rate limit errors
         })
         logging.info("Initialized Bybit exchange")
-        return exchange
+        return record_from_env(schedule(exchange))
     except Exception as e:
         logging.error("Failed to initialize exchange: %s", e)
         raise e
 
-# Fetch data for BTC/USDT
-def fetch_data(exchange, symbol='BTC/USDT'):
+# Fetch data for BTC/USDT into the candle store under `root` (ohlcv_store.DEFAULT_STORE by
+# default); requests are stamped with `clock`, the shared clock by default
+@timed()
+def fetch_data(exchange, symbol='BTC/USDT', timeframe='1h', root=None, windows=None, clock=None):
+    from candle_window import fetch_window_dataframe
+    from clock_service import shared_clock
+    from ohlcv_store import DEFAULT_STORE
+    root = DEFAULT_STORE if root is None else root
     try:
         params = {
             'recvWindow': 10000,
-            'timestamp': int(time.time() * 1000 + synchronize_time())
+            'timestamp': (clock or shared_clock(exchange)).milliseconds()
         }
-        ohlcv = exchange.fetch_ohlcv(symbol, timeframe='1h', limit=100, params=params)
-        df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+        df = fetch_window_dataframe(exchange, symbol, timeframe=timeframe, params=params, windows=windows, root=root)
         logging.info("Fetched OHLCV data for %s", symbol)
         return df
     except Exception as e:
         logging.error("An error occurred while fetching data: %s", e)
         raise e
 
-# Calculate technical indicators using pandas_ta
+# Calculate technical indicators as pandas_ta does, from the shared indicator registry
+@timed()
 def calculate_indicators(df):
-    df['SMA50'] = ta.sma(df['close'], length=50)
-    df['SMA200'] = ta.sma(df['close'], length=200)
-    df['EMA12'] = ta.ema(df['close'], length=12)
-    df['EMA26'] = ta.ema(df['close'], length=26)
-    macd = ta.macd(df['close'], fast=12, slow=26, signal=9)
-    df['MACD'] = macd['MACD_12_26_9']
-    df['MACD_signal'] = macd['MACDs_12_26_9']
-    df['RSI'] = ta.rsi(df['close'], length=14)
-    df['SAR'] = ta.sar(df['high'], df['low'], df['close'])
-    return df
+    from indicator_registry import PANDAS_TA_COLUMNS, add_indicator_columns
+    return add_indicator_columns(df, columns=PANDAS_TA_COLUMNS)
 
 # Generate buy/sell signals
+@timed()
 def generate_signals(df):
     df['Buy_Signal'] = (df['close'] > df['SMA50']) & (df['SMA50'] > df['SMA200']) & (df['MACD'] > df['MACD_signal']) & (df['RSI'] < 70)
     df['Sell_Signal'] = (df['close'] < df['SMA50']) & (df['SMA50'] < df['SMA200']) & (df['MACD'] < df['MACD_signal']) & (df['RSI'] > 30)
     return df
 
 # Function to place an order with risk management (stop loss and take profit)
-def place_order_with_risk_management(exchange, symbol, side, amount, stop_loss_pct, take_profit_pct):
+@timed()
+def place_order_with_risk_management(exchange, symbol, side, amount, stop_loss_pct, take_profit_pct, store=None):
     try:
-        # Place market order
-        order = exchange.create_order(symbol, 'market', side, amount)
-        price = order['price']
-
-        # Calculate stop loss and take profit prices
-        if side == 'buy':
-            stop_loss_price = price * (1 - stop_loss_pct)
-            take_profit_price = price * (1 + take_profit_pct)
-            stop_loss_side = 'sell'
-            take_profit_side = 'sell'
-        else:
-            stop_loss_price = price * (1 + stop_loss_pct)
-            take_profit_price = price * (1 - take_profit_pct)
-            stop_loss_side = 'buy'
-            take_profit_side = 'buy'
-
-        # Place stop loss and take profit orders
-        exchange.create_order(symbol, 'stop', stop_loss_side, amount, stop_loss_price)
-        exchange.create_order(symbol, 'limit', take_profit_side, amount, take_profit_price)
+        # Attach stop loss and take profit to the entry where the exchange supports it
+        # (priced off the last trade); otherwise send both legs concurrently after the fill
+        reference_price = fetch_reference_price(exchange, symbol)
+        bracket = place_bracket_order(exchange, symbol, side, amount, stop_loss_pct, take_profit_pct,
+                                      reference_price=reference_price)
+        if store is not None:
+            store.add_bracket(bracket)
 
-        logging.info(f"Placed {side} order for {amount} {symbol} at {price} with stop loss at {stop_loss_price} and take profit at {take_profit_price}")
+        logging.info(f"Placed {side} order for {amount} {symbol} at {bracket['price']} with stop loss at {bracket['stop_loss_price']} and take profit at {bracket['take_profit_price']}")
+        return bracket
 
     except Exception as e:
         logging.error(f"Failed to place order with risk management: {e}")
         raise e
 
-# Execute trades
-def execute_trades(exchange, df):
+# Close a long: cancel the protective legs of its bracket, sell what is still held and
+# close the bracket in the store. A leg the exchange no longer has already closed the
+# position, so nothing more is sold.
+def close_position(exchange, symbol, amount, store=None, group=None):
+    import ccxt
+    try:
+        executed = None
+        legs = store.bracket_orders(group) if store is not None and group is not None else []
+        for order in legs:
+            try:
+                exchange.cancel_order(order['id'], symbol)
+            except ccxt.OrderNotFound:
+                executed = order
+        if executed is None:
+            order = exchange.create_order(symbol, 'market', 'sell', amount, None, {'reduceOnly': True})
+            price = order.get('average') or order.get('price')
+        else:
+            price = executed.get('price') or executed.get('stopPrice')
+            logging.info(f"{symbol} position already closed by order {executed['id']}")
+        if store is not None:
+            store.apply_fill(symbol, -amount, price)
+            if group is not None:
+                store.close_bracket(group)
+        return price
+    except Exception as e:
+        logging.error(f"Failed to close position: {e}")
+        raise e
+
+# Execute trades; with an OrderStore the open position and its levels survive restarts
+def execute_trades(exchange, df, store=None):
     position = None
     stop_loss = None
     take_profit = None
+    group = None
+    if store is not None and store.position('BTC/USDT') > 0:
+        position = 'long'
+        longs = [b for b in store.open_brackets('BTC/USDT') if b['side'] == 'buy']
+        bracket = longs[-1] if longs else {}
+        group = bracket.get('id')
+        stop_loss, take_profit = bracket.get('stop_loss_price'), bracket.get('take_profit_price')
+        logging.info(f"Resuming long position, Stop Loss: {stop_loss}, Take Profit: {take_profit}")
     
     for i in range(len(df)):
         if df['Buy_Signal'].iloc[i] and position is None:
@@ -115,22 +145,23 @@ def execute_trades(exchange, df):
             stop_loss = df['close'].iloc[i] * 0.95
             take_profit = df['close'].iloc[i] * 1.10
             logging.info(f"Buy at {df['close'].iloc[i]}, Stop Loss: {stop_loss}, Take Profit: {take_profit}")
-            place_order_with_risk_management(exchange, 'BTC/USDT', 'buy', 0.001, 0.05, 0.10)
+            bracket = place_order_with_risk_management(exchange, 'BTC/USDT', 'buy', 0.001, 0.05, 0.10, store)
+            group = str(bracket['entry']['id']) if store is not None else None
         
         elif df['Sell_Signal'].iloc[i] and position == 'long':
             position = None
             logging.info(f"Sell at {df['close'].iloc[i]}")
-            place_order_with_risk_management(exchange, 'BTC/USDT', 'sell', 0.001, 0.05, 0.10)
+            close_position(exchange, 'BTC/USDT', 0.001, store, group)
         
-        elif position == 'long' and df['close'].iloc[i] <= stop_loss:
+        elif position == 'long' and stop_loss is not None and df['close'].iloc[i] <= stop_loss:
             position = None
             logging.info(f"Stop Loss Hit at {df['close'].iloc[i]}")
-            place_order_with_risk_management(exchange, 'BTC/USDT', 'sell', 0.001, 0.05, 0.10)
+            close_position(exchange, 'BTC/USDT', 0.001, store, group)
         
-        elif position == 'long' and df['close'].iloc[i] >= take_profit:
+        elif position == 'long' and take_profit is not None and df['close'].iloc[i] >= take_profit:
             position = None
             logging.info(f"Take Profit Hit at {df['close'].iloc[i]}")
-            place_order_with_risk_management(exchange, 'BTC/USDT', 'sell', 0.001, 0.05, 0.10)
+            close_position(exchange, 'BTC/USDT', 0.001, store, group)
 
 # Main function to run the trade bot
 def run_trade_bot(api_key, api_secret):
@@ -138,6 +169,9 @@ def run_trade_bot(api_key, api_secret):
         # Initialize exchange
         exchange = initialize_exchange(api_key, api_secret)
         
+        # Restore orders and positions from the last run and reconcile with the exchange
+        store = OrderStore.recover(exchange=exchange)
+        
         # Fetch data
         df = fetch_data(exchange)
         
@@ -148,10 +182,12 @@ def run_trade_bot(api_key, api_secret):
         df = generate_signals(df)
         
         # Execute trades
-        execute_trades(exchange, df)
+        execute_trades(exchange, df, store)
+        store.snapshot()
         
         # Print first few rows of data
         print(df.head())
+        logging.info(f"Stage latencies: {default_metrics.summary()}")
     except Exception as e:
         logging.error(f"An error occurred: {e}")
 
@@ -159,4 +195,6 @@ def run_trade_bot(api_key, api_secret):
 if __name__ == "__main__":
     api_key = 'YOUR_API_KEY'
     api_secret = 'YOUR_API_SECRET'
+    start_http_server(9108)
+    dump_on_exit('metrics.prom')
     run_trade_bot(api_key, api_secret)
@@ -0,0 +1,72 @@
+import logging
+import numpy as np
+
+# Map a signal column ('buy'/'sell'/'hold' strings or +1/-1/0 numbers) to int8 codes
+def signal_codes(signal):
+    signal = np.asarray(signal)
+    if signal.dtype.kind in ('U', 'S', 'O'):
+        codes = np.zeros(len(signal), dtype=np.int8)
+        codes[signal == 'buy'] = 1
+        codes[signal == 'sell'] = -1
+        return codes
+    return np.sign(np.nan_to_num(signal)).astype(np.int8)
+
+# Turn signals into a long/flat position series (1 = holding, 0 = flat)
+# A buy opens a position only when flat and a sell closes it only when long,
+# so the position is simply the most recent non-hold signal carried forward.
+def signals_to_positions(signal):
+    codes = signal_codes(signal)
+    last = np.where(codes != 0, np.arange(len(codes)), -1)
+    np.maximum.accumulate(last, out=last)
+    return np.where(last >= 0, codes[last] > 0, False).astype(np.int8)
+
+# Run an all-in/all-out long-only backtest over whole arrays in one pass
+def backtest_vectorized(close, signal, initial_balance=1000, fee=0.0, slippage=0.0):
+    close = np.asarray(close, dtype=np.float64)
+    position = signals_to_positions(signal)
+    if initial_balance <= 0:
+        position[:] = 0
+
+    change = np.diff(position, prepend=np.int8(0))
+    entries = np.flatnonzero(change == 1)
+    exits = np.flatnonzero(change == -1)
+
+    # Fill prices include slippage, fees are charged on both legs of a trade
+    entry_price = close[entries] * (1 + slippage)
+    exit_price = close[exits] * (1 - slippage)
+    growth = (1 - fee) ** 2 * exit_price / entry_price[:len(exits)]
+    cash = initial_balance * np.concatenate(([1.0], np.cumprod(growth)))
+    units = cash[:len(entries)] * (1 - fee) / entry_price
+
+    # Equity is the held units marked to close while long, otherwise the cash after the last exit
+    trade_id = np.cumsum(change == 1) - 1
+    exit_count = np.cumsum(change == -1)
+    equity = np.where(position == 1,
+                      units[np.maximum(trade_id, 0)] * close if len(entries) else 0.0,
+                      cash[exit_count])
+    pnl = np.diff(equity, prepend=float(initial_balance))
+
+    trades = np.zeros(len(entries), dtype=[
+        ('entry_index', np.int64), ('exit_index', np.int64),
+        ('entry_price', np.float64), ('exit_price', np.float64),
+        ('units', np.float64), ('return', np.float64),
+    ])
+    trades['entry_index'] = entries
+    trades['entry_price'] = entry_price
+    trades['units'] = units
+    trades['exit_index'] = -1
+    trades['exit_price'] = np.nan
+    trades['return'] = np.nan
+    trades['exit_index'][:len(exits)] = exits
+    trades['exit_price'][:len(exits)] = exit_price
+    trades['return'][:len(exits)] = growth - 1
+
+    logging.info(f"Vectorized backtest: {len(close)} bars, {len(entries)} trades, final equity {equity[-1] if len(equity) else initial_balance}")
+    return {
+        'position': position,
+        'equity': equity,
+        'pnl': pnl,
+        'trades': trades,
+        'balance': cash[len(exits)] if position[-1:].sum() == 0 else 0.0,
+        'units': units[-1] if position[-1:].sum() == 1 else 0.0,
+    }